@@ -2,81 +2,102 @@ import requests
 import pandas as pd
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 from SQL_DB import SQL_DB
 import numpy as np
 from logging_config import logger
-from utils import generate_batch_id, DataValidator, LivelinessProbe
-
-def fetch_data():
-    # Fetching data from the API
-    url = "https://dapi.bifrost.io/api/site"
-    response = requests.get(url)
+from utils import generate_batch_id, DataValidator, LivelinessProbe, HTTP_TIMEOUT
+from http_cache import cached_get, parse_once, all_unchanged, commit_all
+
+SITE_URL = "https://dapi.bifrost.io/api/site"
+STAKING_URL = "https://dapi.bifrost.io/api/staking"
+
+def site_frame(data):
+    # Flattening and organizing the data for table representation
+    extracted = []
+    for key, value in data.items():
+        if isinstance(value, dict):
+            extracted.append({"Asset": key, **value})
+        else:
+            extracted.append({"Asset": key, "Value": value})
+    return pd.DataFrame(extracted)
+
+def staking_frame(raw_data):
+    # Process the data into the desired structure
+    supported_assets = []
+    for asset in raw_data.get("supportedAssets", []):  # Adjust "assets" if the key is different
+        supported_assets.append({
+            "contractAddress": asset.get("contractAddress", ""),
+            "symbol": asset.get("symbol", ""),
+            "slug": asset.get("slug", ""),
+            "baseSlug": asset.get("baseSlug", ""),
+            "unstakingTime": asset.get("unstakingTime", 0),
+            "users": asset.get("users", 0),
+            "apr": asset.get("apr", 0),
+            "fee": asset.get("fee", 10),
+            "price": asset.get("price", 0.0),
+            "exchangeRatio": asset.get("exchangeRatio", 1.0),
+            "supply": asset.get("supply", 0.0)
+        })
+    return pd.DataFrame(supported_assets)
+
+# The fetchers send conditional requests through http_cache. `responses`, if
+# given, collects the response so the caller can tell whether the body changed
+# and commit it to the cache once the data is stored. The returned DataFrame
+# may be shared with earlier cycles (same body): do not modify it in place.
+def fetch_data(session=None, responses=None):
+    # Fetching data from the site API
+    response = cached_get(SITE_URL, session=session, timeout=HTTP_TIMEOUT, commit=False)
+    if responses is not None:
+        responses.append(response)
 
     # Check if the request was successful
     if response.status_code == 200:
-        data = response.json()
-        
-        # Flattening and organizing the data for table representation
-        def extract_data(data):
-            extracted = []
-            for key, value in data.items():
-                if isinstance(value, dict):
-                    extracted.append({"Asset": key, **value})
-                else:
-                    extracted.append({"Asset": key, "Value": value})
-            return extracted
-
-        # Create DataFrame
-        flattened_data = extract_data(data)
-        df = pd.DataFrame(flattened_data)
-
-        return df 
+        return parse_once(response, site_frame)
     else:
         logger.error(f"Failed to fetch data from site API. Status code: {response.status_code}")
 
-def fetch_data2():
+def fetch_data2(session=None, responses=None):
     # fetching data from staking API 
-    # Define the URL to fetch data from
-    url = "https://dapi.bifrost.io/api/staking"  
-
-    # Fetch data from the API
-    response = requests.get(url)
+    response = cached_get(STAKING_URL, session=session, timeout=HTTP_TIMEOUT, commit=False)
+    if responses is not None:
+        responses.append(response)
 
     if response.status_code == 200:
-        # Parse the response JSON
-        raw_data = response.json()
-
-        # Process the data into the desired structure
-        processed_data = {
-            "name": "Bifrost",
-            "supportedAssets": []
-        }
-
-        for asset in raw_data.get("supportedAssets", []):  # Adjust "assets" if the key is different
-            asset_data = {
-                "contractAddress": asset.get("contractAddress", ""),
-                "symbol": asset.get("symbol", ""),
-                "slug": asset.get("slug", ""),
-                "baseSlug": asset.get("baseSlug", ""),
-                "unstakingTime": asset.get("unstakingTime", 0),
-                "users": asset.get("users", 0),
-                "apr": asset.get("apr", 0),
-                "fee": asset.get("fee", 10),
-                "price": asset.get("price", 0.0),
-                "exchangeRatio": asset.get("exchangeRatio", 1.0),
-                "supply": asset.get("supply", 0.0)
-            }
-            processed_data["supportedAssets"].append(asset_data)
-        
-        df2 = pd.DataFrame(processed_data["supportedAssets"])
-        return df2
-
-        #print(f"Data successfully processed and saved to {processed_data}")
+        return parse_once(response, staking_frame)
     else:
         logger.error(f"Failed to fetch data from staking API. Status code: {response.status_code}")
 
+def retry_delay(failures):
+    """
+    Seconds to wait after `failures` failed cycles in a row: BIFROST_RETRY_DELAY
+    (default 30) doubled per failure, capped at BIFROST_RETRY_MAX_DELAY (default 900).
+    """
+    base = float(os.getenv("BIFROST_RETRY_DELAY", 30))
+    cap = float(os.getenv("BIFROST_RETRY_MAX_DELAY", 900))
+    return min(cap, base * 2 ** max(0, failures - 1))
+
+def fetch_site_and_staking(session=None, responses=None):
+    """
+    Fetch /api/site and /api/staking concurrently. Returns (df1, df2), or None
+    if either request failed (error or non-200 response).
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {"site": executor.submit(fetch_data, session, responses),
+                   "staking": executor.submit(fetch_data2, session, responses)}
+    frames = {}
+    for name, future in futures.items():
+        try:
+            frames[name] = future.result()
+        except Exception as e:
+            logger.warning(f"Warning, fetching {name} API error, try again later: {e}")
+            frames[name] = None
+    if frames["site"] is None or frames["staking"] is None:
+        return None
+    return frames["site"], frames["staking"]
+
 def sanitize_df(df: pd.DataFrame) -> pd.DataFrame:
     if df is None:
         return df
@@ -107,7 +128,7 @@ def sanitize_df(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-def run_pipeline(db_config=None, single_run=False):
+def connect_db(db_config=None):
     # Load environment variables from .env file (if present)
     load_dotenv()
 
@@ -124,40 +145,54 @@ def run_pipeline(db_config=None, single_run=False):
         db_port = int(os.getenv("DB_PORT",3306))
         db_host = os.getenv("DB_HOST", "127.0.0.1")
     
-    sqlDB = SQL_DB(db_config=db_config, userName = db_user, passWord = db_password, dataBase = db_name, host=db_host, port = db_port, initializeTable=True)  # connect to the database
+    return SQL_DB(db_config=db_config, userName = db_user, passWord = db_password, dataBase = db_name, host=db_host, port = db_port, initializeTable=True)  # connect to the database
+
+def collect_once(sqlDB, session=None):
+    """One fetch-and-store cycle. Returns False if an API could not be fetched."""
+    responses = []
+    frames = fetch_site_and_staking(session, responses)
+    if frames is None:
+        return False
+    if len(responses) == 2 and all_unchanged(responses):
+        logger.info("Site and staking responses unchanged since the last stored batch. Skipping DB update.")
+        return True
+    data_frames1, data_frames2 = frames
+    
+    df1 =  sanitize_df(data_frames1)
+    df2 =  sanitize_df(data_frames2)
+
+    # Compute hash for deduplication (frames are hashed directly, no records round trip)
+    data_to_hash = {
+        "df1": df1 if df1 is not None else [],
+        "df2": df2 if df2 is not None else []
+    }
+    current_hash = DataValidator.compute_hash(data_to_hash)
+    last_hash = sqlDB.get_last_bifrost_hash()
+    
+    if current_hash and current_hash == last_hash:
+        logger.info("Duplicate data detected (hash matches last batch). Skipping DB update.")
+    else:
+        batch_id = generate_batch_id()
+        if not sqlDB.update_bifrost_database(df1, df2, batch_id, data_hash=current_hash):
+            # keep the bodies uncommitted so the next cycle stores them again
+            return False
+    commit_all(responses)
+    return True
+
+def run_pipeline(db_config=None, single_run=False):
+    sqlDB = connect_db(db_config)
+    failures = 0
 
     while True:
         logger.info("Fetching data...")
-        try:
-            data_frames1 = fetch_data()
-        except Exception as e:
-            logger.warning(f"Warning, fetching site API error, try again later: {e}")
+        if not collect_once(sqlDB):
             if single_run: return # Exit on error if single run
+            failures += 1
+            delay = retry_delay(failures)
+            logger.info(f"Fetch failed {failures} time(s) in a row, retrying in {delay:.0f}s...")
+            time.sleep(delay)
             continue
-        
-        try:
-            data_frames2 = fetch_data2()
-        except Exception as e:
-            logger.warning(f"Warning, fetching staking API error, try again later: {e}")
-            if single_run: return # Exit on error if single run
-            continue 
-        
-        df1 =  sanitize_df(data_frames1)
-        df2 =  sanitize_df(data_frames2)
-
-        # Compute hash for deduplication
-        data_to_hash = {
-            "df1": df1.to_dict('records') if df1 is not None else [],
-            "df2": df2.to_dict('records') if df2 is not None else []
-        }
-        current_hash = DataValidator.compute_hash(data_to_hash)
-        last_hash = sqlDB.get_last_bifrost_hash()
-        
-        if current_hash and current_hash == last_hash:
-            logger.info("Duplicate data detected (hash matches last batch). Skipping DB update.")
-        else:
-            batch_id = generate_batch_id()
-            sqlDB.update_bifrost_database(df1, df2, batch_id, data_hash=current_hash)
+        failures = 0
 
         if single_run:
             logger.info("Single run completed.")
@@ -3,13 +3,16 @@ import requests
 import json
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 import os
 
 from SQL_DB_hydration import SQL_DB_Hydration
 from logging_config import logger
-from utils import LivelinessProbe
+from utils import LivelinessProbe, HTTP_TIMEOUT, create_http_session
+from node_worker import get_worker, worker_enabled
+from http_cache import cached_get, parse_once
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,6 +22,11 @@ db_name = os.getenv("DB_NAME")
 db_port = os.getenv("DB_PORT",3306)
 db_host = os.getenv("DB_HOST", "127.0.0.1")
 
+# Hydration stats API; overridable so tests can point at a local HTTP stand-in
+API_BASE = os.getenv("HYDRATION_API_BASE", "https://hydradx-api-app-2u5klwxkrq-ey.a.run.app/hydradx-ui/v1/stats")
+# Max concurrent TVL/volume requests per cycle (1 = serial)
+FETCH_CONCURRENCY = int(os.getenv("HYDRATION_FETCH_CONCURRENCY", 16))
+
 # Validate environment variables
 required_env_vars = {
     "DB_USERNAME": db_user,
@@ -42,6 +50,13 @@ def load_assets():
 
 # 2. Run TypeScript script
 def fetch_farm_apr():
+    if worker_enabled():
+        try:
+            return get_worker().call("farmApr", {"from": 1, "to": 35})
+        except Exception as e:
+            logger.error(f"Error fetching farm APR: {e}")
+            return {}
+
     script_path = "hy/script/getTop35Apr3.ts"
     output_file = "./farm_apr.json"
     try:
@@ -53,25 +68,29 @@ def fetch_farm_apr():
         return {}
 
 # 3. Fetch TVL
-def fetch_tvl(asset_id):
-    url = f"https://hydradx-api-app-2u5klwxkrq-ey.a.run.app/hydradx-ui/v1/stats/tvl/{asset_id}"
+def tvl_value(data):
+    return float(data[0].get('tvl_usd', 0)) if data else 0
+
+def fetch_tvl(asset_id, session=None):
+    url = f"{API_BASE}/tvl/{asset_id}"
     try:
-        response = requests.get(url)
+        response = cached_get(url, session=session, timeout=HTTP_TIMEOUT)
         if response.status_code == 200:
-            data = response.json()
-            return float(data[0].get('tvl_usd', 0)) if data else 0
+            return parse_once(response, tvl_value)
         return 0
     except Exception:
         return 0
 
 # 4. Fetch latest volume
-def fetch_latest_volume(asset_id):
-    url = f"https://hydradx-api-app-2u5klwxkrq-ey.a.run.app/hydradx-ui/v1/stats/volume/{asset_id}"
+def volume_value(data):
+    return float(data[-1].get('volume_usd', 0)) if data else 0
+
+def fetch_latest_volume(asset_id, session=None):
+    url = f"{API_BASE}/volume/{asset_id}"
     try:
-        response = requests.get(url)
+        response = cached_get(url, session=session, timeout=HTTP_TIMEOUT)
         if response.status_code == 200:
-            data = response.json()
-            return float(data[-1].get('volume_usd', 0)) if data else 0
+            return parse_once(response, volume_value)
         return 0
     except Exception:
         return 0
@@ -85,15 +104,39 @@ def calculate_pool_apr(tvl, volume_24h):
 def calculate_total_apr(farm_apr, pool_apr):
     return farm_apr + pool_apr
 
+# Fetch TVL and volume for every asset, up to `concurrency` requests in flight
+def fetch_tvl_and_volume(asset_ids, concurrency=None, session=None):
+    """
+    Returns {asset_id: (tvl, volume)}. All requests share one keep-alive
+    session; concurrency=1 falls back to the serial path.
+    """
+    concurrency = max(1, int(concurrency or FETCH_CONCURRENCY))
+    own_session = session is None
+    if own_session:
+        session = create_http_session(pool_maxsize=concurrency)
+    tasks = [(fn, asset_id) for asset_id in asset_ids for fn in (fetch_tvl, fetch_latest_volume)]
+    try:
+        if concurrency == 1:
+            results = [fn(asset_id, session=session) for fn, asset_id in tasks]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                # map() keeps input order, so output is deterministic
+                results = list(executor.map(lambda t: t[0](t[1], session=session), tasks))
+    finally:
+        if own_session:
+            session.close()
+    return {asset_id: (results[2 * i], results[2 * i + 1]) for i, asset_id in enumerate(asset_ids)}
+
 # Process data
-def process_data(assets, farm_apr_data):
+def process_data(assets, farm_apr_data, concurrency=None, session=None):
     processed_data = []
     symbol_lookup = {str(asset['ID']): asset['Symbol'] for asset in assets}
+    asset_ids = [str(asset_id) for asset_id in farm_apr_data]
+    stats = fetch_tvl_and_volume(asset_ids, concurrency=concurrency, session=session)
     for asset_id, farm_apr in farm_apr_data.items():
         asset_id_str = str(asset_id)
         symbol = symbol_lookup.get(asset_id_str, 'N/A')
-        tvl = fetch_tvl(asset_id_str)
-        volume = fetch_latest_volume(asset_id_str)
+        tvl, volume = stats[asset_id_str]
         pool_apr = calculate_pool_apr(tvl, volume)
         total_apr = calculate_total_apr(float(farm_apr), pool_apr)
         processed_data.append({
@@ -108,17 +151,26 @@ def process_data(assets, farm_apr_data):
         })
     return processed_data
 
+def connect_db():
+    return SQL_DB_Hydration(userName=db_user, passWord=db_password, host=db_host, db_port=db_port, dataBase=db_name, initializeTable=True)
+
+def collect_once(sql_db, session=None):
+    """One fetch-and-store batch. Returns False if there was nothing to store."""
+    logger.info("Starting Hydration data fetch batch...")
+    batch_id = int(time.time())
+    assets = load_assets()
+    farm_apr_data = fetch_farm_apr()
+    if not (assets and farm_apr_data):
+        return False
+    processed_data = process_data(assets, farm_apr_data, session=session)
+    sql_db.update_hydration_database(processed_data, batch_id)
+    return True
+
 def main():
-    sql_db = SQL_DB_Hydration(userName=db_user, passWord=db_password, host=db_host, db_port=db_port, dataBase=db_name, initializeTable=True)
+    sql_db = connect_db()
     try:
         while True:
-            logger.info("Starting Hydration data fetch batch...")
-            batch_id = int(time.time())
-            assets = load_assets()
-            farm_apr_data = fetch_farm_apr()
-            if assets and farm_apr_data:
-                processed_data = process_data(assets, farm_apr_data)
-                sql_db.update_hydration_database(processed_data, batch_id)
+            collect_once(sql_db)
             LivelinessProbe.record_heartbeat("hydration")
             time.sleep(3600)     # sleep 1 hour
     except KeyboardInterrupt:
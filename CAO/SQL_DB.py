@@ -19,11 +19,18 @@ from datetime import timedelta
 import pandas as pd
 import math
 from logging_config import logger
+from db_pool import get_pool
+from bulk_writer import BulkWriter, build_rows
+from latest_batch import CREATE_LATEST_BATCH_SQL, registry_writer, registry_rows
 # we have one bot database for public, create the sql user name and password and 
 # also the database, and save it in the .env file 
 
 # need to: pip install mysql-connector-python
 
+# current row per asset / symbol, upserted with every Bifrost batch (see update_bifrost_database)
+SITE_LATEST_COLUMNS = ("Asset", "tvl", "apy", "apyBase", "apyReward")
+STAKING_LATEST_COLUMNS = ("symbol", "price")
+
 
 class SQL_DB:
     def __init__(self, db_config = None, userName = None, passWord = None, port = None, host = None, dataBase = None, initializeTable = False):
@@ -71,7 +78,9 @@ class SQL_DB:
         self.tables = {
             "Bifrost_site_table": "Bifrost_site_table",
             "Bifrost_staking_table": "Bifrost_staking_table",
-            "Bifrost_batchID_table": "Bifrost_batchID_table"
+            "Bifrost_batchID_table": "Bifrost_batchID_table",
+            "Bifrost_site_latest": "Bifrost_site_latest",
+            "Bifrost_staking_latest": "Bifrost_staking_latest"
         }
         
         # Override with custom table names if provided
@@ -81,6 +90,13 @@ class SQL_DB:
         # Also support passing table_names directly if not using db_config dict
         if isinstance(db_config, dict) and "table_names" in db_config:
              pass
+
+        self.site_latest_writer = BulkWriter(self.tables["Bifrost_site_latest"], SITE_LATEST_COLUMNS,
+                                             leading_columns=("batch_id",),
+                                             update_columns=("batch_id",) + SITE_LATEST_COLUMNS[1:])
+        self.staking_latest_writer = BulkWriter(self.tables["Bifrost_staking_latest"], STAKING_LATEST_COLUMNS,
+                                                leading_columns=("batch_id",),
+                                                update_columns=("batch_id",) + STAKING_LATEST_COLUMNS[1:])
              
         if initializeTable == True:
              self.initialize_tables()
@@ -177,6 +193,26 @@ class SQL_DB:
         """
             # create Bifrost staking table
             self.executeSQL(sql_command)
+
+            # latest batch per source, maintained by update_bifrost_database
+            self.executeSQL(CREATE_LATEST_BATCH_SQL)
+
+            # latest APY row per Asset / latest price per symbol, maintained by update_bifrost_database
+            self.executeSQL(f"""CREATE TABLE IF NOT EXISTS {self.tables['Bifrost_site_latest']} (
+            Asset VARCHAR(255) NOT NULL PRIMARY KEY,
+            batch_id INT NOT NULL,
+            tvl DECIMAL(20,6),
+            apy DECIMAL(20,6),
+            apyBase DECIMAL(20,6),
+            apyReward DECIMAL(20,6),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        );""")
+            self.executeSQL(f"""CREATE TABLE IF NOT EXISTS {self.tables['Bifrost_staking_latest']} (
+            symbol VARCHAR(50) NOT NULL PRIMARY KEY,
+            batch_id INT NOT NULL,
+            price DECIMAL(20,6),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        );""")
             
             # Ensure hash column exists (idempotent check)
             # Use raw string for table name in WHERE clause safely
@@ -208,30 +244,26 @@ class SQL_DB:
         logger.error(f"SQL Error: {message}")
 
 
+    def _pool(self):
+        # shared across every SQL_DB_* instance using the same credentials
+        return get_pool(self.userName, self.passWord, self.host, self.dataBase, self.port)
+
     def executeSQL(self, query,params=None):
         try:
-            self.cnx = mysql.connector.connect(
-                user=self.userName, 
-                password=self.passWord, 
-                host=self.host,
-                database=self.dataBase,
-                port=self.port
-            )
-            cursor = self.cnx.cursor()
-            if params == None:
-                cursor.execute(query)
-            else:
-                cursor.execute(query, params)
-            #print("Now execute the query " + query)
-            try:
-                values = cursor.fetchall()
-            except:
-                values = None
-            self.cnx.commit()      # this is important, otherwise you cannot invert the record
-            #print("done! nothing happened?")
-            cursor.close()
-            self.cnx.close()
-            return values
+            with self._pool().connection() as cnx:
+                cursor = cnx.cursor()
+                if params == None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query, params)
+                #print("Now execute the query " + query)
+                try:
+                    values = cursor.fetchall()
+                except:
+                    values = None
+                cnx.commit()      # this is important, otherwise you cannot invert the record
+                cursor.close()
+                return values
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 self.errorMessage("Something is wrong with your user name or password")
@@ -243,6 +275,32 @@ class SQL_DB:
             logger.exception(f"Unexpected error in executeSQL: {err}")
 
 
+    def executeManySQL(self, statements):
+        """
+        Runs a list of (query, rows) pairs with executemany on one pooled
+        connection and commits once. Either every row is written or none.
+        Returns True on commit, False if the transaction was rolled back.
+        """
+        try:
+            with self._pool().connection() as cnx:
+                cursor = cnx.cursor()
+                for query, rows in statements:
+                    if rows:
+                        cursor.executemany(query, rows)
+                cnx.commit()
+                cursor.close()
+                return True
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                self.errorMessage("Something is wrong with your user name or password")
+            elif err.errno == errorcode.ER_BAD_DB_ERROR:
+                self.errorMessage("Database does not exist")
+            else:
+                self.errorMessage(err)
+        except Exception as err:
+            logger.exception(f"Unexpected error in executeManySQL: {err}")
+        return False
+
     def update_bifrost_database(self, df1, df2, batch_id, data_hash=None):
         """
         Updates the database with the records from two dataframes using the same batch_id.
@@ -253,66 +311,62 @@ class SQL_DB:
         - df3: The bifrost batch ID table
         - batch_id: A unique ID for this batch of data insertion.
         - data_hash: SHA256 hash of the data content for deduplication.
+
+        Returns True if the batch was committed, False if it was rolled back.
         """
         # Define the table names
         table1 = self.tables["Bifrost_site_table"]
         table2 = self.tables["Bifrost_staking_table"]
         table3 = self.tables["Bifrost_batchID_table"]
 
-        # ---------- helper to clean + convert a single value ----------
-        def clean_value(val):
-            # Lists -> JSON string
-            if isinstance(val, list):
-                return json.dumps(val)
-
-            # None / NaN -> None (becomes NULL in MySQL)
-            if val is None or (isinstance(val, float) and (math.isnan(val) or math.isinf(val))):
-                return None
-
-            # Pandas-style NaN / NaT detection for any type
-            try:
-                if pd.isna(val):
-                    return None
-            except TypeError:
-                # pd.isna() can raise on some non-numeric types, ignore
-                pass
+        # ---------- build (query, rows) for one dataframe, column-wise ----------
+        def bulk_insert(table, df):
+            cols = df.columns.tolist()
+            # +1 for batch_id
+            placeholders = ", ".join(["%s"] * (len(cols) + 1))
+            col_names = ", ".join(["batch_id"] + cols)
+            query = f"INSERT INTO {table} ({col_names}) VALUES ({placeholders})"
+            return query, build_rows(df, cols, leading=(batch_id,))
 
-            # Otherwise keep value as-is (str, int, float, etc.)
-            return val
+        statements = []
 
         # ============= INSERT df1 into Bifrost_site_table =============
         if df1 is not None and len(df1) > 0:
-            cols1 = df1.columns.tolist()
-            # +1 for batch_id
-            placeholders1 = ", ".join(["%s"] * (len(cols1) + 1))
-            col_names1 = ", ".join(["batch_id"] + cols1)
-            query1 = f"INSERT INTO {table1} ({col_names1}) VALUES ({placeholders1})"
-
-            for _, row in df1.iterrows():
-                params = [batch_id]
-                for val in row.tolist():
-                    params.append(clean_value(val))
-                # Use parameterized query
-                self.executeSQL(query1, params)
+            statements.append(bulk_insert(table1, df1))
 
         # ============= INSERT df2 into Bifrost_staking_table ==========
         if df2 is not None and len(df2) > 0:
-            cols2 = df2.columns.tolist()
-            placeholders2 = ", ".join(["%s"] * (len(cols2) + 1))
-            col_names2 = ", ".join(["batch_id"] + cols2)
-            query2 = f"INSERT INTO {table2} ({col_names2}) VALUES ({placeholders2})"
-
-            for _, row in df2.iterrows():
-                params = [batch_id]
-                for val in row.tolist():
-                    params.append(clean_value(val))
-                self.executeSQL(query2, params)
+            statements.append(bulk_insert(table2, df2))
 
         # ============= INSERT batch_id into Bifrost_batchID_table =====
         query3 = f"INSERT INTO {table3} (batch_id, chain, status, data_hash) VALUES (%s, %s, %s, %s)"
-        self.executeSQL(query3, (batch_id, "Bifrost", "F", data_hash))
+        statements.append((query3, [(batch_id, "Bifrost", "F", data_hash)]))
+
+        # ============= point latest_batch at this batch ===============
+        registry = registry_rows({
+            table1: 0 if df1 is None else len(df1),
+            table2: 0 if df2 is None else len(df2),
+        }, batch_id, data_hash)
+        statements.append((registry_writer.insert_sql(1), build_rows(registry, registry_writer.columns)))
+
+        # ============= current row per Asset / symbol =================
+        # only rows the combiner can use replace the previous ones: an Asset
+        # needs at least one APY value, a symbol needs a price
+        if df1 is not None and len(df1) > 0:
+            rows = [r for r in build_rows(df1, SITE_LATEST_COLUMNS, leading=(batch_id,))
+                    if r[1] is not None and any(v is not None for v in r[3:])]
+            statements.append((self.site_latest_writer.insert_sql(1), rows))
+        if df2 is not None and len(df2) > 0:
+            rows = [r for r in build_rows(df2, STAKING_LATEST_COLUMNS, leading=(batch_id,))
+                    if r[1] is not None and r[2] is not None]
+            statements.append((self.staking_latest_writer.insert_sql(1), rows))
 
-        logger.info(f"Records successfully updated for batch_id {batch_id}.")
+        # all rows of the batch go in with one connection and one commit
+        if self.executeManySQL(statements):
+            logger.info(f"Records successfully updated for batch_id {batch_id}.")
+            return True
+        logger.error(f"Bifrost batch {batch_id} was rolled back.")
+        return False
 
     def get_last_bifrost_hash(self):
         """Fetches the data_hash of the most recent Bifrost batch."""
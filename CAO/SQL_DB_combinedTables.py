@@ -8,8 +8,16 @@ Adds columns:
   - `chain`  : 'hydration' | 'moonbeam' | 'bifrost'
   - `price`  : matched from latest Hydration_price (by symbol), else from latest per-symbol Bifrost_staking_table, else NULL
 
+Incremental mode (default): full_table_watermark records the newest batch_id
+of every source that has been combined. A run only inserts the rows of
+sources with a newer batch (for Bifrost: assets whose latest row is newer),
+and a run without new batches returns after two small reads. Prices are
+looked up for the rows being inserted; a new price batch alone does not
+trigger a run.
+
 Environment (.env) variables:
   DB_USERNAME, DB_PASSWORD, DB_HOST (default 127.0.0.1), DB_NAME
+  COMBINE_INCREMENTAL  1 = only combine new batches (default), 0 = re-insert the latest batches every run
 
 Usage:
   python SQL_DB_combinedTables.py            # run once
@@ -24,9 +32,17 @@ import mysql.connector
 from mysql.connector import Error as MySQLError
 from dotenv import load_dotenv
 from logging_config import logger
+from latest_batch import SELECT_LATEST_BATCHES_SQL
 
 Decimal = decimal.Decimal
 
+# sources with their own batches in full_table
+COMBINED_SOURCES = ("hydration_data", "pool_data", "Bifrost_site_table")
+
+
+def combine_incremental() -> bool:
+    return os.getenv("COMBINE_INCREMENTAL", "1") != "0"
+
 
 def _to_decimal(v: Any) -> Optional[Decimal]:
     """Safe conversion to Decimal; returns None for '', 'nan', etc."""
@@ -57,6 +73,7 @@ class SQL_DB_CombinedTables:
         self.host = host
         self.port = db_port
         self.conn = None  # type: ignore
+        self._registry: Dict[str, int] = {}
 
     # ---------- DB helpers ----------
     def connect(self) -> None:
@@ -113,6 +130,21 @@ class SQL_DB_CombinedTables:
             self.execute("ALTER TABLE full_table ADD COLUMN price DECIMAL(40,18) NULL")
         except MySQLError:
             pass
+        self.execute(
+            """
+            CREATE TABLE IF NOT EXISTS full_table_watermark (
+                source VARCHAR(64) NOT NULL PRIMARY KEY,
+                batch_id BIGINT NOT NULL,
+                combined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+            ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """
+        )
+
+    def combined_watermarks(self) -> Dict[str, int]:
+        """{source: newest batch_id already in full_table}."""
+        rows = self.execute("SELECT source, batch_id FROM full_table_watermark")
+        return {r["source"]: int(r["batch_id"]) for r in rows}
 
     # ---------- Utility ----------
     def table_columns_lower(self, table: str) -> List[str]:
@@ -126,7 +158,18 @@ class SQL_DB_CombinedTables:
         )
         return [r["cname"] for r in rows]
 
+    def latest_batches(self) -> Dict[str, int]:
+        """{source: batch_id} from the latest_batch registry ({} if it cannot be read)."""
+        try:
+            rows = self.execute(SELECT_LATEST_BATCHES_SQL)
+        except MySQLError as e:
+            logger.warning(f"latest_batch registry unavailable, sorting source tables instead: {e}")
+            return {}
+        return {r["source"]: int(r["batch_id"]) for r in rows}
+
     def latest_batch_id(self, table: str) -> Optional[int]:
+        if table in self._registry:
+            return self._registry[table]
         rows = self.execute(
             f"""
             SELECT batch_id
@@ -137,6 +180,67 @@ class SQL_DB_CombinedTables:
         )
         return int(rows[0]["batch_id"]) if rows else None
 
+    # ---------- Latest-per-key reads ----------
+    # Full-history aggregations, only used while the *_latest tables are missing
+    # (they are created by SQL_DB.initialize_tables / migration 4).
+    EXCLUDED_BIFROST_ASSETS = "('tvl','addresses','revenue','bncprice')"
+
+    Q_STAKING_PRICE_HISTORY = """
+    SELECT s.symbol, s.price
+    FROM Bifrost_staking_table s
+    JOIN (
+        SELECT symbol, MAX(created_at) AS max_created
+        FROM Bifrost_staking_table
+        WHERE symbol IS NOT NULL AND price IS NOT NULL
+        GROUP BY symbol
+    ) m
+      ON m.symbol = s.symbol AND s.created_at = m.max_created
+    JOIN (
+        SELECT s2.symbol, s2.created_at, MAX(s2.batch_id) AS max_batch
+        FROM Bifrost_staking_table s2
+        WHERE s2.symbol IS NOT NULL AND s2.price IS NOT NULL
+        GROUP BY s2.symbol, s2.created_at
+    ) b
+      ON b.symbol = s.symbol AND b.created_at = s.created_at AND b.max_batch = s.batch_id
+    """
+
+    Q_SITE_APY_HISTORY = f"""
+    SELECT t.Asset AS sym,
+           t.apyReward AS farming_apy,
+           t.apyBase   AS base_apy,
+           COALESCE(t.apy, t.apyBase + t.apyReward) AS total_apy,
+           t.tvl       AS tvl_val,
+           t.batch_id,
+           t.created_at
+    FROM Bifrost_site_table t
+    JOIN (
+        SELECT Asset, MAX(created_at) AS max_created
+        FROM Bifrost_site_table
+        WHERE Asset IS NOT NULL
+          AND LOWER(Asset) NOT IN {EXCLUDED_BIFROST_ASSETS}
+          AND (apy IS NOT NULL OR apyBase IS NOT NULL OR apyReward IS NOT NULL)
+        GROUP BY Asset
+    ) m
+      ON m.Asset = t.Asset AND t.created_at = m.max_created
+    JOIN (
+        SELECT Asset, created_at, MAX(batch_id) AS max_batch
+        FROM Bifrost_site_table
+        WHERE Asset IS NOT NULL
+          AND LOWER(Asset) NOT IN {EXCLUDED_BIFROST_ASSETS}
+          AND (apy IS NOT NULL OR apyBase IS NOT NULL OR apyReward IS NOT NULL)
+        GROUP BY Asset, created_at
+    ) b
+      ON b.Asset = t.Asset AND b.created_at = t.created_at AND b.max_batch = t.batch_id
+    """
+
+    def read_latest(self, query: str, history_query: str) -> List[Dict[str, Any]]:
+        """Read a *_latest table (O(keys) rows); aggregate the history if it is not there."""
+        try:
+            return self.execute(query)
+        except MySQLError as e:
+            logger.warning(f"Latest-per-key table unavailable, aggregating history instead: {e}")
+            return self.execute(history_query)
+
     # ---------- Latest price map (Hydration primary, Bifrost staking fallback per symbol) ----------
     def latest_price_map(self) -> Dict[str, Decimal]:
         mp: Dict[str, Decimal] = {}
@@ -163,28 +267,11 @@ class SQL_DB_CombinedTables:
             except MySQLError as e:
                 logger.warning(f"Hydration_price read failed for batch {hydr_batch}: {e}")
 
-        # 2) Fallback: latest-per-symbol from Bifrost_staking_table
-        # (self-join version works on MySQL 5.7+; adds batch_id tie-breaker)
+        # 2) Fallback: latest-per-symbol from Bifrost_staking_latest (kept current by the Bifrost writer)
         try:
-            rows = self.execute(
-                """
-                SELECT s.symbol, s.price
-                FROM Bifrost_staking_table s
-                JOIN (
-                    SELECT symbol, MAX(created_at) AS max_created
-                    FROM Bifrost_staking_table
-                    WHERE symbol IS NOT NULL AND price IS NOT NULL
-                    GROUP BY symbol
-                ) m
-                  ON m.symbol = s.symbol AND s.created_at = m.max_created
-                JOIN (
-                    SELECT s2.symbol, s2.created_at, MAX(s2.batch_id) AS max_batch
-                    FROM Bifrost_staking_table s2
-                    WHERE s2.symbol IS NOT NULL AND s2.price IS NOT NULL
-                    GROUP BY s2.symbol, s2.created_at
-                ) b
-                  ON b.symbol = s.symbol AND b.created_at = s.created_at AND b.max_batch = s.batch_id
-                """
+            rows = self.read_latest(
+                "SELECT symbol, price FROM Bifrost_staking_latest WHERE price IS NOT NULL",
+                self.Q_STAKING_PRICE_HISTORY,
             )
             for r in rows:
                 sym = r.get("symbol")
@@ -265,39 +352,23 @@ class SQL_DB_CombinedTables:
     # --- New: use Bifrost_site_table latest non-NULL per Asset (APY comes from site table) ---
     def rows_from_bifrost_site_latest(self, price_map: Dict[str, Decimal]) -> List[Dict[str, Any]]:
         """
-        Pull the latest non-NULL APY row per Asset from Bifrost_site_table
-        (independent of batch_id), and match price via price_map.
+        Pull the latest non-NULL APY row per Asset (independent of batch_id) from
+        Bifrost_site_latest, and match price via price_map.
         """
         try:
-            rows = self.execute(
-                """
-                SELECT t.Asset AS sym,
-                       t.apyReward AS farming_apy,
-                       t.apyBase   AS base_apy,
-                       COALESCE(t.apy, t.apyBase + t.apyReward) AS total_apy,
-                       t.tvl       AS tvl_val,
-                       t.batch_id,
-                       t.created_at
-                FROM Bifrost_site_table t
-                JOIN (
-                    SELECT Asset, MAX(created_at) AS max_created
-                    FROM Bifrost_site_table
-                    WHERE Asset IS NOT NULL
-                      AND LOWER(Asset) NOT IN ('tvl','addresses','revenue','bncprice')
-                      AND (apy IS NOT NULL OR apyBase IS NOT NULL OR apyReward IS NOT NULL)
-                    GROUP BY Asset
-                ) m
-                  ON m.Asset = t.Asset AND t.created_at = m.max_created
-                JOIN (
-                    SELECT Asset, created_at, MAX(batch_id) AS max_batch
-                    FROM Bifrost_site_table
-                    WHERE Asset IS NOT NULL
-                      AND LOWER(Asset) NOT IN ('tvl','addresses','revenue','bncprice')
-                      AND (apy IS NOT NULL OR apyBase IS NOT NULL OR apyReward IS NOT NULL)
-                    GROUP BY Asset, created_at
-                ) b
-                  ON b.Asset = t.Asset AND b.created_at = t.created_at AND b.max_batch = t.batch_id
-                """
+            rows = self.read_latest(
+                f"""
+                SELECT Asset AS sym,
+                       apyReward AS farming_apy,
+                       apyBase   AS base_apy,
+                       COALESCE(apy, apyBase + apyReward) AS total_apy,
+                       tvl       AS tvl_val,
+                       batch_id,
+                       created_at
+                FROM Bifrost_site_latest
+                WHERE LOWER(Asset) NOT IN {self.EXCLUDED_BIFROST_ASSETS}
+                """,
+                self.Q_SITE_APY_HISTORY,
             )
         except MySQLError as e:
             logger.warning(f"Bifrost_site_table latest-per-asset read failed: {e}")
@@ -325,8 +396,9 @@ class SQL_DB_CombinedTables:
         return out
 
     # ---------- Insert ----------
-    def insert_full_rows(self, rows: List[Dict[str, Any]]) -> int:
-        if not rows:
+    def insert_full_rows(self, rows: List[Dict[str, Any]], watermarks: Optional[Dict[str, int]] = None) -> int:
+        """Insert rows and advance the watermarks of their sources in one transaction."""
+        if not rows and not watermarks:
             return 0
         cur = self.cursor()
         sql = """
@@ -351,18 +423,47 @@ class SQL_DB_CombinedTables:
             )
             for r in rows
         ]
-        cur.executemany(sql, data)
+        if data:
+            cur.executemany(sql, data)
+        if watermarks:
+            cur.executemany(
+                """
+                INSERT INTO full_table_watermark (source, batch_id) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE batch_id = GREATEST(batch_id, VALUES(batch_id))
+                """,
+                list(watermarks.items()),
+            )
         self.conn.commit()
         cur.close()
         return len(rows)
 
     # ---------- Main ----------
-    def run_once(self) -> None:
+    def run_once(self, incremental: Optional[bool] = None) -> None:
+        if incremental is None:
+            incremental = combine_incremental()
         self.ensure_full_table()
 
+        # one primary-key read instead of an ORDER BY per source table
+        self._registry = self.latest_batches()
         hydration_batch = self.latest_batch_id("hydration_data")
         pool_batch = self.latest_batch_id("pool_data")
 
+        combined: Dict[str, int] = {}
+        new: Dict[str, int] = {}
+        if incremental:
+            combined = self.combined_watermarks()
+            current = {
+                "hydration_data": hydration_batch,
+                "pool_data": pool_batch,
+                "Bifrost_site_table": self.latest_batch_id("Bifrost_site_table"),
+            }
+            new = {src: b for src, b in current.items() if b is not None and b > combined.get(src, -1)}
+            if not new:
+                logger.info("No new batches since the last combine; full_table unchanged.")
+                return
+            hydration_batch = new.get("hydration_data")
+            pool_batch = new.get("pool_data")
+
         # Build latest price map from Hydration + (fallback) Bifrost staking (latest per symbol)
         price_map = self.latest_price_map()
         price_batch = getattr(self, "_latest_price_batch", None)
@@ -374,15 +475,23 @@ class SQL_DB_CombinedTables:
             rows.extend(self.rows_from_pool(pool_batch, price_map))
 
         # Always use Bifrost_site_table latest-per-asset for APY
-        rows.extend(self.rows_from_bifrost_site_latest(price_map))
-
-        inserted = self.insert_full_rows(rows)
+        if not incremental:
+            rows.extend(self.rows_from_bifrost_site_latest(price_map))
+        elif "Bifrost_site_table" in new:
+            # only assets whose current row arrived after the last combine, up to the
+            # batch the watermark will record: a batch landing meanwhile waits for the next run
+            seen, upto = combined.get("Bifrost_site_table", -1), new["Bifrost_site_table"]
+            rows.extend(r for r in self.rows_from_bifrost_site_latest(price_map)
+                        if r["batch_id"] is not None and seen < int(r["batch_id"]) <= upto)
+
+        inserted = self.insert_full_rows(rows, new)
         logger.info(f"Inserted {inserted} row(s) into full_table from latest sources.")
         if hydration_batch is not None:
             logger.info(f"  - hydration_data batch_id = {hydration_batch}")
         if pool_batch is not None:
             logger.info(f"  - pool_data batch_id      = {pool_batch}")
-        logger.info("  - bifrost source          = Bifrost_site_table (latest-per-asset, APY)")
+        if not incremental or "Bifrost_site_table" in new:
+            logger.info("  - bifrost source          = Bifrost_site_table (latest-per-asset, APY)")
         if price_batch is not None:
             logger.info(f"  - Hydration_price batch_id = {price_batch} (prices primary)")
         logger.info("  - Bifrost_staking_table used as price fallback (latest per symbol)")
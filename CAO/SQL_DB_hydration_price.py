@@ -2,10 +2,12 @@
 import mysql.connector
 from mysql.connector import errorcode
 from logging_config import logger
-import pandas as pd
+from db_pool import get_pool
+from bulk_writer import BulkWriter, write_batch
+from latest_batch import CREATE_LATEST_BATCH_SQL, registry_writer, registry_rows
 
 class SQL_DB_Hydration_Price:
-    def __init__(self, userName, passWord, host, dataBase, db_port, initializeTable=False, table_names=None):
+    def __init__(self, userName, passWord, host, dataBase, db_port, initializeTable=False, table_names=None, chunk_size=None):
         self.userName = userName
         self.passWord = passWord
         self.dataBase = dataBase
@@ -22,6 +24,10 @@ class SQL_DB_Hydration_Price:
         if table_names:
             self.tables.update(table_names)
 
+        self.price_writer = BulkWriter(self.tables['Hydration_price'], ("asset_id", "symbol", "price_usdt"),
+                                       leading_columns=("batch_id",), chunk_size=chunk_size)
+        self.batch_writer = BulkWriter(self.tables['Hydration_price_batches'], ("batch_id", "data_hash"))
+
         if initializeTable:
             self.initialize_tables()
 
@@ -47,6 +53,7 @@ class SQL_DB_Hydration_Price:
         );
         """
         self.executeSQL(sql_command_batch)
+        self.executeSQL(CREATE_LATEST_BATCH_SQL)
         
         # Ensure hash column exists (idempotent check)
         table_name = self.tables['Hydration_price_batches']
@@ -62,28 +69,24 @@ class SQL_DB_Hydration_Price:
     def errorMessage(self, message):
         logger.error(f"SQL Error: {message}")
 
+    def _pool(self):
+        return get_pool(self.userName, self.passWord, self.host, self.dataBase, self.port)
+
     def executeSQL(self, query, params=None):
         try:
-            cnx = mysql.connector.connect(
-                user=self.userName,
-                password=self.passWord,
-                host=self.host,
-                database=self.dataBase,
-                port=self.port
-            )
-            cursor = cnx.cursor()
-            if params is None:
-                cursor.execute(query)
-            else:
-                cursor.execute(query, params)
-            try:
-                values = cursor.fetchall()
-            except:
-                values = None
-            cnx.commit()
-            cursor.close()
-            cnx.close()
-            return values
+            with self._pool().connection() as cnx:
+                cursor = cnx.cursor()
+                if params is None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query, params)
+                try:
+                    values = cursor.fetchall()
+                except:
+                    values = None
+                cnx.commit()
+                cursor.close()
+                return values
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 self.errorMessage("Something is wrong with your user name or password")
@@ -110,31 +113,17 @@ class SQL_DB_Hydration_Price:
             logger.warning("No data to store in Hydration_price table.")
             return
         
-        df = pd.DataFrame(processed_data)
-        table_name = self.tables['Hydration_price']
-        table_batches = self.tables['Hydration_price_batches']
-        
-        for _, row in df.iterrows():
-            values_list = [
-                "NULL" if pd.isna(value) else
-                "'" + str(value).replace("'", "\\'") + "'" if isinstance(value, str) else
-                str(value)
-                for value in [batch_id] + row[['asset_id', 'symbol', 'price_usdt']].tolist()
-            ]
-            values = ', '.join(values_list)
-            
-            query = f"""
-            INSERT INTO {table_name} (
-                batch_id, asset_id, symbol, price_usdt
-            ) VALUES ({values})
-            """
-            self.executeSQL(query)
-        
-        # Track batch
+        writes = [(self.price_writer, processed_data, (batch_id,))]
+        # Track batch (same transaction as the prices)
         if data_hash:
-            self.executeSQL(
-                f"INSERT INTO {table_batches} (batch_id, data_hash) VALUES (%s, %s)",
-                (batch_id, data_hash)
-            )
+            writes.append((self.batch_writer, [{"batch_id": batch_id, "data_hash": data_hash}], ()))
+        writes.append((registry_writer, registry_rows(
+            {self.tables['Hydration_price']: len(processed_data)}, batch_id, data_hash), ()))
+
+        try:
+            write_batch(self._pool(), writes)
+        except mysql.connector.Error as err:
+            self.errorMessage(str(err))
+            raise
 
         logger.info(f"Hydration prices stored in MySQL with batch_id {batch_id}")
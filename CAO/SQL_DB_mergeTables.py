@@ -10,9 +10,14 @@ import datetime
 import decimal
 import math
 import os
+import hashlib
 from dotenv import load_dotenv
 from dotenv import load_dotenv
 from utils import retry, DataValidator
+from db_pool import get_pool
+from latest_batch import CREATE_LATEST_BATCH_SQL, SELECT_LATEST_BATCHES_SQL, batches_by_source
+import payload_codec
+from snapshot_assets import CREATE_SNAPSHOT_ASSET_SQL, SELECT_ASSET_HISTORY_SQL, snapshot_rows, snapshot_writer
 
 class SQL_DB_MergeTables:
     """
@@ -61,6 +66,34 @@ class SQL_DB_MergeTables:
             self.executeSQL("ALTER TABLE multipleFACT ADD COLUMN data_hash VARCHAR(64);")
             logger.info("Added 'data_hash' column to multipleFACT")
 
+        # fingerprint of the source batches a snapshot was built from (see sources_hash)
+        check_col_sql = """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS 
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'multipleFACT' AND COLUMN_NAME = 'sources_hash'
+        """
+        res = self.executeSQL(check_col_sql, (self.dataBase,))
+        if res and res[0][0] == 0:
+            self.executeSQL("ALTER TABLE multipleFACT ADD COLUMN sources_hash VARCHAR(64);")
+            logger.info("Added 'sources_hash' column to multipleFACT")
+
+        # compressed payload storage (see payload_codec.py): payload becomes NULL for those rows
+        check_col_sql = """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS 
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'multipleFACT' AND COLUMN_NAME = 'payload_format'
+        """
+        res = self.executeSQL(check_col_sql, (self.dataBase,))
+        if res and res[0][0] == 0:
+            self.executeSQL("""
+                ALTER TABLE multipleFACT
+                MODIFY COLUMN payload JSON NULL,
+                ADD COLUMN payload_format VARCHAR(16),
+                ADD COLUMN payload_blob LONGBLOB,
+                ADD COLUMN base_id INT;
+            """)
+            logger.info("Added compressed payload columns to multipleFACT")
+
+        self.executeSQL(CREATE_LATEST_BATCH_SQL)
+        self.executeSQL(CREATE_SNAPSHOT_ASSET_SQL)
         self._maybe_migrate_legacy_schema()
 
     def _maybe_migrate_legacy_schema(self):
@@ -79,7 +112,8 @@ class SQL_DB_MergeTables:
         """, (self.dataBase,))
         pk_cols = [r[0] for r in pk_info] if pk_info else []
 
-        if pk_cols and not (len(pk_cols) == 1 and pk_cols[0] == 'id'):
+        # (id, created_at) once partitioned by partition_maintenance.py
+        if pk_cols and 'id' not in pk_cols:
             try:
                 self.executeSQL("ALTER TABLE multipleFACT DROP PRIMARY KEY;")
             except Exception:
@@ -125,33 +159,25 @@ class SQL_DB_MergeTables:
     def errorMessage(self, message):
         logger.error(f"SQL Error: {message}")
 
-    @retry(max_retries=3, delay=2)
-    def _connect(self):
-        return mysql.connector.connect(
-            user=self.userName,
-            password=self.passWord,
-            host=self.host,
-            database=self.dataBase, 
-            port=self.port
-        )
+    def _pool(self):
+        return get_pool(self.userName, self.passWord, self.host, self.dataBase, self.port)
 
     @retry(max_retries=3, delay=2)
     def executeSQL(self, query, params=None):
         try:
-            cnx = self._connect()
-            cursor = cnx.cursor()
-            if params is None:
-                cursor.execute(query)
-            else:
-                cursor.execute(query, params)
-            try:
-                values = cursor.fetchall()
-            except Exception:
-                values = None
-            cnx.commit()
-            cursor.close()
-            cnx.close()
-            return values
+            with self._pool().connection() as cnx:
+                cursor = cnx.cursor()
+                if params is None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query, params)
+                try:
+                    values = cursor.fetchall()
+                except Exception:
+                    values = None
+                cnx.commit()
+                cursor.close()
+                return values
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 self.errorMessage("Something is wrong with your user name or password")
@@ -167,35 +193,144 @@ class SQL_DB_MergeTables:
     @retry(max_retries=3, delay=2)
     def fetch_df(self, query, params=None) -> pd.DataFrame:
         try:
-            cnx = self._connect()
-            cur = cnx.cursor()
-            if params is None:
-                cur.execute(query)
-            else:
-                cur.execute(query, params)
-            rows = cur.fetchall()
-            colnames = [d[0] for d in cur.description] if cur.description else []
-            df = pd.DataFrame(rows, columns=colnames)
-            cur.close()
-            cnx.close()
-            return df
+            with self._pool().connection() as cnx:
+                cur = cnx.cursor()
+                if params is None:
+                    cur.execute(query)
+                else:
+                    cur.execute(query, params)
+                rows = cur.fetchall()
+                colnames = [d[0] for d in cur.description] if cur.description else []
+                df = pd.DataFrame(rows, columns=colnames)
+                cur.close()
+                return df
         except Exception as err:
             logger.exception(err)
             raise
 
     @retry(max_retries=3, delay=2)
     def fetch_one(self, query, params=None):
-        cnx = self._connect()
-        cur = cnx.cursor()
+        with self._pool().connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                if params is None:
+                    cur.execute(query)
+                else:
+                    cur.execute(query, params)
+                return cur.fetchone()
+            finally:
+                cur.close()
+
+    def latest_batches(self, cur=None):
+        """
+        {source: (batch_id, created_at, data_hash)} from the latest_batch registry, or {}
+        when it cannot be read (every source then falls back to sorting its table).
+        Reads on `cur` when given (e.g. inside read_sources' snapshot).
+        """
         try:
-            if params is None:
-                cur.execute(query)
-            else:
-                cur.execute(query, params)
-            return cur.fetchone()
-        finally:
-            cur.close()
-            cnx.close()
+            if cur is not None:
+                cur.execute(SELECT_LATEST_BATCHES_SQL)
+                return batches_by_source(cur.fetchall())
+            with self._pool().connection() as cnx:
+                cur = cnx.cursor()
+                try:
+                    cur.execute(SELECT_LATEST_BATCHES_SQL)
+                    return batches_by_source(cur.fetchall())
+                finally:
+                    cur.close()
+        except mysql.connector.Error as err:
+            logger.warning(f"latest_batch registry unavailable, sorting source tables instead: {err}")
+            return {}
+
+    @retry(max_retries=3, delay=2)
+    def read_sources(self):
+        """
+        Read every dataset and metadata row run_merge needs on one pooled
+        connection inside START TRANSACTION WITH CONSISTENT SNAPSHOT, so they all
+        see the same committed state and a batch written mid-merge cannot leak
+        into part of the payload.
+
+        Returns None when the pre-check finds the same source batches as the last
+        multipleFACT snapshot. Otherwise a dict with the sanitized records
+        ("bifrost", "pools", "hydration", "hydration_price", "bxhy"), the meta rows
+        ("bifrost_meta", "pools_meta", "hydration_meta", "hydration_price_meta")
+        and "sources_hash".
+        """
+        with self._pool().connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+
+                def records(query, params=None):
+                    cur.execute(query, params)
+                    rows = cur.fetchall()
+                    colnames = [d[0] for d in cur.description] if cur.description else []
+                    return self._rows_to_json_array(colnames, rows)
+
+                def one(query):
+                    cur.execute(query)
+                    rows = cur.fetchall()
+                    return rows[0] if rows else None
+
+                # Current batch per source: one registry read; sources missing from it sort their table
+                latest = self.latest_batches(cur)
+
+                # Pre-check: same source batches as the last snapshot -> same payload, skip all the work
+                sources_hash = self.sources_hash(latest)
+                if sources_hash:
+                    last = one("SELECT sources_hash FROM multipleFACT ORDER BY id DESC LIMIT 1")
+                    if last and last[0] == sources_hash:
+                        return None
+
+                site = latest.get("Bifrost_site_table")
+                staking = latest.get("Bifrost_staking_table")
+                hydration = latest.get("hydration_data")
+
+                def data(source, query, query_by_batch):
+                    if source in latest:
+                        return records(query_by_batch, (latest[source][0],))
+                    return records(query)
+
+                out = {"sources_hash": sources_hash}
+                if site and staking and site[0] == staking[0]:
+                    out["bifrost"] = records(self.Q_BIFROST_DATA_BY_BATCH, (site[0],))
+                else:
+                    # no common latest batch (e.g. staking rows missing) -> search for one
+                    out["bifrost"] = records(self.Q_BIFROST_DATA)
+                out["pools"] = data("pool_data", self.Q_POOLS_DATA, self.Q_POOLS_DATA_BY_BATCH)
+                out["hydration"] = data("hydration_data", self.Q_HYDRATION_DATA, self.Q_HYDRATION_DATA_BY_BATCH)
+                out["hydration_price"] = data("Hydration_price", self.Q_HYDRATION_PRICE_DATA,
+                                              self.Q_HYDRATION_PRICE_DATA_BY_BATCH)
+                if site and hydration:
+                    out["bxhy"] = records(self.Q_BIFROST_HYDRATION_COMBINED_BY_BATCH, (site[0], hydration[0]))
+                else:
+                    out["bxhy"] = records(self.Q_BIFROST_HYDRATION_COMBINED)
+
+                out["bifrost_meta"] = latest.get("Bifrost_site_table") or one(self.Q_BIFROST_META)
+                out["pools_meta"] = latest.get("pool_data") or one(self.Q_POOLS_META)
+                out["hydration_meta"] = latest.get("hydration_data") or one(self.Q_HYDRATION_META)
+                out["hydration_price_meta"] = latest.get("Hydration_price") or one(self.Q_HYDRATION_PRICE_META)
+                return out
+            finally:
+                cur.close()
+                # read-only transaction: just end it
+                cnx.rollback()
+
+    # every source table a multipleFACT snapshot is built from
+    MERGE_SOURCES = ("Bifrost_site_table", "Bifrost_staking_table", "hydration_data", "pool_data", "Hydration_price")
+
+    @classmethod
+    def sources_hash(cls, latest):
+        """
+        SHA256 over the current (batch_id, data_hash) of every MERGE_SOURCES
+        table, or None if one of them is not in the registry.
+        """
+        if any(source not in latest for source in cls.MERGE_SOURCES):
+            return None
+        key = "|".join(
+            f"{source}:{latest[source][0]}:{latest[source][2] or ''}" for source in cls.MERGE_SOURCES
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
 
     # ---------- JSON utils (strict sanitization) ----------
     @staticmethod
@@ -210,8 +345,12 @@ class SQL_DB_MergeTables:
         return o
 
     def _sanitize_scalar(self, val):
-        if val is None:
-            return None
+        # exact-type fast path: what the MySQL cursor returns for most cells
+        t = type(val)
+        if val is None or t is str or t is int:
+            return val
+        if t is float:
+            return val if math.isfinite(val) and abs(val) <= 1e308 else None
         if isinstance(val, (float, np.floating)):
             if not math.isfinite(val) or abs(val) > 1e308:
                 return None
@@ -228,6 +367,8 @@ class SQL_DB_MergeTables:
             return f
         if isinstance(val, (bool, np.bool_)):
             return bool(val)
+        if val is pd.NaT:
+            return None
         return val
 
     def _deep_clean(self, obj):
@@ -237,16 +378,18 @@ class SQL_DB_MergeTables:
             return [self._deep_clean(v) for v in obj]
         return self._sanitize_scalar(obj)
 
+    def _rows_to_json_array(self, columns, rows):
+        """
+        Cursor rows (tuples in `columns` order) -> JSON-safe list of dicts in one
+        pass: Decimal -> float, NaN/inf -> None, datetimes left for _json_default.
+        """
+        clean = self._sanitize_scalar
+        return [dict(zip(columns, map(clean, row))) for row in rows]
+
     def _df_to_json_array(self, df: pd.DataFrame):
         if df is None or df.empty:
             return []
-        df = df.replace([np.inf, -np.inf], np.nan)
-        df = df.astype(object)
-        df = df.where(pd.notna(df), None)
-        df = df.applymap(self._sanitize_scalar)
-        records = df.to_dict(orient='records')
-        records = self._deep_clean(records)
-        return records
+        return self._rows_to_json_array(list(df.columns), df.itertuples(index=False, name=None))
 
     # ---------- Bifrost data (latest common batch_id + price via st.symbol) ----------
     Q_BIFROST_DATA = """
@@ -347,6 +490,58 @@ class SQL_DB_MergeTables:
       ON h.symbol = s.Asset;
     """
 
+    # ---------- Same data for batch_ids resolved from the latest_batch registry ----------
+    Q_BIFROST_DATA_BY_BATCH = """
+    SELECT
+      s.Asset,
+      s.tvl,
+      s.apy,
+      s.apyBase,
+      s.apyReward,
+      st.price
+    FROM Bifrost_site_table AS s
+    LEFT JOIN Bifrost_staking_table AS st
+      ON st.batch_id = s.batch_id
+     AND st.symbol   = s.Asset
+    WHERE s.batch_id = %s;
+    """
+    Q_POOLS_DATA_BY_BATCH = """
+    SELECT token0_symbol, amount_token0, token1_symbol, amount_token1,
+           volume_usd_current, volume_usd_24h, pools_apr, farming_apr, final_apr
+    FROM pool_data
+    WHERE batch_id = %s;
+    """
+    Q_HYDRATION_DATA_BY_BATCH = """
+    SELECT asset_id, symbol, farm_apr, pool_apr, total_apr, tvl_usd, volume_usd
+    FROM hydration_data
+    WHERE batch_id = %s;
+    """
+    Q_HYDRATION_PRICE_DATA_BY_BATCH = """
+    SELECT asset_id, symbol, price_usdt
+    FROM Hydration_price
+    WHERE batch_id = %s;
+    """
+    Q_BIFROST_HYDRATION_COMBINED_BY_BATCH = """
+    SELECT
+      s.Asset                                  AS Asset,
+      s.tvl                                    AS Bifrost_tvl,
+      s.apy                                    AS Bifrost_apy,
+      s.apyBase                                AS Bifrost_apyBase,
+      s.apyReward                              AS Bifrost_apyReward,
+      h.asset_id                               AS Hydration_asset_id,
+      h.symbol                                 AS Hydration_symbol,
+      h.farm_apr                               AS Hydration_farm_apr,
+      h.pool_apr                               AS Hydration_pool_apr,
+      h.total_apr                              AS Hydration_total_apr,
+      h.tvl_usd                                AS Hydration_tvl_usd,
+      h.volume_usd                             AS Hydration_volume_usd
+    FROM Bifrost_site_table AS s
+    JOIN hydration_data AS h
+      ON h.symbol = s.Asset
+    WHERE s.batch_id = %s
+      AND h.batch_id = %s;
+    """
+
     # ---------- Metadata ----------
     Q_BIFROST_META = """
     SELECT batch_id, created_at
@@ -374,12 +569,88 @@ class SQL_DB_MergeTables:
     """
 
     # ---------- Insert (append-only) ----------
-    def insert_combined_payload(self, payload_obj: dict, data_hash: str):
+    @retry(max_retries=3, delay=2)
+    def insert_combined_payload(self, payload_obj: dict, data_hash: str, sources_hash: str = None):
+        """
+        Append the snapshot to multipleFACT and its rows to multipleFACT_asset
+        (see snapshot_assets.py) in one transaction. Returns the snapshot id.
+        With MERGE_PAYLOAD_COMPRESSION the payload goes to payload_blob (see
+        payload_codec.py); load_payload() reads either form.
+        """
         payload_str = json.dumps(payload_obj, default=self._json_default, ensure_ascii=False, allow_nan=False)
-        self.executeSQL(
-            "INSERT INTO multipleFACT (payload, data_hash) VALUES (%s, %s);",
-            (payload_str, data_hash)
-        )
+        mode = payload_codec.compression_mode()
+        with self._pool().connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                if mode == "none":
+                    cur.execute(
+                        "INSERT INTO multipleFACT (payload, data_hash, sources_hash) VALUES (%s, %s, %s);",
+                        (payload_str, data_hash, sources_hash)
+                    )
+                else:
+                    fmt, blob, base_id = self._encode_payload(cur, payload_str, mode)
+                    cur.execute(
+                        "INSERT INTO multipleFACT (payload_format, payload_blob, base_id, data_hash, sources_hash) "
+                        "VALUES (%s, %s, %s, %s, %s);",
+                        (fmt, blob, base_id, data_hash, sources_hash)
+                    )
+                snapshot_id = cur.lastrowid
+                snapshot_writer.write(cur, snapshot_rows(payload_obj), (snapshot_id,))
+                cnx.commit()
+                return snapshot_id
+            finally:
+                cur.close()
+
+    def _encode_payload(self, cur, payload_str, mode):
+        """(payload_format, payload_blob, base_id) for a new compressed snapshot."""
+        if mode == payload_codec.FORMAT_ZLIB_DELTA:
+            cur.execute(
+                "SELECT id, payload_blob FROM multipleFACT WHERE payload_format = %s ORDER BY id DESC LIMIT 1;",
+                (payload_codec.FORMAT_ZLIB,)
+            )
+            keyframe = cur.fetchone()
+            if keyframe:
+                cur.execute("SELECT COUNT(*) FROM multipleFACT WHERE id > %s;", (keyframe[0],))
+                since = cur.fetchone()[0]
+                if since + 1 < payload_codec.keyframe_every():
+                    base = payload_codec.decompress_json(keyframe[1])
+                    return payload_codec.FORMAT_ZLIB_DELTA, payload_codec.encode_delta(base, payload_str), keyframe[0]
+        return payload_codec.FORMAT_ZLIB, payload_codec.encode_keyframe(payload_str), None
+
+    @retry(max_retries=3, delay=2)
+    def load_payload(self, snapshot_id=None):
+        """
+        Decoded payload of multipleFACT row `snapshot_id` (default: the newest),
+        whether it is stored as plain JSON, a zlib keyframe or a zlib delta.
+        None if there is no such row.
+        """
+        select = "SELECT id, payload, payload_format, payload_blob, base_id FROM multipleFACT "
+        with self._pool().connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                if snapshot_id is None:
+                    cur.execute(select + "ORDER BY id DESC LIMIT 1;")
+                else:
+                    cur.execute(select + "WHERE id = %s;", (snapshot_id,))
+                row = cur.fetchone()
+                if not row:
+                    return None
+                _, payload, fmt, blob, base_id = row
+                keyframe = None
+                if fmt == payload_codec.FORMAT_ZLIB_DELTA:
+                    cur.execute(select + "WHERE id = %s;", (base_id,))
+                    base = cur.fetchone()
+                    keyframe = payload_codec.decode_payload(base[2], base[1], base[3])
+                return payload_codec.decode_payload(fmt, payload, blob, keyframe)
+            finally:
+                cur.close()
+
+    def asset_history(self, chain: str, symbol: str, limit: int = 30) -> pd.DataFrame:
+        """
+        The last `limit` snapshots of one asset from multipleFACT_asset, newest
+        first, e.g. asset_history("bifrost", "vDOT") for vDOT's APY/TVL/price.
+        """
+        return self.fetch_df(SELECT_ASSET_HISTORY_SQL, (chain, symbol, int(limit)))
 
     def get_last_merge_hash(self):
         query = "SELECT data_hash FROM multipleFACT ORDER BY id DESC LIMIT 1"
@@ -393,25 +664,25 @@ class SQL_DB_MergeTables:
         # Ensure table exists / migrate if legacy
         self.initialize_tables()
 
-        # Fetch dataframes
-        df_bifrost    = self.fetch_df(self.Q_BIFROST_DATA)
-        df_pools      = self.fetch_df(self.Q_POOLS_DATA)
-        df_hydration  = self.fetch_df(self.Q_HYDRATION_DATA)
-        df_h_price    = self.fetch_df(self.Q_HYDRATION_PRICE_DATA)
-        df_bxhy       = self.fetch_df(self.Q_BIFROST_HYDRATION_COMBINED)
+        # All datasets + metadata from one consistent snapshot on one connection
+        sources = self.read_sources()
+        if sources is None:
+            logger.info("No source batch changed since the last snapshot. Skipping merge.")
+            return
+        sources_hash = sources["sources_hash"]
 
-        # Sanitize → lists of dicts
-        bifrost_records    = self._df_to_json_array(df_bifrost)
-        moonbeam_records   = self._df_to_json_array(df_pools)
-        hydration_records  = self._df_to_json_array(df_hydration)
-        hydration_price_records = self._df_to_json_array(df_h_price)
-        bxhy_records       = self._df_to_json_array(df_bxhy)
+        # Already sanitized lists of dicts (straight from the cursor rows)
+        bifrost_records    = sources["bifrost"]
+        moonbeam_records   = sources["pools"]
+        hydration_records  = sources["hydration"]
+        hydration_price_records = sources["hydration_price"]
+        bxhy_records       = sources["bxhy"]
 
         # Metadata
-        bifrost_meta    = self.fetch_one(self.Q_BIFROST_META)
-        pools_meta      = self.fetch_one(self.Q_POOLS_META)
-        hydration_meta  = self.fetch_one(self.Q_HYDRATION_META)
-        hydration_price_meta = self.fetch_one(self.Q_HYDRATION_PRICE_META)
+        bifrost_meta    = sources["bifrost_meta"]
+        pools_meta      = sources["pools_meta"]
+        hydration_meta  = sources["hydration_meta"]
+        hydration_price_meta = sources["hydration_price_meta"]
 
         batch_id_bifrost, created_at_bifrost = (None, None)
         batch_id_moonbeam, created_at_moonbeam = (None, None)
@@ -464,17 +735,20 @@ class SQL_DB_MergeTables:
             "combined_created_at": combined_dt.isoformat() if combined_dt else None
         }
 
-        payload_obj = self._deep_clean(payload_obj)
-        
         # Deduplication
         current_hash = DataValidator.compute_hash(payload_obj)
         last_hash = self.get_last_merge_hash()
         
         if current_hash and current_hash == last_hash:
             logger.info("Duplicate merged data detected. Skipping insertion.")
+            if sources_hash:
+                # the last snapshot also stands for these batches: let the next pre-check hit
+                self.executeSQL(
+                    "UPDATE multipleFACT SET sources_hash = %s ORDER BY id DESC LIMIT 1;", (sources_hash,)
+                )
             return
 
-        self.insert_combined_payload(payload_obj, current_hash)
+        self.insert_combined_payload(payload_obj, current_hash, sources_hash)
         logger.info("Inserted new combined snapshot into multipleFACT (append-only).")
 
 
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# SQL_DB_rollups.py
+"""
+Hourly and daily rollups of APY, TVL, volume and price per (chain, symbol).
+
+    rollup_hourly / rollup_daily
+      chain, symbol, bucket, source       PRIMARY KEY (chain, symbol, bucket, source)
+      first_at, last_at, n_rows           first / last source timestamp in the bucket
+      <m>_open, <m>_close                 first / last non-NULL value in the bucket
+      <m>_min, <m>_max, <m>_sum, <m>_count
+      <m>_avg                             generated: <m>_sum / <m>_count
+    for m in apy, tvl, volume, price.
+
+Sources (rows are read in id order after rollup_watermark.last_id):
+  full_table       APY / TVL / volume / price of hydration_data, pool_data and
+                   Bifrost_site_table as combined by SQL_DB_combinedTables;
+                   source = full_table.source, timestamp = created_at.
+                   With COMBINE_INCREMENTAL=0 every combine appends the latest
+                   batches again, so a row repeating one already rolled up
+                   (same source, batch_id, symbol, values and timestamp) is
+                   skipped: rollup_seen_rows keeps the keys of the newest
+                   rolled-up batch per (source, symbol).
+  Hydration_price  every Hydration price batch (source 'Hydration_price',
+                   chain 'hydration')
+symbol is the plain symbol; Moonbeam pools are "token0-token1" like in
+multipleFACT_asset.
+
+A chunk of at most ROLLUP_CHUNK_SIZE rows is aggregated in Python and merged
+into both tables with one upsert each (min/max/sum/count combine with the
+stored values, open/close follow first_at/last_at), and the watermark moves
+in the same transaction, so an interrupted run resumes where it stopped and
+no row is counted twice. run_once() (called by combine_tables.py after every
+combine) handles at most ROLLUP_MAX_CHUNKS chunks per source; backfill()
+keeps going until the history is rolled up.
+
+Environment (.env) variables:
+  ROLLUP_ENABLED     1 = combine_tables.py updates the rollups (default), 0 = off
+  ROLLUP_CHUNK_SIZE  source rows per chunk / transaction (default 5000)
+  ROLLUP_MAX_CHUNKS  chunks per source and run_once() (default 20)
+
+Usage:
+  python SQL_DB_rollups.py              # roll up new rows
+  python SQL_DB_rollups.py --backfill   # roll up all history, chunk by chunk
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from bulk_writer import BulkWriter
+from db_pool import get_pool
+from logging_config import logger
+
+METRICS = ("apy", "tvl", "volume", "price")
+GRANULARITIES = {"hour": "rollup_hourly", "day": "rollup_daily"}
+WATERMARK_TABLE = "rollup_watermark"
+
+SEEN_TABLE = "rollup_seen_rows"
+
+# source table -> SELECT of (id, source, chain, symbol, apy, tvl, volume, price, ts[, batch_id]) after a watermark
+SOURCE_QUERIES = {
+    "full_table": """
+        SELECT id, source, chain, symbol, apy, tvl, volume, price, COALESCE(created_at, inserted_at), batch_id
+        FROM full_table
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+    """,
+    "Hydration_price": """
+        SELECT id, 'Hydration_price', 'hydration', symbol, NULL, NULL, NULL, price_usdt, created_at
+        FROM Hydration_price
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+    """,
+}
+
+_METRIC_DDL = "".join(
+    f"""
+    {m}_open DOUBLE NULL,
+    {m}_close DOUBLE NULL,
+    {m}_min DOUBLE NULL,
+    {m}_max DOUBLE NULL,
+    {m}_sum DOUBLE NOT NULL DEFAULT 0,
+    {m}_count INT NOT NULL DEFAULT 0,
+    {m}_avg DOUBLE AS ({m}_sum / NULLIF({m}_count, 0)) VIRTUAL,"""
+    for m in METRICS
+)
+
+CREATE_ROLLUP_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    chain VARCHAR(32) NOT NULL,
+    symbol VARCHAR(255) NOT NULL,
+    bucket DATETIME NOT NULL,
+    source VARCHAR(64) NOT NULL,
+    first_at DATETIME NOT NULL,
+    last_at DATETIME NOT NULL,
+    n_rows INT NOT NULL DEFAULT 0,""" + _METRIC_DDL + """
+    PRIMARY KEY (chain, symbol, bucket, source)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+CREATE_WATERMARK_SQL = f"""
+CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+    source_table VARCHAR(64) NOT NULL PRIMARY KEY,
+    last_id BIGINT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+CREATE_SEEN_SQL = f"""
+CREATE TABLE IF NOT EXISTS {SEEN_TABLE} (
+    source VARCHAR(64) NOT NULL,
+    symbol VARCHAR(255) NOT NULL,
+    row_key CHAR(40) NOT NULL,
+    batch_id BIGINT NOT NULL,
+    PRIMARY KEY (source, symbol, row_key)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+ROLLUP_COLUMNS = ("chain", "symbol", "bucket", "source", "first_at", "last_at", "n_rows") + tuple(
+    f"{m}_{part}" for m in METRICS for part in ("open", "close", "min", "max", "sum", "count")
+)
+
+# Assignments run left to right and later ones see the updated values, so
+# open/close are decided before first_at/last_at move.
+_MERGE_SQL = ", ".join(
+    [
+        assignment
+        for m in METRICS
+        for assignment in (
+            f"{m}_open = IF({m}_open IS NULL OR VALUES(first_at) < first_at, COALESCE(VALUES({m}_open), {m}_open), {m}_open)",
+            f"{m}_close = IF({m}_close IS NULL OR VALUES(last_at) >= last_at, COALESCE(VALUES({m}_close), {m}_close), {m}_close)",
+            f"{m}_min = COALESCE(LEAST({m}_min, VALUES({m}_min)), {m}_min, VALUES({m}_min))",
+            f"{m}_max = COALESCE(GREATEST({m}_max, VALUES({m}_max)), {m}_max, VALUES({m}_max))",
+            f"{m}_sum = {m}_sum + VALUES({m}_sum)",
+            f"{m}_count = {m}_count + VALUES({m}_count)",
+        )
+    ]
+    + [
+        "first_at = LEAST(first_at, VALUES(first_at))",
+        "last_at = GREATEST(last_at, VALUES(last_at))",
+        "n_rows = n_rows + VALUES(n_rows)",
+    ]
+)
+
+rollup_writers = {
+    table: BulkWriter(table, ROLLUP_COLUMNS, update_sql=_MERGE_SQL) for table in GRANULARITIES.values()
+}
+seen_writer = BulkWriter(SEEN_TABLE, ("source", "symbol", "row_key", "batch_id"),
+                         update_sql="batch_id = VALUES(batch_id)")
+
+
+def rollups_enabled() -> bool:
+    return os.getenv("ROLLUP_ENABLED", "1") != "0"
+
+
+def symbol_key(raw: Any) -> Optional[str]:
+    """full_table.symbol JSON ({"symbol": ..., "token1_symbol": ...}) or a plain symbol -> "A" / "A-B"."""
+    if raw is None:
+        return None
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8")
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return raw or None
+    if isinstance(raw, dict):
+        parts = [str(v) for v in raw.values() if v is not None and v != ""]
+        return "-".join(parts) or None
+    return str(raw)
+
+
+def bucket_start(ts: datetime.datetime, granularity: str) -> datetime.datetime:
+    if granularity == "day":
+        return datetime.datetime(ts.year, ts.month, ts.day)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _number(v: Any) -> Optional[float]:
+    if v is None:
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def aggregate(rows: List[Tuple], granularity: str) -> List[Dict[str, Any]]:
+    """
+    Rollup rows of one chunk. rows are (id, source, chain, symbol, apy, tvl,
+    volume, price, ts) as returned by SOURCE_QUERIES; rows without symbol or
+    timestamp are skipped.
+    """
+    buckets: Dict[Tuple, Dict[str, Any]] = {}
+    for row in rows:
+        _id, source, chain, raw_symbol, *values, ts = row[:9]
+        symbol = symbol_key(raw_symbol)
+        if symbol is None or ts is None:
+            continue
+        bucket = bucket_start(ts, granularity)
+        key = (chain, symbol, bucket, source)
+        b = buckets.get(key)
+        if b is None:
+            b = {"chain": chain, "symbol": symbol, "bucket": bucket, "source": source,
+                 "first_at": ts, "last_at": ts, "n_rows": 0}
+            for m in METRICS:
+                b.update({f"{m}_open": None, f"{m}_close": None, f"{m}_min": None, f"{m}_max": None,
+                          f"{m}_sum": 0.0, f"{m}_count": 0, f"_{m}_open_at": None, f"_{m}_close_at": None})
+            buckets[key] = b
+        b["n_rows"] += 1
+        b["first_at"] = min(b["first_at"], ts)
+        b["last_at"] = max(b["last_at"], ts)
+        for m, raw in zip(METRICS, values):
+            v = _number(raw)
+            if v is None:
+                continue
+            if b[f"_{m}_open_at"] is None or ts < b[f"_{m}_open_at"]:
+                b[f"{m}_open"], b[f"_{m}_open_at"] = v, ts
+            if b[f"_{m}_close_at"] is None or ts >= b[f"_{m}_close_at"]:
+                b[f"{m}_close"], b[f"_{m}_close_at"] = v, ts
+            b[f"{m}_min"] = v if b[f"{m}_min"] is None else min(b[f"{m}_min"], v)
+            b[f"{m}_max"] = v if b[f"{m}_max"] is None else max(b[f"{m}_max"], v)
+            b[f"{m}_sum"] += v
+            b[f"{m}_count"] += 1
+    return list(buckets.values())
+
+
+def row_key(row: Tuple) -> str:
+    """Content key of a full_table row: equal for the copies a non-incremental combine re-inserts."""
+    return hashlib.sha1(json.dumps(row[1:10], default=str).encode("utf-8")).hexdigest()
+
+
+def skip_repeated(rows: List[Tuple], seen: Dict[Tuple[str, str], Tuple[int, set]]):
+    """
+    Drop rows repeating one already rolled up. `seen` maps (source, symbol)
+    to (newest batch_id rolled up, row keys of that batch) and is updated in
+    place. A row of an older batch is a repeat; rows without batch_id or
+    symbol are always kept. Returns (kept rows, {(source, symbol): (batch_id,
+    new row keys)} to persist).
+    """
+    kept: List[Tuple] = []
+    added: Dict[Tuple[str, str], Tuple[int, set]] = {}
+    for row in rows:
+        batch_id = row[9] if len(row) > 9 else None
+        symbol = symbol_key(row[3])
+        if batch_id is None or symbol is None:
+            kept.append(row)
+            continue
+        batch_id, pair, key = int(batch_id), (row[1], symbol), row_key(row)
+        last_batch, keys = seen.get(pair, (None, set()))
+        if last_batch is not None and (batch_id < last_batch or (batch_id == last_batch and key in keys)):
+            continue
+        if last_batch is None or batch_id > last_batch:
+            keys = set()
+            seen[pair] = (batch_id, keys)
+            added[pair] = (batch_id, set())
+        keys.add(key)
+        added.setdefault(pair, (batch_id, set()))[1].add(key)
+        kept.append(row)
+    return kept, added
+
+
+class SQL_DB_Rollups:
+    """
+    Usage:
+        rollups = SQL_DB_Rollups(user, password, host, database, port)
+        rollups.run_once()                      # new rows, bounded
+        rollups.backfill()                      # everything not rolled up yet
+        rollups.history("hydration", "DOT", start, end, granularity="day")
+    """
+
+    def __init__(self, user, password, host, database, port, chunk_size=None, max_chunks=None):
+        self.user = user
+        self.password = password
+        self.host = host
+        self.database = database
+        self.port = port
+        self.chunk_size = int(chunk_size or os.getenv("ROLLUP_CHUNK_SIZE", 5000))
+        self.max_chunks = int(os.getenv("ROLLUP_MAX_CHUNKS", 20)) if max_chunks is None else max_chunks
+        if self.chunk_size < 1:
+            raise ValueError("ROLLUP_CHUNK_SIZE must be >= 1")
+
+    def _pool(self):
+        return get_pool(self.user, self.password, self.host, self.database, self.port)
+
+    # ---------- Setup ----------
+    def ensure_tables(self) -> None:
+        with self._pool().connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                for table in GRANULARITIES.values():
+                    cur.execute(CREATE_ROLLUP_SQL.format(table=table))
+                cur.execute(CREATE_WATERMARK_SQL)
+                cur.execute(CREATE_SEEN_SQL)
+                cnx.commit()
+            finally:
+                cur.close()
+
+    # ---------- Incremental rollup ----------
+    def roll_chunk(self, source_table: str) -> int:
+        """Roll up the next chunk of `source_table` in one transaction. Returns the rows read."""
+        with self._pool().connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.execute(f"SELECT last_id FROM {WATERMARK_TABLE} WHERE source_table = %s", (source_table,))
+                row = cur.fetchone()
+                last_id = int(row[0]) if row else 0
+                cur.execute(SOURCE_QUERIES[source_table], (last_id, self.chunk_size))
+                rows = cur.fetchall()
+                if not rows:
+                    return 0
+                fresh = self._skip_repeated(cur, rows) if source_table == "full_table" else rows
+                for granularity, table in GRANULARITIES.items():
+                    rollup_writers[table].write(cur, aggregate(fresh, granularity))
+                cur.execute(
+                    f"INSERT INTO {WATERMARK_TABLE} (source_table, last_id) VALUES (%s, %s) "
+                    f"ON DUPLICATE KEY UPDATE last_id = GREATEST(last_id, VALUES(last_id))",
+                    (source_table, max(int(r[0]) for r in rows)),
+                )
+                cnx.commit()
+                return len(rows)
+            finally:
+                cur.close()
+
+    @staticmethod
+    def _skip_repeated(cur, rows: List[Tuple]) -> List[Tuple]:
+        """skip_repeated() against rollup_seen_rows, which is updated on the same cursor."""
+        cur.execute(f"SELECT source, symbol, row_key, batch_id FROM {SEEN_TABLE}")
+        seen: Dict[Tuple[str, str], Tuple[int, set]] = {}
+        for source, symbol, key, batch_id in cur.fetchall():
+            batch_id = int(batch_id)
+            last = seen.get((source, symbol))
+            if last is None or batch_id > last[0]:
+                seen[(source, symbol)] = last = (batch_id, set())
+            if batch_id == last[0]:
+                last[1].add(key)
+        kept, added = skip_repeated(rows, seen)
+
+        # keys of older batches can no longer repeat: keep only the newest batch per (source, symbol)
+        pruned: Dict[Tuple[str, int], List[str]] = {}
+        for (source, symbol), (batch_id, _) in added.items():
+            pruned.setdefault((source, batch_id), []).append(symbol)
+        for (source, batch_id), symbols in pruned.items():
+            cur.execute(
+                f"DELETE FROM {SEEN_TABLE} WHERE source = %s AND batch_id < %s "
+                f"AND symbol IN ({', '.join(['%s'] * len(symbols))})",
+                (source, batch_id, *symbols),
+            )
+        seen_writer.write(cur, [
+            {"source": source, "symbol": symbol, "row_key": key, "batch_id": batch_id}
+            for (source, symbol), (batch_id, keys) in added.items() for key in sorted(keys)
+        ])
+        if len(kept) < len(rows):
+            logger.info(f"Skipped {len(rows) - len(kept)} repeated full_table row(s)")
+        return kept
+
+    def run_once(self, max_chunks: Optional[int] = None) -> Dict[str, int]:
+        """
+        Roll up new rows of every source, at most max_chunks chunks each
+        (0 = until caught up). Returns {source table: rows rolled up}; a
+        missing source table is skipped and one source's error does not stop
+        the others.
+        """
+        max_chunks = self.max_chunks if max_chunks is None else max_chunks
+        self.ensure_tables()
+        report: Dict[str, int] = {}
+        for source_table in SOURCE_QUERIES:
+            done = chunks = 0
+            try:
+                while not max_chunks or chunks < max_chunks:
+                    n = self.roll_chunk(source_table)
+                    done += n
+                    chunks += 1
+                    if n < self.chunk_size:
+                        break
+            except mysql.connector.Error as err:
+                if "doesn't exist" not in str(err):
+                    logger.error(f"Rollup of {source_table} failed: {err}")
+            report[source_table] = done
+            if done:
+                logger.info(f"Rolled up {done} row(s) of {source_table} in {chunks} chunk(s)")
+        return report
+
+    def backfill(self) -> Dict[str, int]:
+        """Roll up all history not rolled up yet, one bounded chunk per transaction."""
+        return self.run_once(max_chunks=0)
+
+    # ---------- Reads ----------
+    def history(self, chain: str, symbol: str, start: datetime.datetime, end: datetime.datetime,
+                granularity: str = "hour", source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rollup rows of (chain, symbol) with start <= bucket < end, oldest first."""
+        table = GRANULARITIES[granularity]
+        sql = f"SELECT * FROM {table} WHERE chain = %s AND symbol = %s AND bucket >= %s AND bucket < %s"
+        params: List[Any] = [chain, symbol, start, end]
+        if source is not None:
+            sql += " AND source = %s"
+            params.append(source)
+        sql += " ORDER BY bucket, source"
+        with self._pool().connection() as cnx:
+            cur = cnx.cursor(dictionary=True)
+            try:
+                cur.execute(sql, params)
+                return cur.fetchall()
+            finally:
+                cur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the hourly/daily rollup tables")
+    parser.add_argument("--backfill", action="store_true", help="roll up all history, not just ROLLUP_MAX_CHUNKS chunks")
+    args = parser.parse_args()
+
+    load_dotenv()
+    rollups = SQL_DB_Rollups(
+        user=os.getenv("DB_USERNAME", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        host=os.getenv("DB_HOST", "127.0.0.1"),
+        database=os.getenv("DB_NAME", "quantDATA"),
+        port=int(os.getenv("DB_PORT", 3306)),
+    )
+    if args.backfill:
+        rollups.backfill()
+    else:
+        rollups.run_once()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,28 @@
 import mysql.connector
 from mysql.connector import errorcode
 from logging_config import logger
-import pandas as pd
+from db_pool import get_pool
+from bulk_writer import BulkWriter, write_batch
+from latest_batch import CREATE_LATEST_BATCH_SQL, registry_writer, registry_rows
+
+POOL_DATA_COLUMNS = (
+    "pool_id", "token0_id", "symbol", "token0_name", "token0_decimals",
+    "token1_id", "token1_symbol", "token1_name", "token1_decimals", "liquidity",
+    "sqrt_price", "tick", "volume_usd_current", "volume_usd_24h_ago", "volume_usd_24h",
+    "tx_count", "fees_usd_current", "fees_usd_24h_ago", "fees_usd_24h", "amount_token0",
+    "amount_token1", "pools_apr", "farming_apr", "final_apr", "token_rewards", "timestamp"
+)
+
 
 class SQL_DB_Stella:
-    def __init__(self, userName, passWord, dataBase, host, db_port, initializeTable=False):
+    def __init__(self, userName, passWord, dataBase, host, db_port, initializeTable=False, chunk_size=None):
         self.userName = userName
         self.passWord = passWord
         self.dataBase = dataBase
         self.port = db_port
         self.host = host
+        self.pool_writer = BulkWriter("pool_data", POOL_DATA_COLUMNS,
+                                      leading_columns=("batch_id",), chunk_size=chunk_size)
 
         if initializeTable:
             self.initialize_tables()
@@ -50,32 +63,29 @@ class SQL_DB_Stella:
         );
         """
         self.executeSQL(sql_command)
+        self.executeSQL(CREATE_LATEST_BATCH_SQL)
 
     def errorMessage(self, message):
         logger.error(f"SQL Error: {message}")
 
+    def _pool(self):
+        return get_pool(self.userName, self.passWord, self.host, self.dataBase, self.port)
+
     def executeSQL(self, query, params=None):
         try:
-            cnx = mysql.connector.connect(
-                user=self.userName,
-                password=self.passWord,
-                host=self.host,
-                database=self.dataBase,
-                port=self.port
-            )
-            cursor = cnx.cursor()
-            if params is None:
-                cursor.execute(query)
-            else:
-                cursor.execute(query, params)
-            try:
-                values = cursor.fetchall()
-            except:
-                values = None
-            cnx.commit()
-            cursor.close()
-            cnx.close()
-            return values
+            with self._pool().connection() as cnx:
+                cursor = cnx.cursor()
+                if params is None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query, params)
+                try:
+                    values = cursor.fetchall()
+                except:
+                    values = None
+                cnx.commit()
+                cursor.close()
+                return values
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
                 self.errorMessage("Something is wrong with your user name or password")
@@ -93,27 +103,13 @@ class SQL_DB_Stella:
             logger.warning("No data to store in the database (Stella).")
             return
         
-        df = pd.DataFrame(processed_data)
-        table_name = "pool_data"
-        
-        for _, row in df.iterrows():
-            values_list = [
-                "NULL" if pd.isna(value) else
-                "'" + str(value).replace("'", "\\'") + "'" if isinstance(value, str) else
-                str(value)
-                for value in [batch_id] + row.tolist()
-            ]
-            values = ', '.join(values_list)
-            
-            query = f"""
-            INSERT INTO {table_name} (
-                batch_id, pool_id, token0_id, symbol, token0_name, token0_decimals,
-                token1_id, token1_symbol, token1_name, token1_decimals, liquidity,
-                sqrt_price, tick, volume_usd_current, volume_usd_24h_ago, volume_usd_24h,
-                tx_count, fees_usd_current, fees_usd_24h_ago, fees_usd_24h, amount_token0,
-                amount_token1, pools_apr, farming_apr, final_apr, token_rewards, timestamp
-            ) VALUES ({values})
-            """
-            self.executeSQL(query)
+        try:
+            write_batch(self._pool(), [
+                (self.pool_writer, processed_data, (batch_id,)),
+                (registry_writer, registry_rows({"pool_data": len(processed_data)}, batch_id), ()),
+            ])
+        except mysql.connector.Error as err:
+            self.errorMessage(str(err))
+            raise
         
         logger.info(f"Pool data stored in MySQL database with batch_id {batch_id}")
@@ -26,16 +26,30 @@ HYDRATION_SCRIPT = BASE_DIR / "Hydration_Data_fetching.py"
 ASSET_PRICES_SCRIPT = BASE_DIR / "fetch_asset_prices.py"
 STELLASWAP_SCRIPT = BASE_DIR / "stellaswap_store_raw_data.py"
 MERGE_SCRIPT = BASE_DIR / "combine_tables.py"
+MAINTENANCE_SCRIPT = BASE_DIR / "partition_maintenance.py"
+FETCH_ENGINE_SCRIPT = BASE_DIR / "fetch_engine.py"
+
+# FETCH_MODE: "subprocess" = one process per fetch script, "async" = all collectors in one fetch_engine.py process
+FETCH_MODES = ("subprocess", "async")
 
 class JobOrchestrator:
-    def __init__(self, scripts=None, merge_script=None):
-        self.scripts = scripts if scripts is not None else [
-            BIFROST_SCRIPT, 
-            HYDRATION_SCRIPT, 
-            ASSET_PRICES_SCRIPT,
-            STELLASWAP_SCRIPT
-        ]
+    def __init__(self, scripts=None, merge_script=None, maintenance_script=None, fetch_mode=None):
+        self.fetch_mode = (fetch_mode or os.getenv("FETCH_MODE", "subprocess")).strip().lower()
+        if self.fetch_mode not in FETCH_MODES:
+            raise ValueError(f"FETCH_MODE must be one of {FETCH_MODES}, got {self.fetch_mode!r}")
+        if scripts is not None:
+            self.scripts = scripts
+        elif self.fetch_mode == "async":
+            self.scripts = [FETCH_ENGINE_SCRIPT]
+        else:
+            self.scripts = [
+                BIFROST_SCRIPT, 
+                HYDRATION_SCRIPT, 
+                ASSET_PRICES_SCRIPT,
+                STELLASWAP_SCRIPT
+            ]
         self.merge_script = merge_script or MERGE_SCRIPT
+        self.maintenance_script = maintenance_script or MAINTENANCE_SCRIPT
         self.processes = []
         self.running = False
         self._setup_signals()
@@ -50,7 +64,8 @@ class JobOrchestrator:
 
     def start_long_running_scripts(self):
         """
-        Start the fetch scripts that run their own internal loops.
+        Start the fetch scripts that run their own internal loops
+        (in async mode: the one fetch_engine.py process running all collectors).
         """
         for script in self.scripts:
             cmd = [sys.executable, str(script)]
@@ -76,6 +91,23 @@ class JobOrchestrator:
         except Exception as e:
             logger.error(f"Merge error: {e}")
 
+    def run_maintenance_script(self):
+        """
+        Run partition maintenance once (blocking): add future partitions, expire old ones.
+        """
+        logger.info(f"Running maintenance script: {self.maintenance_script}")
+        try:
+            subprocess.run(
+                [sys.executable, str(self.maintenance_script)],
+                cwd=str(BASE_DIR),
+                check=True
+            )
+            logger.info("Partition maintenance completed successfully.")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Partition maintenance failed with exit code {e.returncode}")
+        except Exception as e:
+            logger.error(f"Partition maintenance error: {e}")
+
     def stop_all(self):
         """
         Gracefully stop all child processes.
@@ -102,11 +134,13 @@ class JobOrchestrator:
         self.processes = []
         logger.info("Orchestrator cleanup complete.")
 
-    def run(self, merge_interval_sec=3600, max_iterations=None):
+    def run(self, merge_interval_sec=3600, max_iterations=None, maintenance_interval_sec=None):
         """
         Main orchestration loop.
         Args:
             merge_interval_sec (int): Frequency of merge script execution.
+            maintenance_interval_sec (int/None): Frequency of partition maintenance
+                (default PARTITION_MAINTENANCE_INTERVAL_SEC, 86400; 0 disables it).
             max_iterations (int/None): If set, limits the number of 10s sleep cycles.
         """
         self.running = True
@@ -114,6 +148,9 @@ class JobOrchestrator:
         self.start_long_running_scripts()
 
         next_merge_time = time.time()  # run once immediately on start
+        if maintenance_interval_sec is None:
+            maintenance_interval_sec = int(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SEC", 86400))
+        next_maintenance_time = next_merge_time
         iterations = 0
 
         logger.info(f"Scheduler started (Merge Interval: {merge_interval_sec}s).")
@@ -145,6 +182,11 @@ class JobOrchestrator:
                     self.run_merge_script()
                     next_merge_time = now + merge_interval_sec
 
+                # 3b. Partition maintenance (daily by default)
+                if maintenance_interval_sec and now >= next_maintenance_time:
+                    self.run_maintenance_script()
+                    next_maintenance_time = now + maintenance_interval_sec
+
                 # 4. Heartbeat
                 LivelinessProbe.record_heartbeat("orchestrator")
 
@@ -208,7 +250,7 @@ def initialize_tables():
         initializeTable=True
     )
 
-    with Migration(user=db_user, password=db_password, host=db_host, database=db_name, port=db_port, code_version=1) as migrator:
+    with Migration(user=db_user, password=db_password, host=db_host, database=db_name, port=db_port, code_version=6) as migrator:
         migrator.migrate()
 
 
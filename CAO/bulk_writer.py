@@ -0,0 +1,154 @@
+# bulk_writer.py
+"""
+Chunked, parameterized multi-row INSERTs for the SQL_DB_* writers.
+
+A BulkWriter is bound to one target table schema (table name + ordered column
+list). It accepts either a list of records (dicts) or a DataFrame, builds the
+parameter tuples column by column (NaN/inf -> NULL, numpy scalars -> python,
+lists -> JSON) and emits
+
+  INSERT INTO t (c1, c2, ...) VALUES (%s, %s, ...), (%s, %s, ...), ...
+
+with at most `chunk_size` rows per statement. Values are always sent as
+parameters, never spliced into the SQL text. With `update_columns` the
+statement becomes an upsert (ON DUPLICATE KEY UPDATE c = VALUES(c), ...);
+`update_sql` gives the assignments explicitly when a column has to be merged
+with its stored value instead of overwritten.
+
+write_batch() runs several writers on one pooled connection and commits once,
+so a batch is either stored completely or not at all.
+
+Environment (.env) variables:
+  DB_BULK_CHUNK_SIZE  rows per INSERT statement (default 1000)
+"""
+
+import json
+import math
+import os
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def clean_value(val):
+    """Convert one value into something mysql.connector can bind."""
+    # Lists -> JSON string
+    if isinstance(val, list):
+        return json.dumps(val)
+
+    # None / NaN -> None (becomes NULL in MySQL)
+    if val is None or (isinstance(val, float) and (math.isnan(val) or math.isinf(val))):
+        return None
+
+    # Pandas-style NaN / NaT / NA detection for any type
+    try:
+        if pd.isna(val):
+            return None
+    except (TypeError, ValueError):
+        # pd.isna() can raise on some non-numeric types, ignore
+        pass
+
+    # numpy scalars -> python scalars
+    if isinstance(val, np.generic):
+        val = val.item()
+        if isinstance(val, float) and math.isinf(val):
+            return None
+
+    # Otherwise keep value as-is (str, int, float, etc.)
+    return val
+
+
+def clean_column(col: pd.Series) -> list:
+    """clean_value over a whole column, with a vectorized path for numeric dtypes."""
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        # numeric columns: only NaN/inf need mapping, tolist() yields python scalars
+        mask = col.notna() & ~col.isin([np.inf, -np.inf])
+        return col.astype(object).where(mask, None).tolist()
+    return [clean_value(v) for v in col.tolist()]
+
+
+def build_rows(data, columns: Sequence[str], leading: Sequence[Any] = ()) -> List[tuple]:
+    """
+    Build parameter tuples column-wise from a DataFrame or a list of dicts.
+    Columns missing from the data are written as NULL. `leading` values
+    (e.g. batch_id) are prepended to every row.
+    """
+    if isinstance(data, pd.DataFrame):
+        n = len(data)
+        values = [
+            clean_column(data[c]) if c in data.columns else [None] * n
+            for c in columns
+        ]
+    else:
+        records = list(data)
+        values = [[clean_value(r.get(c)) for r in records] for c in columns]
+    lead = tuple(leading)
+    return [lead + row for row in zip(*values)]
+
+
+class BulkWriter:
+    def __init__(self, table: str, columns: Sequence[str],
+                 leading_columns: Sequence[str] = (), chunk_size: Optional[int] = None,
+                 update_columns: Sequence[str] = (), update_sql: str = "") -> None:
+        self.table = table
+        self.columns = tuple(columns)
+        self.leading_columns = tuple(leading_columns)
+        self.update_columns = tuple(update_columns)
+        self.chunk_size = int(chunk_size or os.getenv("DB_BULK_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+        if self.chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        all_cols = self.leading_columns + self.columns
+        self._head = f"INSERT INTO {table} ({', '.join(all_cols)}) VALUES "
+        self._row_sql = "(" + ", ".join(["%s"] * len(all_cols)) + ")"
+        self._tail = ""
+        if update_sql:
+            self._tail = " ON DUPLICATE KEY UPDATE " + update_sql
+        elif self.update_columns:
+            self._tail = " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in self.update_columns)
+        # every chunk but the last has the same statement text
+        self._full_chunk_sql = self._build_sql(self.chunk_size)
+
+    def _build_sql(self, n_rows: int) -> str:
+        return self._head + ", ".join([self._row_sql] * n_rows) + self._tail
+
+    def insert_sql(self, n_rows: int) -> str:
+        if n_rows == self.chunk_size:
+            return self._full_chunk_sql
+        return self._build_sql(n_rows)
+
+    def statements(self, data, leading: Sequence[Any] = ()) -> Iterator[Tuple[str, list]]:
+        """Yield (sql, flat_params) per chunk."""
+        rows = build_rows(data, self.columns, leading)
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            params = [v for row in chunk for v in row]
+            yield self.insert_sql(len(chunk)), params
+
+    def write(self, cursor, data, leading: Sequence[Any] = ()) -> int:
+        """Execute every chunk on `cursor` (no commit). Returns the number of rows."""
+        width = len(self.leading_columns) + len(self.columns)
+        rows = 0
+        for sql, params in self.statements(data, leading):
+            cursor.execute(sql, params)
+            rows += len(params) // width
+        return rows
+
+
+def write_batch(pool, writes: Iterable[Tuple[BulkWriter, Any, Sequence[Any]]]) -> int:
+    """
+    Run (writer, data, leading) writes on one pooled connection and commit once.
+    Any error rolls back the whole batch and is re-raised.
+    """
+    total = 0
+    with pool.connection() as cnx:
+        cursor = cnx.cursor()
+        try:
+            for writer, data, leading in writes:
+                total += writer.write(cursor, data, leading)
+            cnx.commit()
+        finally:
+            cursor.close()
+    return total
@@ -0,0 +1,133 @@
+# clmm_math.py
+"""
+Vectorized concentrated-liquidity (Uniswap v3 / Algebra) token amounts.
+
+Same formulas as stellaswap_store_raw_data.calculate_token_amounts, but on
+NumPy arrays: one call computes amount0/amount1 for every position of a pool,
+and pools_token_amounts() does the same for many pools at once, summing per
+pool with np.bincount.
+
+Inputs are the position dicts returned by the Stellaswap subgraph
+(tickLower.tickIdx, tickUpper.tickIdx, liquidity, pool.sqrtPrice,
+pool.token0/token1.decimals).
+
+Usage:
+  amount0, amount1 = token_amounts(liquidity, sqrt_price_current, sqrt_low, sqrt_high)
+  total0, total1 = pool_token_amounts(positions)
+  totals = pools_token_amounts({pool_id: positions, ...})
+"""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+Q96 = 2 ** 96
+
+
+def tick_to_sqrt_price(ticks) -> np.ndarray:
+    """sqrt(1.0001 ** tick) for an array of ticks."""
+    return np.sqrt(np.power(1.0001, np.asarray(ticks, dtype=np.float64)))
+
+
+def token_amounts(liquidity, sqrt_price_current, sqrt_price_low, sqrt_price_high) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Element-wise calculate_token_amounts. `sqrt_price_current` may be a
+    scalar (one pool) or an array aligned with the positions (many pools).
+    Amounts are raw token units (not scaled by decimals).
+    """
+    liquidity = np.asarray(liquidity, dtype=np.float64)
+    current = np.asarray(sqrt_price_current, dtype=np.float64)
+    low = np.minimum(sqrt_price_low, sqrt_price_high)
+    high = np.maximum(sqrt_price_low, sqrt_price_high)
+
+    sqrt_price = np.clip(current, low, high)
+
+    amount0 = np.where(current < high, liquidity * (high - sqrt_price) / (sqrt_price * high), 0.0)
+    amount1 = np.where(current > low, liquidity * (sqrt_price - low), 0.0)
+    return amount0, amount1
+
+
+def positions_to_arrays(positions: Sequence[dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(tick_lower, tick_upper, liquidity) float arrays from subgraph position dicts."""
+    # the subgraph returns numbers as decimal strings; NumPy parses them directly
+    # (liquidity is uint128, so it goes straight to float64 rather than via int64)
+    tick_lower = np.array([p["tickLower"]["tickIdx"] for p in positions], dtype=np.float64)
+    tick_upper = np.array([p["tickUpper"]["tickIdx"] for p in positions], dtype=np.float64)
+    liquidity = np.array([p["liquidity"] for p in positions], dtype=np.float64)
+    return tick_lower, tick_upper, liquidity
+
+
+def _pool_params(position: dict) -> Tuple[float, int, int]:
+    pool = position["pool"]
+    return (
+        int(pool["sqrtPrice"]) / Q96,
+        10 ** int(pool["token0"]["decimals"]),
+        10 ** int(pool["token1"]["decimals"]),
+    )
+
+
+def _sum_amounts(positions: Sequence[dict], params: Tuple[float, int, int]) -> Tuple[float, float]:
+    sqrt_price_current, token0_scale, token1_scale = params
+    tick_lower, tick_upper, liquidity = positions_to_arrays(positions)
+    amount0, amount1 = token_amounts(
+        liquidity, sqrt_price_current, tick_to_sqrt_price(tick_lower), tick_to_sqrt_price(tick_upper)
+    )
+    return float(amount0.sum()) / token0_scale, float(amount1.sum()) / token1_scale
+
+
+def pool_token_amounts(positions: Sequence[dict]) -> Optional[Tuple[float, float]]:
+    """Decimal-scaled (amount_token0, amount_token1) of one pool, or None if there are no positions."""
+    if not positions:
+        return None
+    return _sum_amounts(positions, _pool_params(positions[0]))
+
+
+def pools_token_amounts(pools: Dict[str, Sequence[dict]]) -> Dict[str, Optional[Tuple[float, float]]]:
+    """
+    pool_token_amounts for many pools in one pass: every position of every
+    pool goes through a single vectorized computation and is summed back
+    per pool. Pools without positions map to None.
+    """
+    pool_ids = list(pools)
+    non_empty = [pool_id for pool_id in pool_ids if pools[pool_id]]
+    result: Dict[str, Optional[Tuple[float, float]]] = {pool_id: None for pool_id in pool_ids}
+    if not non_empty:
+        return result
+
+    counts = np.array([len(pools[pool_id]) for pool_id in non_empty])
+    params = np.array([_pool_params(pools[pool_id][0]) for pool_id in non_empty], dtype=np.float64)
+    index = np.repeat(np.arange(len(non_empty)), counts)
+
+    tick_lower, tick_upper, liquidity = positions_to_arrays(
+        [p for pool_id in non_empty for p in pools[pool_id]]
+    )
+    amount0, amount1 = token_amounts(
+        liquidity, params[index, 0], tick_to_sqrt_price(tick_lower), tick_to_sqrt_price(tick_upper)
+    )
+    totals0 = np.bincount(index, weights=amount0, minlength=len(non_empty)) / params[:, 1]
+    totals1 = np.bincount(index, weights=amount1, minlength=len(non_empty)) / params[:, 2]
+
+    for i, pool_id in enumerate(non_empty):
+        result[pool_id] = (float(totals0[i]), float(totals1[i]))
+    return result
+
+
+def stream_token_amounts(chunks: Iterable[Sequence[dict]]) -> Optional[Tuple[float, float]]:
+    """
+    pool_token_amounts over a stream of position chunks (e.g. subgraph pages)
+    of one pool, holding only one chunk at a time. The pool price and
+    decimals come from the first position. None if every chunk is empty.
+    """
+    params = None
+    total0, total1 = 0.0, 0.0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if params is None:
+            params = _pool_params(chunk[0])
+        amount0, amount1 = _sum_amounts(chunk, params)
+        total0 += amount0
+        total1 += amount1
+    if params is None:
+        return None
+    return total0, total1
@@ -3,12 +3,16 @@
 # combine_tables.py
 """
 Thin CLI wrapper that calls SQL_DB_combinedTables to take the latest batches
-from hydration_data, pool_data, and the Bifrost table and append them into full_table.
+from hydration_data, pool_data, and the Bifrost table and append them into full_table,
+then brings the hourly/daily rollups (SQL_DB_rollups) up to date.
 """
 
 import os
 from dotenv import load_dotenv
+from mysql.connector import Error as MySQLError
 from SQL_DB_combinedTables import SQL_DB_CombinedTables
+from SQL_DB_rollups import SQL_DB_Rollups, rollups_enabled
+from logging_config import logger
 
 def main():
     load_dotenv()
@@ -21,6 +25,12 @@ def main():
     combiner = SQL_DB_CombinedTables(user=user, password=password, db_port=db_port, db=db, host=host)
     combiner.run_once()
 
+    if rollups_enabled():
+        try:
+            SQL_DB_Rollups(user=user, password=password, host=host, database=db, port=int(db_port)).run_once()
+        except MySQLError as e:
+            logger.error(f"Rollup update failed: {e}")
+
 
 if __name__ == "__main__":
     main()
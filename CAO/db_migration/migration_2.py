@@ -0,0 +1,75 @@
+"""
+Migration 2 - secondary indexes for the "latest batch" lookups - migration_2.py
+
+The merge and combine jobs find the newest batch of every source table with
+
+    SELECT batch_id ... ORDER BY created_at DESC, batch_id DESC LIMIT 1
+    ... WHERE batch_id = (...)
+
+Without secondary indexes both are full scans (plus a filesort) of
+append-only tables that grow every hour. This adds to every source table:
+
+    idx_batch_id             (batch_id)              -> WHERE batch_id = ?  / joins on batch_id
+    idx_created_at_batch_id  (created_at, batch_id)  -> ORDER BY ... LIMIT 1 read backwards from the index
+
+InnoDB builds secondary indexes in place without blocking inserts, so the
+migration can run while the fetchers keep writing. Indexes that already
+exist ("Duplicate key name") and tables that do not exist yet are
+skipped, so re-running is safe.
+"""
+
+INDEXED_TABLES = (
+    "hydration_data",
+    "pool_data",
+    "Hydration_price",
+    "Bifrost_site_table",
+    "Bifrost_staking_table",
+)
+
+INDEXES = (
+    ("idx_batch_id", ("batch_id",)),
+    ("idx_created_at_batch_id", ("created_at", "batch_id")),
+)
+
+
+def add_indexes(conn, tables=INDEXED_TABLES):
+    """
+    Add INDEXES to `tables`, one ALTER TABLE per index (InnoDB adds a
+    secondary index in place, no table copy). Returns the (table, index_name)
+    pairs added.
+    """
+    cursor = conn.cursor()
+    added = []
+    try:
+        for table in tables:
+            for name, cols in INDEXES:
+                try:
+                    cursor.execute(f"ALTER TABLE {table} ADD INDEX {name} ({', '.join(cols)})")
+                except Exception as e:
+                    if "Duplicate key name" in str(e):
+                        continue
+                    if "doesn't exist" in str(e):
+                        print(f"Migration 2 skipped: table {table} does not exist.")
+                        break
+                    raise
+                added.append((table, name))
+        conn.commit()
+    finally:
+        cursor.close()
+    return added
+
+
+def migrate(conn):
+    """
+    执行数据库迁移操作
+
+    Args:
+        conn: mysql.connector.connection.MySQLConnection 数据库连接对象
+    """
+    try:
+        added = add_indexes(conn)
+        print(f"Migration 2: added {len(added)} indexes: {added}")
+    except Exception as e:
+        conn.rollback()
+        print(f"Migration 2 failed: {e}")
+        raise
@@ -0,0 +1,68 @@
+"""
+Migration 3 - latest_batch registry - migration_3.py
+
+Creates the latest_batch table (one row per source table, see latest_batch.py)
+that the writers keep pointing at their newest batch, and backfills it once
+from the data already in the source tables so the merge / combine jobs can
+use it right away. Sources that already have a registry row (written by a
+writer after the table was created) are left alone.
+"""
+
+SOURCE_TABLES = (
+    "hydration_data",
+    "pool_data",
+    "Hydration_price",
+    "Bifrost_site_table",
+    "Bifrost_staking_table",
+)
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS latest_batch (
+    source VARCHAR(64) NOT NULL PRIMARY KEY,
+    batch_id BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    row_count INT,
+    data_hash VARCHAR(64)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+BACKFILL_SQL = """
+INSERT INTO latest_batch (source, batch_id, created_at, row_count)
+SELECT %s, t.batch_id, MAX(t.created_at), COUNT(*)
+FROM {table} AS t
+WHERE t.batch_id = (
+  SELECT batch_id FROM {table} ORDER BY created_at DESC, batch_id DESC LIMIT 1
+)
+GROUP BY t.batch_id
+ON DUPLICATE KEY UPDATE source = source
+"""
+
+
+def migrate(conn):
+    """
+    执行数据库迁移操作
+
+    Args:
+        conn: mysql.connector.connection.MySQLConnection 数据库连接对象
+    """
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(CREATE_SQL)
+        for table in SOURCE_TABLES:
+            try:
+                cursor.execute(BACKFILL_SQL.format(table=table), (table,))
+            except Exception as e:
+                if "doesn't exist" in str(e):
+                    print(f"Migration 3: table {table} does not exist, not backfilled.")
+                    continue
+                raise
+        conn.commit()
+        print("Migration 3: created and backfilled latest_batch successfully")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Migration 3 failed: {e}")
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,108 @@
+"""
+Migration 4 - latest-per-asset Bifrost tables - migration_4.py
+
+Creates Bifrost_site_latest (newest row with an APY per Asset) and
+Bifrost_staking_latest (newest price per symbol), which SQL_DB.update_bifrost_database
+keeps current by upsert, and backfills them once from the full history so the
+combiner can read O(assets) rows instead of aggregating Bifrost_site_table /
+Bifrost_staking_table on every run. Keys already written by the Bifrost
+writer are left alone.
+"""
+
+CREATE_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS Bifrost_site_latest (
+        Asset VARCHAR(255) NOT NULL PRIMARY KEY,
+        batch_id INT NOT NULL,
+        tvl DECIMAL(20,6),
+        apy DECIMAL(20,6),
+        apyBase DECIMAL(20,6),
+        apyReward DECIMAL(20,6),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Bifrost_staking_latest (
+        symbol VARCHAR(50) NOT NULL PRIMARY KEY,
+        batch_id INT NOT NULL,
+        price DECIMAL(20,6),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    );
+    """,
+)
+
+BACKFILL_SQL = (
+    """
+    INSERT INTO Bifrost_site_latest (Asset, batch_id, tvl, apy, apyBase, apyReward, created_at)
+    SELECT t.Asset, t.batch_id, t.tvl, t.apy, t.apyBase, t.apyReward, t.created_at
+    FROM Bifrost_site_table t
+    JOIN (
+        SELECT Asset, MAX(created_at) AS max_created
+        FROM Bifrost_site_table
+        WHERE Asset IS NOT NULL
+          AND (apy IS NOT NULL OR apyBase IS NOT NULL OR apyReward IS NOT NULL)
+        GROUP BY Asset
+    ) m
+      ON m.Asset = t.Asset AND t.created_at = m.max_created
+    JOIN (
+        SELECT Asset, created_at, MAX(batch_id) AS max_batch
+        FROM Bifrost_site_table
+        WHERE Asset IS NOT NULL
+          AND (apy IS NOT NULL OR apyBase IS NOT NULL OR apyReward IS NOT NULL)
+        GROUP BY Asset, created_at
+    ) b
+      ON b.Asset = t.Asset AND b.created_at = t.created_at AND b.max_batch = t.batch_id
+    ON DUPLICATE KEY UPDATE Asset = Bifrost_site_latest.Asset
+    """,
+    """
+    INSERT INTO Bifrost_staking_latest (symbol, batch_id, price, created_at)
+    SELECT s.symbol, s.batch_id, s.price, s.created_at
+    FROM Bifrost_staking_table s
+    JOIN (
+        SELECT symbol, MAX(created_at) AS max_created
+        FROM Bifrost_staking_table
+        WHERE symbol IS NOT NULL AND price IS NOT NULL
+        GROUP BY symbol
+    ) m
+      ON m.symbol = s.symbol AND s.created_at = m.max_created
+    JOIN (
+        SELECT s2.symbol, s2.created_at, MAX(s2.batch_id) AS max_batch
+        FROM Bifrost_staking_table s2
+        WHERE s2.symbol IS NOT NULL AND s2.price IS NOT NULL
+        GROUP BY s2.symbol, s2.created_at
+    ) b
+      ON b.symbol = s.symbol AND b.created_at = s.created_at AND b.max_batch = s.batch_id
+    ON DUPLICATE KEY UPDATE symbol = Bifrost_staking_latest.symbol
+    """,
+)
+
+
+def migrate(conn):
+    """
+    执行数据库迁移操作
+
+    Args:
+        conn: mysql.connector.connection.MySQLConnection 数据库连接对象
+    """
+    cursor = conn.cursor()
+
+    try:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+        for sql in BACKFILL_SQL:
+            try:
+                cursor.execute(sql)
+            except Exception as e:
+                if "doesn't exist" in str(e):
+                    print(f"Migration 4: source table missing, not backfilled ({e})")
+                    continue
+                raise
+        conn.commit()
+        print("Migration 4: created and backfilled Bifrost_site_latest / Bifrost_staking_latest successfully")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Migration 4 failed: {e}")
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,125 @@
+"""
+Migration 5 - normalized snapshot rows - migration_5.py
+
+Creates multipleFACT_asset (the rows of every multipleFACT payload in columns,
+indexed by (chain, symbol, snapshot_id), see snapshot_assets.py) and backfills
+it from the JSON payloads already stored, one payload section at a time with
+JSON_TABLE (MySQL 8). Snapshots that already have rows (written by the merge
+job after the table was created) are left alone.
+"""
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS multipleFACT_asset (
+    snapshot_id INT NOT NULL,
+    section VARCHAR(32) NOT NULL,
+    row_no INT NOT NULL,
+    chain VARCHAR(32) NOT NULL,
+    symbol VARCHAR(255),
+    farm_apy DOUBLE,
+    pool_apy DOUBLE,
+    apy DOUBLE,
+    tvl DOUBLE,
+    volume DOUBLE,
+    price DOUBLE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (snapshot_id, section, row_no),
+    INDEX idx_chain_symbol_snapshot (chain, symbol, snapshot_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+BACKFILL_SQL = (
+    """
+    INSERT INTO multipleFACT_asset
+        (snapshot_id, section, row_no, chain, symbol, farm_apy, pool_apy, apy, tvl, volume, price, created_at)
+    SELECT f.id, 'bifrost', j.row_no, 'bifrost', j.symbol, j.farm_apy, j.pool_apy, j.apy, j.tvl, NULL, j.price,
+           f.created_at
+    FROM multipleFACT f,
+         JSON_TABLE(f.payload, '$.bifrost_data[*]' COLUMNS (
+             row_no FOR ORDINALITY,
+             symbol VARCHAR(255) PATH '$.Asset',
+             farm_apy DOUBLE PATH '$.apyReward',
+             pool_apy DOUBLE PATH '$.apyBase',
+             apy DOUBLE PATH '$.apy',
+             tvl DOUBLE PATH '$.tvl',
+             price DOUBLE PATH '$.price'
+         )) AS j
+    ON DUPLICATE KEY UPDATE snapshot_id = multipleFACT_asset.snapshot_id
+    """,
+    """
+    INSERT INTO multipleFACT_asset
+        (snapshot_id, section, row_no, chain, symbol, farm_apy, pool_apy, apy, tvl, volume, price, created_at)
+    SELECT f.id, 'moonbeam', j.row_no, 'moonbeam', NULLIF(CONCAT_WS('-', j.token0, j.token1), ''),
+           j.farm_apy, j.pool_apy, j.apy, NULL, j.volume, NULL, f.created_at
+    FROM multipleFACT f,
+         JSON_TABLE(f.payload, '$.moonbeam_data[*]' COLUMNS (
+             row_no FOR ORDINALITY,
+             token0 VARCHAR(120) PATH '$.token0_symbol',
+             token1 VARCHAR(120) PATH '$.token1_symbol',
+             farm_apy DOUBLE PATH '$.farming_apr',
+             pool_apy DOUBLE PATH '$.pools_apr',
+             apy DOUBLE PATH '$.final_apr',
+             volume DOUBLE PATH '$.volume_usd_24h'
+         )) AS j
+    ON DUPLICATE KEY UPDATE snapshot_id = multipleFACT_asset.snapshot_id
+    """,
+    """
+    INSERT INTO multipleFACT_asset
+        (snapshot_id, section, row_no, chain, symbol, farm_apy, pool_apy, apy, tvl, volume, price, created_at)
+    SELECT f.id, 'hydration', j.row_no, 'hydration', j.symbol, j.farm_apy, j.pool_apy, j.apy, j.tvl, j.volume, NULL,
+           f.created_at
+    FROM multipleFACT f,
+         JSON_TABLE(f.payload, '$.hydration_data[*]' COLUMNS (
+             row_no FOR ORDINALITY,
+             symbol VARCHAR(255) PATH '$.symbol',
+             farm_apy DOUBLE PATH '$.farm_apr',
+             pool_apy DOUBLE PATH '$.pool_apr',
+             apy DOUBLE PATH '$.total_apr',
+             tvl DOUBLE PATH '$.tvl_usd',
+             volume DOUBLE PATH '$.volume_usd'
+         )) AS j
+    ON DUPLICATE KEY UPDATE snapshot_id = multipleFACT_asset.snapshot_id
+    """,
+    """
+    INSERT INTO multipleFACT_asset
+        (snapshot_id, section, row_no, chain, symbol, farm_apy, pool_apy, apy, tvl, volume, price, created_at)
+    SELECT f.id, 'hydration_price', j.row_no, 'hydration', j.symbol, NULL, NULL, NULL, NULL, NULL, j.price,
+           f.created_at
+    FROM multipleFACT f,
+         JSON_TABLE(f.payload, '$.hydration_price_data[*]' COLUMNS (
+             row_no FOR ORDINALITY,
+             symbol VARCHAR(255) PATH '$.symbol',
+             price DOUBLE PATH '$.price_usdt'
+         )) AS j
+    ON DUPLICATE KEY UPDATE snapshot_id = multipleFACT_asset.snapshot_id
+    """,
+)
+
+
+def migrate(conn):
+    """
+    执行数据库迁移操作
+
+    Args:
+        conn: mysql.connector.connection.MySQLConnection 数据库连接对象
+    """
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(CREATE_SQL)
+        for sql in BACKFILL_SQL:
+            try:
+                cursor.execute(sql)
+            except Exception as e:
+                if "doesn't exist" in str(e):
+                    print(f"Migration 5: multipleFACT does not exist, nothing to backfill ({e})")
+                    break
+                raise
+        conn.commit()
+        print("Migration 5: created and backfilled multipleFACT_asset successfully")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Migration 5 failed: {e}")
+        raise
+    finally:
+        cursor.close()
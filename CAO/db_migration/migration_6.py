@@ -0,0 +1,49 @@
+"""
+Migration 6 - monthly partitions for the fact tables - migration_6.py
+
+Switches every table in partition_maintenance.PARTITIONED_TABLES to RANGE
+partitions by month of its insert timestamp: the existing rows go to
+p_history, then one partition per month from the current month to
+PARTITION_MONTHS_AHEAD months ahead, plus pmax. The primary key becomes
+(<old key>, <time column>) as MySQL requires. This rebuilds each table once;
+from then on partition_maintenance.py adds future months and expires old ones
+without touching the rows. Tables that do not exist yet are partitioned by
+the maintenance job once they do.
+"""
+
+import datetime
+import os
+
+from partition_maintenance import PARTITIONED_TABLES, partition_table_sql
+
+
+def migrate(conn):
+    """
+    执行数据库迁移操作
+
+    Args:
+        conn: mysql.connector.connection.MySQLConnection 数据库连接对象
+    """
+    cursor = conn.cursor()
+    today = datetime.date.today()
+    months_ahead = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+
+    try:
+        for table in PARTITIONED_TABLES:
+            try:
+                cursor.execute(partition_table_sql(table, today, months_ahead))
+                print(f"Migration 6: partitioned {table} by month")
+            except Exception as e:
+                if "doesn't exist" in str(e):
+                    print(f"Migration 6: table {table} does not exist, skipped.")
+                    continue
+                raise
+        conn.commit()
+        print("Migration 6: partitioned the fact tables successfully")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Migration 6 failed: {e}")
+        raise
+    finally:
+        cursor.close()
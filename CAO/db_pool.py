@@ -0,0 +1,234 @@
+# db_pool.py
+"""
+Shared MySQL connection pool used by every SQL_DB_* class.
+
+One pool is kept per (user, host, port, database), so all writers and readers
+pointing at the same database reuse the same set of connections instead of
+doing a TCP + auth handshake for every statement.
+
+Every borrow health-checks the connection (ping). A connection that fails the
+ping is considered stale: it is dropped and transparently replaced by a fresh
+one. Connections released after an error are discarded, never reused; any
+transaction still open on release is rolled back.
+
+Environment (.env) variables:
+  DB_POOL_SIZE     max open connections per pool (default 5)
+  DB_POOL_TIMEOUT  seconds to wait for a free connection (default 30)
+
+Usage:
+  pool = get_pool(user, password, host, database, port)
+  with pool.connection() as cnx:
+      cur = cnx.cursor()
+      ...
+  pool_stats()    # {"user@host:port/db": {"borrows": ..., "reuse_ratio": ...}}
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import mysql.connector
+from mysql.connector import errors as mysql_errors
+from logging_config import logger
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 30.0
+
+
+class ConnectionPool:
+    def __init__(self, user, password, host, database, port,
+                 pool_size: Optional[int] = None, timeout: Optional[float] = None) -> None:
+        self.user = user
+        self.password = password
+        self.host = host
+        self.database = database
+        self.port = port
+        self.pool_size = int(pool_size or os.getenv("DB_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self.timeout = float(timeout or os.getenv("DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT))
+        if self.pool_size < 1:
+            raise ValueError("pool_size must be >= 1")
+
+        self._idle: List[Any] = []
+        self._open = 0
+        self._cond = threading.Condition()
+
+        # statistics
+        self._borrows = 0
+        self._created = 0
+        self._stale = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---------- connection lifecycle ----------
+    def _new_connection(self):
+        cnx = mysql.connector.connect(
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            database=self.database,
+            port=self.port
+        )
+        with self._cond:
+            self._created += 1
+        return cnx
+
+    @staticmethod
+    def _is_healthy(cnx) -> bool:
+        try:
+            return bool(cnx.is_connected())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(cnx) -> None:
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Borrow a connection. Blocks up to `timeout` seconds when all
+        `pool_size` connections are in use, then raises PoolError.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        cnx = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    cnx = self._idle.pop()
+                    break
+                if self._open < self.pool_size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise mysql_errors.PoolError(
+                        f"Connection pool exhausted ({self.pool_size} in use) after {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - start
+            self._borrows += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            if cnx is not None and not self._is_healthy(cnx):
+                logger.info(f"Dropping stale pooled connection to {self.host}:{self.port}/{self.database}")
+                self._close_quietly(cnx)
+                with self._cond:
+                    self._stale += 1
+                cnx = None
+            if cnx is None:
+                cnx = self._new_connection()
+            return cnx
+        except Exception:
+            # the slot reserved above is not backed by a connection
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, cnx, discard: bool = False) -> None:
+        """
+        Return a borrowed connection; `discard=True` closes it instead.
+        A transaction left open (e.g. by a read) is rolled back first, so the
+        next borrower gets a fresh REPEATABLE READ snapshot and no metadata
+        locks are held while the connection sits idle.
+        """
+        if not discard:
+            try:
+                if cnx.in_transaction:
+                    cnx.rollback()
+            except Exception as e:
+                logger.info(f"Discarding pooled connection that failed to roll back: {e}")
+                discard = True
+        if discard:
+            self._close_quietly(cnx)
+            with self._cond:
+                self._open -= 1
+                self._discarded += 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append(cnx)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the block; errors discard it."""
+        cnx = self.acquire()
+        try:
+            yield cnx
+        except BaseException:
+            try:
+                cnx.rollback()
+            except Exception:
+                pass
+            self.release(cnx, discard=True)
+            raise
+        else:
+            self.release(cnx)
+
+    def close(self) -> None:
+        """Close every idle connection. Connections currently borrowed are closed on release."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for cnx in idle:
+            self._close_quietly(cnx)
+
+    # ---------- statistics ----------
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            borrows = self._borrows
+            return {
+                "pool_size": self.pool_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "borrows": borrows,
+                "connections_created": self._created,
+                "stale_reconnects": self._stale,
+                "discarded": self._discarded,
+                "reuse_ratio": (borrows - self._created) / borrows if borrows else 0.0,
+                "wait_time_total": self._wait_total,
+                "wait_time_avg": self._wait_total / borrows if borrows else 0.0,
+                "wait_time_max": self._wait_max,
+            }
+
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(user, password, host, database, port, pool_size: Optional[int] = None) -> ConnectionPool:
+    """Return the shared pool for these credentials, creating it on first use."""
+    key = (user, password, host, str(port), database)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(user, password, host, database, port, pool_size=pool_size)
+            _pools[key] = pool
+        return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistics of every shared pool, keyed by user@host:port/database."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {f"{k[0]}@{k[2]}:{k[3]}/{k[4]}": p.stats() for k, p in pools}
+
+
+def close_all_pools() -> None:
+    """Close and forget every shared pool (used on shutdown and between tests)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
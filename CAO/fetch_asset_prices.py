@@ -7,18 +7,36 @@ from dotenv import load_dotenv
 from SQL_DB_hydration_price import SQL_DB_Hydration_Price
 from logging_config import logger
 from utils import retry, generate_batch_id, DataValidator, LivelinessProbe
+from node_worker import get_worker, worker_enabled
 
 # Load env vars handled inside run_pipeline or globally if script run directly
 # We can leave the global load for backward compatibility if imported, but for now let's wrap it.
 
 
+# Quote settings, read per call because .env is loaded inside run_pipeline:
+#   HYDRATION_PRICE_MAX_ASSET_ID  only price assets with ID below this ("all" = every asset in allAssets.csv, default 30)
+#   HYDRATION_PRICE_CONCURRENCY   quotes in flight at once (default 8)
+#   HYDRATION_PRICE_TIMEOUT_MS    per-quote timeout in milliseconds (default 20000)
+def price_max_asset_id():
+    value = os.getenv("HYDRATION_PRICE_MAX_ASSET_ID", "30").strip().lower()
+    return None if value in ("", "all") else int(value)
+
+def price_quote_settings():
+    return (
+        max(1, int(os.getenv("HYDRATION_PRICE_CONCURRENCY", 8))),
+        max(1000, int(os.getenv("HYDRATION_PRICE_TIMEOUT_MS", 20000))),
+    )
+
 # Load assets from allAssets.csv (relative to this script)
 def load_assets():
     try:
         script_dir = os.path.dirname(os.path.abspath(__file__))
         csv_path = os.path.join(script_dir, "allAssets.csv")
         df = pd.read_csv(csv_path)
-        return df[df['ID'] < 30][['ID', 'Symbol']].to_dict('records')
+        max_id = price_max_asset_id()
+        if max_id is not None:
+            df = df[df['ID'] < max_id]
+        return df[['ID', 'Symbol']].to_dict('records')
     except FileNotFoundError:
         logger.error("allAssets.csv not found.")
         return []
@@ -26,14 +44,28 @@ def load_assets():
         logger.error(f"Error loading assets: {e}")
         return []
 
-# Fetch batch prices for assets 0 to 30
+# Fetch batch prices for `asset_ids` (default: the script's 0..30), quoted concurrently
 @retry(max_retries=3, delay=5)
-def fetch_batch_prices():
+def fetch_batch_prices(asset_ids=None):
+    concurrency, timeout_ms = price_quote_settings()
+    asset_ids = [str(asset_id) for asset_id in asset_ids] if asset_ids else None
+
+    if worker_enabled():
+        # persistent worker: API connection and pool registry stay warm between cycles
+        params = {"concurrency": concurrency, "timeout": timeout_ms}
+        if asset_ids:
+            params["assetIds"] = asset_ids
+        data = get_worker().call("prices", params)
+        return {item['assetId']: item['price'] for item in data}
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     script_path = os.path.join(script_dir, "hy/script/getBatchPrice2.ts")
+    cmd = ["npx", "tsx", script_path, "--concurrency", str(concurrency), "--timeout", str(timeout_ms)]
+    if asset_ids:
+        cmd += ["--ids", ",".join(asset_ids)]
     try:
         result = subprocess.run(
-            ["npx", "tsx", script_path],
+            cmd,
             capture_output=True,
             text=True,
             check=True,
@@ -87,9 +119,7 @@ def process_prices(assets, price_data):
     
     return processed_data
 
-# Main execution with 30-minute interval
-# Main execution with 30-minute interval
-def run_pipeline(db_config=None, single_run=False):
+def connect_db(db_config=None):
     # Load environment variables
     load_dotenv()
     
@@ -114,7 +144,7 @@ def run_pipeline(db_config=None, single_run=False):
                 # If imported, we might want to suppress or handle differently.
                 pass 
 
-    sql_db = SQL_DB_Hydration_Price(
+    return SQL_DB_Hydration_Price(
         userName=db_user,
         passWord=db_password,
         dataBase=db_name,
@@ -123,50 +153,57 @@ def run_pipeline(db_config=None, single_run=False):
         host=db_host,
         table_names=db_config.get('table_names') if (db_config and isinstance(db_config, dict)) else None
     )
+
+def collect_once(sql_db, session=None):
+    """
+    One fetch-and-store cycle. Returns False if the batch was skipped (no
+    assets, no prices or failed validation); the caller retries in 30 minutes.
+    Quotes come from the Node SDK, so `session` is not used.
+    """
+    logger.info("Fetching asset prices...")
+    
+    assets = load_assets()
+    if not assets:
+        logger.warning("No assets to process. Retrying in 30 minutes...")
+        return False
+    
+    price_data = fetch_batch_prices([asset['ID'] for asset in assets])
+    if not price_data:
+        logger.error("Failed to fetch batch prices. Retrying in 30 minutes...")
+        return False
+    
+    processed_data = process_prices(assets, price_data)
+
+    # --- Validation ---
+    if not DataValidator.validate_struct(processed_data, {'asset_id', 'symbol', 'price_usdt'}):
+        logger.error("Data validation failed (structure). Skipping batch.")
+        return False
+    if not DataValidator.validate_positive_floats(processed_data, {'price_usdt'}):
+        logger.error("Data validation failed (negative prices). Skipping batch.")
+        return False
+
+    # --- Deduplication ---
+    current_hash = DataValidator.compute_hash(processed_data)
+    last_hash = sql_db.get_last_price_hash()
+
+    if current_hash and current_hash == last_hash:
+        logger.info("Duplicate price data detected. Skipping DB update.")
+    else:
+        batch_id = generate_batch_id()
+        sql_db.update_hydration_prices(processed_data, batch_id, data_hash=current_hash)
+    return True
+
+# Main execution with 30-minute retry interval
+def run_pipeline(db_config=None, single_run=False):
+    sql_db = connect_db(db_config)
     
     try:
         while True:
-            logger.info("Fetching asset prices...")
-            
-            assets = load_assets()
-            if not assets:
-                logger.warning("No assets to process. Retrying in 30 minutes...")
+            if not collect_once(sql_db):
                 if single_run: return
                 time.sleep(1800)  # 30 minutes
                 continue
             
-            # batch_id = int(time.time()) # Moved generation to after deduplication check
-            price_data = fetch_batch_prices()
-            if not price_data:
-                logger.error("Failed to fetch batch prices. Retrying in 30 minutes...")
-                if single_run: return
-                time.sleep(1800)
-                continue
-            
-            processed_data = process_prices(assets, price_data)
-
-            # --- Validation ---
-            if not DataValidator.validate_struct(processed_data, {'asset_id', 'symbol', 'price_usdt'}):
-                logger.error("Data validation failed (structure). Skipping batch.")
-                if single_run: return
-                time.sleep(1800)
-                continue
-            if not DataValidator.validate_positive_floats(processed_data, {'price_usdt'}):
-                logger.error("Data validation failed (negative prices). Skipping batch.")
-                if single_run: return
-                time.sleep(1800)
-                continue
-
-            # --- Deduplication ---
-            current_hash = DataValidator.compute_hash(processed_data)
-            last_hash = sql_db.get_last_price_hash()
-
-            if current_hash and current_hash == last_hash:
-                logger.info("Duplicate price data detected. Skipping DB update.")
-            else:
-                batch_id = generate_batch_id()
-                sql_db.update_hydration_prices(processed_data, batch_id, data_hash=current_hash)
-            
             if single_run:
                 logger.info("Single run completed.")
                 break
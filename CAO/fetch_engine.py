@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# fetch_engine.py
+"""
+Runs the four collectors (Bifrost, Hydration, Hydration prices, StellaSwap)
+as asyncio tasks in one process, instead of one Python + pandas interpreter
+per fetch script.
+
+Every collector module exposes
+    connect_db()                 -> its SQL_DB_* writer
+    collect_once(db, session)    -> one fetch-and-store cycle, False if it failed
+and its own script keeps working standalone (the subprocess model).
+
+The engine opens one shared HTTP client for all collectors:
+utils.create_http_session() with a hard per-host connection limit
+(FETCH_HOST_CONNECTIONS; requests beyond it wait for a free connection) and
+a default timeout on every request (HTTP_TIMEOUT). A cycle runs in a worker
+thread (asyncio.to_thread), since the collectors and their Node / pandas
+steps are blocking; the coroutines only schedule the cycles and sleep
+between them, so a slow or failing collector never delays the others.
+
+Environment (.env) variables:
+  FETCH_ENGINE_COLLECTORS  comma-separated subset of bifrost,hydration,prices,stellaswap (default all)
+  FETCH_HOST_CONNECTIONS   max open connections per host on the shared client (default 16)
+  HTTP_TIMEOUT             per-request timeout in seconds (default 15)
+
+Usage:
+  python fetch_engine.py
+  FETCH_MODE=async python all_data_jobs.py   # orchestrator starts this instead of the four scripts
+"""
+
+import asyncio
+import importlib
+import os
+import signal
+from typing import Dict, NamedTuple, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from logging_config import logger
+from utils import HTTP_TIMEOUT, LivelinessProbe, create_http_session
+
+
+class CollectorSpec(NamedTuple):
+    module: str            # collector module with connect_db() / collect_once()
+    interval: float        # seconds between cycles
+    retry_interval: float  # seconds after a failed cycle; doubles per failure in a row, capped at interval
+
+
+# heartbeat name -> spec; intervals match the loops of the standalone scripts
+COLLECTORS: Dict[str, CollectorSpec] = {
+    "bifrost": CollectorSpec("Bifrost_Data_fetching", 3600, 60),
+    "hydration": CollectorSpec("Hydration_Data_fetching", 3600, 3600),
+    "prices": CollectorSpec("fetch_asset_prices", 3600, 1800),
+    "stellaswap": CollectorSpec("stellaswap_store_raw_data", 3600, 3600),
+}
+
+
+def retry_backoff(spec: CollectorSpec, failures: int) -> float:
+    """Seconds until the next cycle after `failures` failed cycles in a row (0 = last cycle succeeded)."""
+    if not failures:
+        return spec.interval
+    return min(spec.interval, spec.retry_interval * 2 ** (failures - 1))
+
+
+def engine_collectors() -> Sequence[str]:
+    value = os.getenv("FETCH_ENGINE_COLLECTORS", "").strip()
+    names = [n.strip().lower() for n in value.split(",") if n.strip()] if value else list(COLLECTORS)
+    unknown = [n for n in names if n not in COLLECTORS]
+    if unknown:
+        raise ValueError(f"FETCH_ENGINE_COLLECTORS: unknown collector(s) {unknown}, expected {list(COLLECTORS)}")
+    return names
+
+
+class AsyncFetchEngine:
+    """
+    Usage:
+        engine = AsyncFetchEngine(["bifrost", "prices"])
+        asyncio.run(engine.run())          # until engine.stop()
+        asyncio.run(engine.run(cycles=1))  # one cycle of every collector
+    """
+
+    def __init__(self, collectors: Optional[Sequence[str]] = None, host_connections: Optional[int] = None,
+                 timeout: Optional[float] = None, specs: Optional[Dict[str, CollectorSpec]] = None) -> None:
+        self.specs = specs or COLLECTORS
+        self.collectors = list(collectors) if collectors is not None else list(self.specs)
+        self.host_connections = max(1, int(host_connections or os.getenv("FETCH_HOST_CONNECTIONS", 16)))
+        self.timeout = HTTP_TIMEOUT if timeout is None else timeout
+        self.session = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep, returning early when the engine is stopped."""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run_collector(self, name: str, cycles: Optional[int] = None) -> int:
+        """Run one collector's cycles until stopped (or `cycles` done). Returns the successful cycles."""
+        spec = self.specs[name]
+        try:
+            module = await asyncio.to_thread(importlib.import_module, spec.module)
+            db = await asyncio.to_thread(module.connect_db)
+        except Exception as e:
+            logger.error(f"Collector {name} could not start: {e}")
+            return 0
+
+        done = ok_cycles = failures = 0
+        while not self._stop.is_set():
+            try:
+                ok = await asyncio.to_thread(module.collect_once, db, self.session)
+            except Exception as e:
+                logger.exception(f"Collector {name} cycle failed: {e}")
+                ok = False
+            if ok:
+                ok_cycles += 1
+                failures = 0
+                LivelinessProbe.record_heartbeat(name)
+            else:
+                failures += 1
+            done += 1
+            if cycles is not None and done >= cycles:
+                break
+            await self._sleep(retry_backoff(spec, failures))
+        return ok_cycles
+
+    async def run(self, cycles: Optional[int] = None) -> Dict[str, int]:
+        """Run every collector concurrently. Returns {collector: successful cycles}."""
+        self._stop = asyncio.Event()
+        self.session = create_http_session(pool_maxsize=self.host_connections, pool_block=True, timeout=self.timeout)
+        logger.info(f"Fetch engine started: {', '.join(self.collectors)} "
+                    f"({self.host_connections} connections per host, {self.timeout}s timeout)")
+        try:
+            results = await asyncio.gather(*(self.run_collector(n, cycles) for n in self.collectors))
+        finally:
+            self.session.close()
+            self.session = None
+        return dict(zip(self.collectors, results))
+
+
+async def _serve(engine: AsyncFetchEngine) -> None:
+    loop = asyncio.get_running_loop()
+    runner = asyncio.ensure_future(engine.run())
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, engine.stop)
+        except (NotImplementedError, RuntimeError):
+            pass
+    await runner
+
+
+def main():
+    load_dotenv()
+    asyncio.run(_serve(AsyncFetchEngine(engine_collectors())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# http_cache.py
+"""
+Persistent on-disk cache of GET responses for the API fetchers, with
+conditional requests.
+
+For every URL the cache keeps the last body together with its ETag /
+Last-Modified validators and SHA-256. cached_get() sends them as
+If-None-Match / If-Modified-Since:
+
+  304 Not Modified   the cached body is returned, nothing is downloaded
+  200, same bytes    the body is byte-identical to the cached one
+  200, new bytes     a changed body
+
+Either way the result carries `unchanged` (True for the first two), so a
+fetcher whose inputs are all unchanged can skip sanitizing, hashing and
+storing them; parse_once() returns the object parsed from the same body in
+an earlier cycle instead of parsing it again. With commit=False the new body
+is only written to the cache by commit(), i.e. after the caller has stored
+what it parsed from it; a cycle that fails in between sees the body as
+changed again next time.
+
+Entries live in HTTP_CACHE_DIR as <sha256(url)>.json (validators, hash) and
+<sha256(url)>.body, written atomically (temp file + rename). A cache that
+cannot be read or written is ignored and the request is sent unconditionally.
+
+Environment (.env) variables:
+  HTTP_CACHE      1 = conditional requests through the cache (default), 0 = plain GET
+  HTTP_CACHE_DIR  cache directory (default CAO/.cache/http)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import requests
+
+from logging_config import logger
+from utils import HTTP_TIMEOUT
+
+
+def cache_enabled() -> bool:
+    return os.getenv("HTTP_CACHE", "1") != "0"
+
+
+def cache_dir() -> str:
+    return os.getenv("HTTP_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "http")
+
+
+# url -> (body sha256, parsed value) of the last parse_once() per URL in this process
+_parsed: Dict[str, Tuple[str, Any]] = {}
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class CachedResponse:
+    """The parts of requests.Response the fetchers use, plus `unchanged` and commit()."""
+
+    def __init__(self, url: str, content: bytes, headers, unchanged: bool, not_modified: bool,
+                 entry: Optional[Dict[str, Any]] = None, directory: Optional[str] = None) -> None:
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.sha256 = hashlib.sha256(content).hexdigest()
+        self.headers = headers
+        self.unchanged = unchanged
+        self.not_modified = not_modified
+        self._entry = entry
+        self._directory = directory
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def commit(self) -> None:
+        """Write this body and its validators to the cache (no-op if nothing changed)."""
+        entry, self._entry = self._entry, None
+        if entry is None:
+            return
+        key = _key(self.url)
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            _write_atomic(os.path.join(self._directory, key + ".body"), self.content)
+            _write_atomic(os.path.join(self._directory, key + ".json"), json.dumps(entry).encode("utf-8"))
+        except OSError as e:
+            logger.debug(f"HTTP cache write failed for {self.url}: {e}")
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _load(directory: str, url: str):
+    """(entry, body) of a cached URL, or (None, None)."""
+    key = _key(url)
+    try:
+        with open(os.path.join(directory, key + ".json"), "rb") as f:
+            entry = json.loads(f.read())
+        with open(os.path.join(directory, key + ".body"), "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None, None
+    if entry.get("url") != url or hashlib.sha256(body).hexdigest() != entry.get("sha256"):
+        return None, None
+    return entry, body
+
+
+def cached_get(url: str, session=None, timeout: Optional[float] = None, headers=None, commit: bool = True):
+    """
+    GET `url` through the cache. Returns a CachedResponse for 200/304 answers
+    and the plain response for anything else (errors are not cached).
+    """
+    timeout = HTTP_TIMEOUT if timeout is None else timeout
+    client = session or requests
+    if not cache_enabled():
+        return client.get(url, headers=headers, timeout=timeout)
+
+    directory = cache_dir()
+    entry, body = _load(directory, url)
+    request_headers = dict(headers or {})
+    if entry:
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = client.get(url, headers=request_headers or None, timeout=timeout)
+    status = getattr(response, "status_code", None)
+    if status == 304 and entry:
+        return CachedResponse(url, body, response.headers, unchanged=True, not_modified=True)
+    content = getattr(response, "content", None)
+    if status != 200 or not isinstance(content, bytes):
+        return response
+
+    digest = hashlib.sha256(content).hexdigest()
+    new_entry = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": digest,
+    }
+    unchanged = entry is not None and entry.get("sha256") == digest
+    if unchanged and entry.get("etag") == new_entry["etag"] and entry.get("last_modified") == new_entry["last_modified"]:
+        new_entry = None  # same body, same validators: nothing to write
+    result = CachedResponse(url, content, response.headers, unchanged=unchanged, not_modified=False,
+                            entry=new_entry, directory=directory)
+    if commit:
+        result.commit()
+    return result
+
+
+def parse_once(response, parse: Callable[[Any], Any]) -> Any:
+    """
+    parse(response.json()), reusing the result of an earlier call for the same
+    URL and body. The returned object is shared between calls: do not modify it.
+    """
+    if not isinstance(response, CachedResponse):
+        return parse(response.json())
+    hit = _parsed.get(response.url)
+    if hit is not None and hit[0] == response.sha256:
+        return hit[1]
+    value = parse(response.json())
+    _parsed[response.url] = (response.sha256, value)
+    return value
+
+
+def all_unchanged(responses: Iterable[Any]) -> bool:
+    """True if every response came from cached_get and matches the cached body."""
+    return all(getattr(r, "unchanged", False) is True for r in responses)
+
+
+def commit_all(responses: Iterable[Any]) -> None:
+    for r in responses:
+        if isinstance(r, CachedResponse):
+            r.commit()
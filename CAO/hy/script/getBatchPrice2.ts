@@ -1,5 +1,6 @@
 import { ApiPromise, WsProvider } from '@polkadot/api';
 import { TradeRouter, PoolService, EvmClient } from '@galacticcouncil/sdk';
+import { mapWithConcurrency, withTimeout } from './getTop35Apr3';
 
 // 1) Force any accidental console.log to go to stderr
 // const origLog = console.log;
@@ -7,34 +8,69 @@ import { TradeRouter, PoolService, EvmClient } from '@galacticcouncil/sdk';
 
 // (keep console.warn / console.error as they already go to stderr)
 
-async function getBatchPrices() {
-  const wsProvider = new WsProvider('wss://hydration-rpc.n.dwellir.com'); // WSS endpoint
-  const api = await ApiPromise.create({ provider: wsProvider });
-
-  const poolService = new PoolService(api, new EvmClient(api));
-  await poolService.syncRegistry();
-  const tradeRouter = new TradeRouter(poolService);
+export const PRICE_RPC_URL = 'wss://hydration-rpc.n.dwellir.com'; // WSS endpoint
+export const USDT_ID = '10'; // USDT (6 decimals)
+export const DEFAULT_ASSET_IDS = Array.from({ length: 31 }, (_, i) => i.toString()); // 0..30
+export const DEFAULT_CONCURRENCY = 8;
+export const DEFAULT_QUOTE_TIMEOUT_MS = 20_000;
 
-  const assetIds = Array.from({ length: 31 }, (_, i) => i.toString()); // 0..30
-  const results: { assetId: string; price: number }[] = [];
-  const usdtId = '10'; // USDT (6 decimals)
+export type AssetPrice = { assetId: string; price: number };
 
-  for (const assetId of assetIds) {
-    if (assetId === usdtId) {
+// Quote every asset against USDT on an already synced router (shared with worker.ts).
+// Up to `concurrency` quotes are in flight; a quote slower than `timeoutMs` is dropped.
+// Results keep the order of `assetIds`.
+export async function quotePrices(
+  tradeRouter: TradeRouter,
+  assetIds: string[],
+  concurrency: number = DEFAULT_CONCURRENCY,
+  timeoutMs: number = DEFAULT_QUOTE_TIMEOUT_MS
+): Promise<AssetPrice[]> {
+  const quotes = await mapWithConcurrency(assetIds, Math.max(1, concurrency), async (assetId): Promise<AssetPrice | null> => {
+    if (assetId === USDT_ID) {
       console.error(`Skipping ${assetId} (USDT). Price=1`);
-      results.push({ assetId, price: 1 });
-      continue;
+      return { assetId, price: 1 };
     }
     try {
-      const trade = await tradeRouter.getBestSell(assetId, usdtId, '1'); // sell 1 unit -> USDT
+      const trade = await withTimeout(
+        tradeRouter.getBestSell(assetId, USDT_ID, '1'), // sell 1 unit -> USDT
+        timeoutMs,
+        `getBestSell(${assetId})`
+      );
       const priceRaw = trade.amountOut.toNumber();
       const price = priceRaw / 1_000_000; // USDT has 6 decimals
-      if (price > 0) results.push({ assetId, price });
-      else console.error(`Invalid price for ${assetId}: ${price}`);
+      if (price > 0) return { assetId, price };
+      console.error(`Invalid price for ${assetId}: ${price}`);
     } catch (e: any) {
       console.error(`No path for ${assetId}: ${e?.message || e}`);
     }
-  }
+    return null;
+  });
+  return quotes.filter((q): q is AssetPrice => q !== null);
+}
+
+// ---------------------- CLI ----------------------
+// npx tsx getBatchPrice2.ts [--ids 0,5,10] [--concurrency 8] [--timeout 20000]
+function pickFlag(args: string[], name: string, fallback: string) {
+  const idx = args.findIndex(a => a === `--${name}`);
+  if (idx >= 0 && args[idx + 1]) return args[idx + 1];
+  return fallback;
+}
+
+async function getBatchPrices() {
+  const args = process.argv.slice(2);
+  const idsFlag = pickFlag(args, 'ids', '');
+  const assetIds = idsFlag ? idsFlag.split(',').map(id => id.trim()).filter(Boolean) : DEFAULT_ASSET_IDS;
+  const concurrency = parseInt(pickFlag(args, 'concurrency', String(DEFAULT_CONCURRENCY)), 10);
+  const timeoutMs = Math.max(1_000, parseInt(pickFlag(args, 'timeout', String(DEFAULT_QUOTE_TIMEOUT_MS)), 10));
+
+  const wsProvider = new WsProvider(PRICE_RPC_URL);
+  const api = await ApiPromise.create({ provider: wsProvider });
+
+  const poolService = new PoolService(api, new EvmClient(api));
+  await poolService.syncRegistry();
+  const tradeRouter = new TradeRouter(poolService);
+
+  const results = await quotePrices(tradeRouter, assetIds, concurrency, timeoutMs);
 
   poolService.destroy()
   await api.disconnect();
@@ -43,11 +79,13 @@ async function getBatchPrices() {
   process.stdout.write(JSON.stringify(results) + '\n');
 }
 
-getBatchPrices().then(()=>{
-  process.exit(0)
-}).catch(err => {
-  // Send errors to stderr as JSON (still not polluting stdout)
-  // process.stderr.write(JSON.stringify({ error: String(err?.message || err) }) + '\n');
-  // process.exit(1);
-});
-
+// Run only when executed directly (npx tsx getBatchPrice2.ts), not when imported by worker.ts
+if (require.main === module) {
+  getBatchPrices().then(()=>{
+    process.exit(0)
+  }).catch(err => {
+    // Send errors to stderr as JSON (still not polluting stdout)
+    // process.stderr.write(JSON.stringify({ error: String(err?.message || err) }) + '\n');
+    // process.exit(1);
+  });
+}
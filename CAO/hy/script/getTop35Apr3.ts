@@ -7,33 +7,14 @@ import { FarmClient } from '@galacticcouncil/sdk';
 import * as fs from 'fs';
 import * as path from 'path';
 
-// ---------------------- CLI ----------------------
-const args = process.argv.slice(2);
-const outPath = args[0];
-
-if (!outPath) {
-  console.error('❌ Please provide an output path as the first argument.\n   Example: npx tsx getFarmApr.ts ./output/farm_apr.json');
-  process.exit(1);
-}
-
-function pickFlag(name: string, fallback?: string) {
-  const idx = args.findIndex(a => a === `--${name}`);
-  if (idx >= 0 && args[idx + 1]) return args[idx + 1];
-  return fallback;
-}
-
-const RPC_URL = pickFlag('rpc', 'wss://rpc.helikon.io/hydradx')!;
-const ID_FROM = parseInt(pickFlag('from', '1')!, 10);
-const ID_TO = parseInt(pickFlag('to', '35')!, 10);
-const CONCURRENCY = Math.max(1, parseInt(pickFlag('concurrency', '6')!, 10)); // 5-8 is a good range
-const PER_CALL_TIMEOUT_MS = Math.max(1_000, parseInt(pickFlag('timeout', '20000')!, 10)); // 20s default
+export const APR_RPC_URL = 'wss://rpc.helikon.io/hydradx';
 
 // ------------------ Small utils ------------------
-function sleep(ms: number) {
+export function sleep(ms: number) {
   return new Promise(res => setTimeout(res, ms));
 }
 
-async function withTimeout<T>(p: Promise<T>, ms: number, tag: string): Promise<T> {
+export async function withTimeout<T>(p: Promise<T>, ms: number, tag: string): Promise<T> {
   let t: NodeJS.Timeout | undefined;
   const timeout = new Promise<never>((_, rej) => {
     t = setTimeout(() => rej(new Error(`Timeout after ${ms}ms (${tag})`)), ms);
@@ -46,7 +27,7 @@ async function withTimeout<T>(p: Promise<T>, ms: number, tag: string): Promise<T
   }
 }
 
-async function mapWithConcurrency<T, R>(
+export async function mapWithConcurrency<T, R>(
   items: T[],
   limit: number,
   fn: (item: T, i: number) => Promise<R>
@@ -64,8 +45,60 @@ async function mapWithConcurrency<T, R>(
   return ret;
 }
 
+// Fetch farm APRs for `ids` with bounded concurrency on an existing client (shared with worker.ts)
+export async function fetchFarmAprs(
+  farmClient: FarmClient,
+  ids: string[],
+  concurrency: number,
+  perCallTimeoutMs: number
+): Promise<Record<string, any>> {
+  const results: Record<string, any> = {};
+
+  await mapWithConcurrency(ids, concurrency, async (id) => {
+    const tag = `getFarmApr(id=${id})`;
+    try {
+      const apr = await withTimeout(
+        farmClient.getFarmApr(id, 'omnipool'),
+        perCallTimeoutMs,
+        tag
+      );
+      results[id] = apr;
+      // Optional: tiny delay to avoid burst limits
+      await sleep(25);
+    } catch (err: any) {
+      const msg = err?.message ?? String(err);
+      results[id] = { error: msg };
+      // brief backoff on errors to be polite with the RPC node
+      await sleep(100);
+    }
+  });
+  return results;
+}
+
+// ---------------------- CLI ----------------------
+function pickFlag(args: string[], name: string, fallback?: string) {
+  const idx = args.findIndex(a => a === `--${name}`);
+  if (idx >= 0 && args[idx + 1]) return args[idx + 1];
+  return fallback;
+}
+
 // ------------------ Main script ------------------
-(async () => {
+// Run only when executed directly (npx tsx getTop35Apr3.ts ...), not when imported by worker.ts
+if (require.main === module) (async () => {
+  const args = process.argv.slice(2);
+  const outPath = args[0];
+
+  if (!outPath) {
+    console.error('❌ Please provide an output path as the first argument.\n   Example: npx tsx getFarmApr.ts ./output/farm_apr.json');
+    process.exit(1);
+  }
+
+  const RPC_URL = pickFlag(args, 'rpc', APR_RPC_URL)!;
+  const ID_FROM = parseInt(pickFlag(args, 'from', '1')!, 10);
+  const ID_TO = parseInt(pickFlag(args, 'to', '35')!, 10);
+  const CONCURRENCY = Math.max(1, parseInt(pickFlag(args, 'concurrency', '6')!, 10)); // 5-8 is a good range
+  const PER_CALL_TIMEOUT_MS = Math.max(1_000, parseInt(pickFlag(args, 'timeout', '20000')!, 10)); // 20s default
+
   let api: ApiPromise | undefined;
   const resolvedPath = path.resolve(outPath);
 
@@ -95,28 +128,9 @@ async function mapWithConcurrency<T, R>(
     }
     const ids = Array.from({ length: ID_TO - ID_FROM + 1 }, (_, k) => String(ID_FROM + k));
 
-    const results: Record<string, any> = {};
-
     // Fetch in parallel with bounded concurrency
     console.log(`➡️  Fetching APRs for IDs ${ID_FROM}..${ID_TO} with concurrency=${CONCURRENCY}, timeout=${PER_CALL_TIMEOUT_MS}ms`);
-    await mapWithConcurrency(ids, CONCURRENCY, async (id) => {
-      const tag = `getFarmApr(id=${id})`;
-      try {
-        const apr = await withTimeout(
-          farmClient.getFarmApr(id, 'omnipool'),
-          PER_CALL_TIMEOUT_MS,
-          tag
-        );
-        results[id] = apr;
-        // Optional: tiny delay to avoid burst limits
-        await sleep(25);
-      } catch (err: any) {
-        const msg = err?.message ?? String(err);
-        results[id] = { error: msg };
-        // brief backoff on errors to be polite with the RPC node
-        await sleep(100);
-      }
-    });
+    const results = await fetchFarmAprs(farmClient, ids, CONCURRENCY, PER_CALL_TIMEOUT_MS);
 
     // Write file
     fs.mkdirSync(path.dirname(resolvedPath), { recursive: true });
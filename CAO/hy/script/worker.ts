@@ -0,0 +1,160 @@
+// worker.ts
+// Long-lived price / farm APR worker for the Python fetchers (CAO/node_worker.py).
+// Keeps the WebSocket APIs, the PoolService registry and the FarmClient warm
+// between cycles instead of paying TypeScript compile + connect + syncRegistry
+// on every `npx tsx getBatchPrice2.ts` / `getTop35Apr3.ts` spawn.
+//
+// Protocol: JSON lines. One request per line on stdin:
+//   {"id": 1, "method": "prices", "params": {"assetIds": ["0", "5", "10"], "concurrency": 8, "timeout": 20000}}
+//   {"id": 2, "method": "farmApr", "params": {"from": 1, "to": 35, "concurrency": 6, "timeout": 20000}}
+//   {"id": 3, "method": "ping"}
+// One response per request on stdout (completion order, matched by id):
+//   {"id": 1, "result": [...]}   or   {"id": 1, "error": "message"}
+// Logs go to stderr only. The worker exits when stdin is closed.
+//
+// Usage:
+//   npx tsx worker.ts [--price-rpc wss://...] [--apr-rpc wss://...] [--registry-ttl 600000]
+
+import { ApiPromise, WsProvider } from '@polkadot/api';
+import { TradeRouter, PoolService, EvmClient, FarmClient } from '@galacticcouncil/sdk';
+import * as readline from 'readline';
+import {
+  PRICE_RPC_URL, DEFAULT_ASSET_IDS, DEFAULT_CONCURRENCY, DEFAULT_QUOTE_TIMEOUT_MS, quotePrices,
+} from './getBatchPrice2';
+import { APR_RPC_URL, fetchFarmAprs } from './getTop35Apr3';
+
+// stdout carries protocol lines only
+console.log = (...args: any[]) => process.stderr.write(args.join(' ') + '\n');
+
+const args = process.argv.slice(2);
+function pickFlag(name: string, fallback: string) {
+  const idx = args.findIndex(a => a === `--${name}`);
+  if (idx >= 0 && args[idx + 1]) return args[idx + 1];
+  return fallback;
+}
+
+const PRICE_RPC = pickFlag('price-rpc', PRICE_RPC_URL);
+const APR_RPC = pickFlag('apr-rpc', APR_RPC_URL);
+// re-sync the pool registry before a quote when it is older than this
+const REGISTRY_TTL_MS = parseInt(pickFlag('registry-ttl', '600000'), 10);
+
+// ------------------ Warm state ------------------
+type PriceContext = { api: ApiPromise; poolService: PoolService; tradeRouter: TradeRouter; syncedAt: number };
+type AprContext = { api: ApiPromise; farmClient: FarmClient };
+
+let priceContext: Promise<PriceContext> | undefined;
+let aprContext: Promise<AprContext> | undefined;
+
+async function createPriceContext(): Promise<PriceContext> {
+  const api = await ApiPromise.create({ provider: new WsProvider(PRICE_RPC) });
+  const poolService = new PoolService(api, new EvmClient(api));
+  await poolService.syncRegistry();
+  console.error(`Price context ready (${PRICE_RPC})`);
+  return { api, poolService, tradeRouter: new TradeRouter(poolService), syncedAt: Date.now() };
+}
+
+async function createAprContext(): Promise<AprContext> {
+  const api = await ApiPromise.create({ provider: new WsProvider(APR_RPC, 1024) });
+  await api.isReady;
+  console.error(`APR context ready (${APR_RPC})`);
+  return { api, farmClient: new FarmClient(api) };
+}
+
+async function getPriceContext(): Promise<PriceContext> {
+  if (!priceContext) {
+    priceContext = createPriceContext();
+    // a failed start is retried by the next request
+    priceContext.catch(() => { priceContext = undefined; });
+  }
+  const ctx = await priceContext;
+  if (Date.now() - ctx.syncedAt > REGISTRY_TTL_MS) {
+    await ctx.poolService.syncRegistry();
+    ctx.syncedAt = Date.now();
+  }
+  return ctx;
+}
+
+async function getAprContext(): Promise<AprContext> {
+  if (!aprContext) {
+    aprContext = createAprContext();
+    aprContext.catch(() => { aprContext = undefined; });
+  }
+  return aprContext;
+}
+
+// ------------------ Methods ------------------
+const methods: Record<string, (params: any) => Promise<any>> = {
+  async ping() {
+    return 'pong';
+  },
+
+  async prices(params) {
+    const assetIds: string[] = (params?.assetIds ?? DEFAULT_ASSET_IDS).map(String);
+    const concurrency = Math.max(1, parseInt(String(params?.concurrency ?? DEFAULT_CONCURRENCY), 10));
+    const timeout = Math.max(1_000, parseInt(String(params?.timeout ?? DEFAULT_QUOTE_TIMEOUT_MS), 10));
+    const { tradeRouter } = await getPriceContext();
+    return quotePrices(tradeRouter, assetIds, concurrency, timeout);
+  },
+
+  async farmApr(params) {
+    const from = parseInt(String(params?.from ?? 1), 10);
+    const to = parseInt(String(params?.to ?? 35), 10);
+    if (Number.isNaN(from) || Number.isNaN(to) || from > to) {
+      throw new Error(`Invalid id range: from=${from} to=${to}`);
+    }
+    const concurrency = Math.max(1, parseInt(String(params?.concurrency ?? 6), 10));
+    const timeout = Math.max(1_000, parseInt(String(params?.timeout ?? 20000), 10));
+    const ids = Array.from({ length: to - from + 1 }, (_, k) => String(from + k));
+    const { farmClient } = await getAprContext();
+    return fetchFarmAprs(farmClient, ids, concurrency, timeout);
+  },
+};
+
+function respond(message: object) {
+  process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function handle(line: string) {
+  let request: any;
+  try {
+    request = JSON.parse(line);
+  } catch {
+    respond({ id: null, error: `Invalid JSON request: ${line.slice(0, 200)}` });
+    return;
+  }
+  const method = methods[request?.method];
+  if (!method) {
+    respond({ id: request?.id ?? null, error: `Unknown method: ${request?.method}` });
+    return;
+  }
+  try {
+    respond({ id: request.id, result: await method(request.params) });
+  } catch (err: any) {
+    respond({ id: request.id, error: String(err?.message ?? err) });
+  }
+}
+
+async function shutdown(code: number) {
+  for (const ctx of [priceContext, aprContext]) {
+    try {
+      const c: any = await ctx;
+      c?.poolService?.destroy();
+      await c?.api.disconnect();
+    } catch {}
+  }
+  process.exit(code);
+}
+
+process.on('unhandledRejection', (e: any) => {
+  console.error('UnhandledRejection:', e?.message ?? e);
+  process.exit(1); // the Python side restarts the worker
+});
+process.on('SIGTERM', () => shutdown(0));
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+rl.on('line', line => {
+  if (line.trim()) handle(line);
+});
+rl.on('close', () => shutdown(0));
+
+console.error('Worker ready');
@@ -0,0 +1,55 @@
+# latest_batch.py
+"""
+latest_batch registry: one row per source table pointing at the batch that
+was written to it last.
+
+    source      table name (hydration_data, pool_data, Hydration_price,
+                Bifrost_site_table, Bifrost_staking_table)   PRIMARY KEY
+    batch_id    newest batch of that table
+    created_at  when the batch was committed
+    row_count   rows in the batch
+    data_hash   content hash of the batch, if the writer computed one
+
+The SQL_DB_* writers upsert their row in the same transaction as the batch
+insert, so the registry never points at a batch that was rolled back. The
+merge / combine jobs resolve every source's current batch with a single
+primary-key read instead of an ORDER BY created_at DESC sort per table.
+
+The table is created by db_migration/migration_3.py (which also backfills
+it from the existing data) and by the writers' initialize_tables().
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bulk_writer import BulkWriter
+
+LATEST_BATCH_TABLE = "latest_batch"
+
+CREATE_LATEST_BATCH_SQL = f"""
+CREATE TABLE IF NOT EXISTS {LATEST_BATCH_TABLE} (
+    source VARCHAR(64) NOT NULL PRIMARY KEY,
+    batch_id BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    row_count INT,
+    data_hash VARCHAR(64)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+SELECT_LATEST_BATCHES_SQL = f"SELECT source, batch_id, created_at, data_hash FROM {LATEST_BATCH_TABLE}"
+
+# upsert: a new batch replaces the source's previous row (created_at follows via ON UPDATE)
+registry_writer = BulkWriter(LATEST_BATCH_TABLE, ("source", "batch_id", "row_count", "data_hash"),
+                             update_columns=("batch_id", "row_count", "data_hash"))
+
+
+def registry_rows(row_counts: Dict[str, int], batch_id, data_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Registry records for the sources of one batch ({table: row_count}); empty tables are skipped."""
+    return [
+        {"source": source, "batch_id": batch_id, "row_count": count, "data_hash": data_hash}
+        for source, count in row_counts.items() if count
+    ]
+
+
+def batches_by_source(rows: Iterable[Tuple[Any, Any, Any, Any]]) -> Dict[str, Tuple[Any, Any, Any]]:
+    """SELECT_LATEST_BATCHES_SQL rows -> {source: (batch_id, created_at, data_hash)}."""
+    return {source: (batch_id, created_at, data_hash) for source, batch_id, created_at, data_hash in rows}
@@ -0,0 +1,195 @@
+# node_worker.py
+"""
+Client for the long-lived Node worker (hy/script/worker.ts) that serves the
+Hydration price quotes and farm APRs.
+
+Instead of spawning `npx tsx getBatchPrice2.ts` / `getTop35Apr3.ts` every
+cycle (TypeScript compile + WebSocket connect + poolService.syncRegistry()),
+one worker process is started on first use and kept running; it holds the
+API connections and the pool registry warm between cycles.
+
+Protocol: JSON lines over the worker's stdin/stdout.
+  -> {"id": 1, "method": "prices", "params": {"assetIds": ["0", "5"]}}
+  <- {"id": 1, "result": [{"assetId": "0", "price": 0.01}, ...]}
+  <- {"id": 1, "error": "message"}
+The worker's stderr is forwarded to the log at debug level.
+
+If the worker has exited (crash, killed, stdin closed) the next call starts
+a new one. A call that times out kills the worker, so a wedged process is
+never reused.
+
+Environment (.env) variables:
+  HYDRATION_NODE_WORKER     1 = use the persistent worker, 0 = spawn a script per cycle (default 0)
+  HYDRATION_WORKER_TIMEOUT  seconds to wait for one response (default 300)
+
+Usage:
+  if worker_enabled():
+      prices = get_worker().call("prices", {"assetIds": ["0", "5"]})
+"""
+
+import atexit
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+from typing import Any, List, Optional
+
+from logging_config import logger
+
+CAO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WORKER_CMD = ["npx", "tsx", os.path.join("hy", "script", "worker.ts")]
+DEFAULT_REQUEST_TIMEOUT = 300.0
+
+_EOF = object()
+
+
+class NodeWorkerError(Exception):
+    pass
+
+
+def worker_enabled() -> bool:
+    """Read per call so a .env loaded after import is honoured."""
+    return os.getenv("HYDRATION_NODE_WORKER", "0").strip().lower() in ("1", "true", "yes")
+
+
+class NodeWorker:
+    def __init__(self, cmd: Optional[List[str]] = None, cwd: Optional[str] = None,
+                 request_timeout: Optional[float] = None) -> None:
+        self.cmd = list(cmd or DEFAULT_WORKER_CMD)
+        self.cwd = cwd or CAO_DIR
+        self.request_timeout = float(
+            request_timeout or os.getenv("HYDRATION_WORKER_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)
+        )
+        self._proc: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        # statistics
+        self.starts = 0
+        self.requests = 0
+
+    # ---------- process lifecycle ----------
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _start(self) -> None:
+        if self._proc is not None:
+            logger.warning(f"Node worker exited with code {self._proc.poll()}, restarting")
+        self._responses = queue.Queue()
+        self._proc = subprocess.Popen(
+            self.cmd,
+            cwd=self.cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self.starts += 1
+        logger.info(f"Started Node worker (pid {self._proc.pid}): {' '.join(self.cmd)}")
+        threading.Thread(target=self._read_stdout, args=(self._proc, self._responses), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(self._proc,), daemon=True).start()
+
+    @staticmethod
+    def _read_stdout(proc, responses) -> None:
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                responses.put(json.loads(line))
+            except ValueError:
+                logger.warning(f"Ignoring non-JSON worker output: {line[:200]}")
+        responses.put(_EOF)
+
+    @staticmethod
+    def _read_stderr(proc) -> None:
+        for line in proc.stderr:
+            logger.debug(f"[node worker] {line.rstrip()}")
+
+    def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=5)
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Stop the worker: close stdin so it shuts down cleanly, kill it if it does not."""
+        with self._lock:
+            proc, self._proc = self._proc, None
+            if proc is None:
+                return
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=5)
+            except Exception:
+                proc.kill()
+
+    # ---------- requests ----------
+    def call(self, method: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> Any:
+        """
+        Send one request and wait for its result. Raises NodeWorkerError on a
+        worker-side error, a crash or a timeout (the worker is then restarted
+        by the next call).
+        """
+        timeout = float(timeout or self.request_timeout)
+        with self._lock:
+            if not self.alive:
+                self._start()
+            request_id = next(self._ids)
+            self.requests += 1
+            try:
+                self._proc.stdin.write(json.dumps({"id": request_id, "method": method, "params": params or {}}) + "\n")
+                self._proc.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self._kill()
+                raise NodeWorkerError(f"Node worker is not accepting requests: {e}")
+
+            while True:
+                try:
+                    message = self._responses.get(timeout=timeout)
+                except queue.Empty:
+                    self._kill()
+                    raise NodeWorkerError(f"Node worker timed out after {timeout}s on '{method}'")
+                if message is _EOF:
+                    code = self._proc.wait() if self._proc else None
+                    raise NodeWorkerError(f"Node worker exited with code {code} during '{method}'")
+                if not isinstance(message, dict) or message.get("id") != request_id:
+                    logger.warning(f"Ignoring unexpected worker response: {str(message)[:200]}")
+                    continue
+                if "error" in message:
+                    raise NodeWorkerError(f"Node worker '{method}' failed: {message['error']}")
+                return message.get("result")
+
+
+_worker: Optional[NodeWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_worker() -> NodeWorker:
+    """Return the shared worker client; the process itself starts on the first call()."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = NodeWorker()
+        return _worker
+
+
+def shutdown_worker() -> None:
+    """Stop the shared worker (registered with atexit)."""
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.close()
+
+
+atexit.register(shutdown_worker)
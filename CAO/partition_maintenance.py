@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# partition_maintenance.py
+"""
+Monthly RANGE partitions for the append-only fact tables, and the job that
+keeps them rolling.
+
+Every table in PARTITIONED_TABLES is partitioned on UNIX_TIMESTAMP() of its
+insert timestamp (created_at; inserted_at for full_table):
+
+    p_history   everything before the month the table was partitioned in
+    pYYYYMM     one partition per month
+    pmax        catch-all (VALUES LESS THAN MAXVALUE), kept empty by the job
+
+MySQL requires the partition column in every unique key, so the primary key
+becomes (<old key>, <time column>).
+
+db_migration/migration_6.py partitions the existing tables. run_once() (run
+daily by all_data_jobs.JobOrchestrator, or by hand with
+`python partition_maintenance.py`) then
+  - partitions listed tables that are not partitioned yet (e.g. created
+    after the migration ran),
+  - adds the monthly partitions PARTITION_MONTHS_AHEAD months ahead by
+    splitting the empty pmax,
+  - drops (or archives) the partitions of months older than
+    PARTITION_RETENTION_MONTHS, which is a metadata operation instead of a
+    DELETE over millions of rows.
+
+In archive mode a partition is swapped out with EXCHANGE PARTITION into its
+own table <table>_archive_pYYYYMM before it is dropped; a rerun after an
+interrupted archive finds that table and finishes the job without exchanging
+archived rows back. multipleFACT
+partitions that still hold the keyframe of a newer compressed snapshot (see
+payload_codec.py) are kept, together with their multipleFACT_asset rows,
+until no newer snapshot needs them.
+
+Environment (.env) variables:
+  PARTITION_MONTHS_AHEAD       future monthly partitions to keep ready (default 3)
+  PARTITION_RETENTION_MONTHS   months to keep; 0 keeps everything (default 0)
+  PARTITION_RETENTION_MODE     drop or archive (default drop)
+"""
+
+import datetime
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from db_pool import get_pool
+from logging_config import logger
+
+# table -> (primary key columns before partitioning, partition time column)
+PARTITIONED_TABLES: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "hydration_data": (("id",), "created_at"),
+    "pool_data": (("id",), "created_at"),
+    "Hydration_price": (("id",), "created_at"),
+    "Bifrost_site_table": (("auto_id",), "created_at"),
+    "Bifrost_staking_table": (("id",), "created_at"),
+    "full_table": (("id",), "inserted_at"),
+    "multipleFACT": (("id",), "created_at"),
+    "multipleFACT_asset": (("snapshot_id", "section", "row_no"), "created_at"),
+}
+
+# partitions of these tables expire together with the same month of the other table
+EXPIRE_WITH = {"multipleFACT_asset": "multipleFACT"}
+
+HISTORY_PARTITION = "p_history"
+MAX_PARTITION = "pmax"
+_MONTH_RE = re.compile(r"^p(\d{4})(\d{2})$")
+
+
+def month_start(d: datetime.date) -> datetime.date:
+    return datetime.date(d.year, d.month, 1)
+
+
+def add_months(d: datetime.date, n: int) -> datetime.date:
+    m = d.year * 12 + d.month - 1 + n
+    return datetime.date(m // 12, m % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime.date]:
+    """Month a pYYYYMM partition holds, None for p_history / pmax."""
+    m = _MONTH_RE.match(name or "")
+    return datetime.date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def month_partitions_sql(months: List[datetime.date]) -> List[str]:
+    return [
+        f"PARTITION {partition_name(m)} VALUES LESS THAN (UNIX_TIMESTAMP('{add_months(m, 1)} 00:00:00'))"
+        for m in months
+    ]
+
+
+def partition_table_sql(table: str, today: datetime.date, months_ahead: int) -> str:
+    """ALTER TABLE that switches `table` to monthly partitions (see module docstring)."""
+    keys, column = PARTITIONED_TABLES[table]
+    first = month_start(today)
+    parts = [f"PARTITION {HISTORY_PARTITION} VALUES LESS THAN (UNIX_TIMESTAMP('{first} 00:00:00'))"]
+    parts += month_partitions_sql([add_months(first, i) for i in range(months_ahead + 1)])
+    parts.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN MAXVALUE")
+    return (
+        f"ALTER TABLE {table}\n"
+        f"  MODIFY {column} TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,\n"
+        f"  DROP PRIMARY KEY,\n"
+        f"  ADD PRIMARY KEY ({', '.join(keys)}, {column})\n"
+        f"PARTITION BY RANGE (UNIX_TIMESTAMP({column})) (\n  " + ",\n  ".join(parts) + "\n)"
+    )
+
+
+class PartitionMaintainer:
+    """
+    Usage:
+        PartitionMaintainer(user, password, host, database, port).run_once()
+    """
+
+    def __init__(self, user, password, host, database, port, months_ahead=None,
+                 retention_months=None, retention_mode=None):
+        self.user = user
+        self.password = password
+        self.host = host
+        self.database = database
+        self.port = port
+        self.months_ahead = int(os.getenv("PARTITION_MONTHS_AHEAD", 3)) if months_ahead is None else months_ahead
+        self.retention_months = int(os.getenv("PARTITION_RETENTION_MONTHS", 0)) \
+            if retention_months is None else retention_months
+        self.retention_mode = (retention_mode or os.getenv("PARTITION_RETENTION_MODE", "drop")).lower()
+        if self.retention_mode not in ("drop", "archive"):
+            raise ValueError("PARTITION_RETENTION_MODE must be drop or archive")
+
+    def _pool(self):
+        return get_pool(self.user, self.password, self.host, self.database, self.port)
+
+    # ---------- Inspection ----------
+    @staticmethod
+    def partitions(cur, table) -> Optional[List[str]]:
+        """Partition names in order; [] if the table is not partitioned, None if it does not exist."""
+        cur.execute(
+            "SELECT PARTITION_NAME FROM INFORMATION_SCHEMA.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY PARTITION_ORDINAL_POSITION",
+            (table,),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return None
+        return [r[0] for r in rows if r[0] is not None]
+
+    # ---------- Maintenance steps ----------
+    def add_future_partitions(self, cur, table, names, today) -> List[str]:
+        """Split pmax into the missing months up to today + months_ahead. Returns the added names."""
+        months = [m for m in map(partition_month, names) if m]
+        last = max(months) if months else add_months(month_start(today), -1)
+        target = add_months(month_start(today), self.months_ahead)
+        new = []
+        m = add_months(last, 1)
+        while m <= target:
+            new.append(m)
+            m = add_months(m, 1)
+        if not new or MAX_PARTITION not in names:
+            return []
+        parts = month_partitions_sql(new) + [f"PARTITION {MAX_PARTITION} VALUES LESS THAN MAXVALUE"]
+        cur.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {MAX_PARTITION} INTO (" + ", ".join(parts) + ")")
+        return [partition_name(m) for m in new]
+
+    def expired(self, names, today) -> List[str]:
+        """Partitions holding only months before the retention cutoff."""
+        if self.retention_months <= 0:
+            return []
+        cutoff = add_months(month_start(today), -self.retention_months)
+        out = []
+        for i, name in enumerate(names):
+            month = partition_month(name)
+            if month is not None:
+                if month < cutoff:
+                    out.append(name)
+            elif name == HISTORY_PARTITION:
+                # p_history ends where the first monthly partition starts
+                following = [partition_month(n) for n in names[i + 1:] if partition_month(n)]
+                if following and following[0] <= cutoff:
+                    out.append(name)
+        return out
+
+    def keyframe_needed(self, cur, name) -> bool:
+        """Whether a newer multipleFACT row is a delta against a keyframe in partition `name`."""
+        cur.execute(f"SELECT MAX(id) FROM multipleFACT PARTITION ({name})")
+        row = cur.fetchone()
+        if not row or row[0] is None:
+            return False
+        cur.execute("SELECT 1 FROM multipleFACT WHERE id > %s AND base_id <= %s LIMIT 1", (row[0], row[0]))
+        return cur.fetchone() is not None
+
+    @staticmethod
+    def _has_rows(cur, source) -> bool:
+        cur.execute(f"SELECT 1 FROM {source} LIMIT 1")
+        return cur.fetchone() is not None
+
+    def remove_partition(self, cur, table, name) -> bool:
+        """Drop (or archive, then drop) partition `name`. Returns False if it was kept."""
+        if self.retention_mode == "archive":
+            archive = f"{table}_archive_{name}"
+            archive_partitions = self.partitions(cur, archive)
+            if archive_partitions is None:
+                cur.execute(f"CREATE TABLE IF NOT EXISTS {archive} LIKE {table}")
+                cur.execute(f"ALTER TABLE {archive} REMOVE PARTITIONING")
+                cur.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive}")
+            else:
+                # rerun after an interrupted archive: finish it without swapping archived rows back
+                if archive_partitions:
+                    cur.execute(f"ALTER TABLE {archive} REMOVE PARTITIONING")
+                if not self._has_rows(cur, archive):
+                    cur.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive}")
+                elif self._has_rows(cur, f"{table} PARTITION ({name})"):
+                    logger.error(f"Keeping {table} partition {name}: {archive} already holds other rows")
+                    return False
+                else:
+                    logger.info(f"{table} partition {name} already archived in {archive}")
+        cur.execute(f"ALTER TABLE {table} DROP PARTITION {name}")
+        return True
+
+    # ---------- High-level API ----------
+    def run_once(self, today: Optional[datetime.date] = None) -> Dict[str, Dict[str, List[str]]]:
+        """
+        One maintenance pass over PARTITIONED_TABLES. Returns
+        {table: {"added": [...], "removed": [...]}}; tables that do not exist
+        are skipped and one table's error does not stop the others.
+        """
+        today = today or datetime.date.today()
+        report: Dict[str, Dict[str, List[str]]] = {}
+        held: Dict[str, set] = {}
+        with self._pool().connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                for table in PARTITIONED_TABLES:
+                    try:
+                        names = self.partitions(cur, table)
+                        if names is None:
+                            continue
+                        if not names:
+                            logger.info(f"Partitioning {table} by month")
+                            cur.execute(partition_table_sql(table, today, self.months_ahead))
+                            names = self.partitions(cur, table) or []
+
+                        added = self.add_future_partitions(cur, table, names, today)
+                        removed = []
+                        for name in self.expired(names, today):
+                            if name in held.get(EXPIRE_WITH.get(table), ()):
+                                continue
+                            if table == "multipleFACT" and self.keyframe_needed(cur, name):
+                                logger.info(f"Keeping multipleFACT partition {name}: holds a keyframe still in use")
+                                held.setdefault(table, set()).add(name)
+                                continue
+                            if self.remove_partition(cur, table, name):
+                                removed.append(name)
+                        report[table] = {"added": added, "removed": removed}
+                        if added or removed:
+                            logger.info(f"{table}: added partitions {added}, "
+                                        f"{'archived' if self.retention_mode == 'archive' else 'dropped'} {removed}")
+                    except mysql.connector.Error as err:
+                        logger.error(f"Partition maintenance of {table} failed: {err}")
+            finally:
+                cur.close()
+        return report
+
+
+def main():
+    load_dotenv()
+    maintainer = PartitionMaintainer(
+        user=os.getenv("DB_USERNAME", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        host=os.getenv("DB_HOST", "127.0.0.1"),
+        database=os.getenv("DB_NAME", "quantDATA"),
+        port=int(os.getenv("DB_PORT", 3306)),
+    )
+    maintainer.run_once()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# payload_codec.py
+"""
+Compressed storage format for multipleFACT payloads.
+
+Hourly merge snapshots mostly repeat the previous one (same assets, same
+keys, a few changed numbers). With MERGE_PAYLOAD_COMPRESSION the payload is
+stored in multipleFACT.payload_blob instead of the JSON payload column:
+
+  zlib        keyframe: the whole payload JSON, zlib-compressed
+  zlib-delta  zlib-compressed patch against the keyframe in base_id; only the
+              values that differ from the keyframe are kept
+
+A patch node is one of
+  {"v": value}                        replace with value
+  {"d": {key: node}, "r": [keys]}     dict: changed keys, removed keys
+  {"l": {"index": node}}              list with the same rows: changed items
+  {"s": [item, ...]}                  list with rows added / removed / moved:
+                                        {"c": [start, count]}  unchanged keyframe items
+                                        {"p": index, "n": node} patched keyframe item
+                                        {"v": value}            new item
+and unchanged values are left out, so decode_payload() needs at most two
+rows (the snapshot and its keyframe) to rebuild any snapshot. List rows are
+matched on the first of ROW_KEYS that identifies every row of both lists (so
+an added or removed asset / pool only costs its own row), else by position.
+
+Environment (.env) variables:
+  MERGE_PAYLOAD_COMPRESSION    none (default, plain JSON column), zlib or zlib-delta
+  MERGE_PAYLOAD_KEYFRAME_EVERY snapshots per keyframe in zlib-delta mode (default 24)
+  MERGE_PAYLOAD_ZLIB_LEVEL     zlib level 1-9 (default 6)
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+# fields identifying a row of the payload's record lists, tried in order
+ROW_KEYS = ("asset_id", "pool_id", "Asset", "symbol")
+
+FORMAT_ZLIB = "zlib"
+FORMAT_ZLIB_DELTA = "zlib-delta"
+COMPRESSION_MODES = ("none", FORMAT_ZLIB, FORMAT_ZLIB_DELTA)
+
+
+def compression_mode() -> str:
+    mode = os.getenv("MERGE_PAYLOAD_COMPRESSION", "none").strip().lower()
+    if mode not in COMPRESSION_MODES:
+        raise ValueError(f"MERGE_PAYLOAD_COMPRESSION must be one of {COMPRESSION_MODES}, got {mode!r}")
+    return mode
+
+
+def keyframe_every() -> int:
+    return max(1, int(os.getenv("MERGE_PAYLOAD_KEYFRAME_EVERY", 24)))
+
+
+def _level() -> int:
+    return int(os.getenv("MERGE_PAYLOAD_ZLIB_LEVEL", 6))
+
+
+def compress_json(obj: Any) -> bytes:
+    return encode_keyframe(json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")))
+
+
+def encode_keyframe(payload_json: str) -> bytes:
+    """payload_json: the payload as dumped for the plain JSON column."""
+    return zlib.compress(payload_json.encode("utf-8"), _level())
+
+
+def decompress_json(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def make_patch(base: Any, new: Any) -> Optional[Dict[str, Any]]:
+    """Patch node turning `base` into `new`, or None if they are equal."""
+    if isinstance(base, dict) and isinstance(new, dict):
+        changed = {}
+        for key, value in new.items():
+            if key not in base:
+                changed[key] = {"v": value}
+            else:
+                node = make_patch(base[key], value)
+                if node is not None:
+                    changed[key] = node
+        removed = [key for key in base if key not in new]
+        if not changed and not removed:
+            return None
+        node = {"d": changed}
+        if removed:
+            node["r"] = removed
+        return node
+    if isinstance(base, list) and isinstance(new, list):
+        field = _row_key(base, new)
+        if len(base) == len(new) and (field is None or all(b[field] == n[field] for b, n in zip(base, new))):
+            changed = {}
+            for i, (b, n) in enumerate(zip(base, new)):
+                node = make_patch(b, n)
+                if node is not None:
+                    changed[str(i)] = node
+            return {"l": changed} if changed else None
+        return {"s": _sequence_patch(base, new, field)}
+    if type(base) is type(new) and base == new:
+        return None
+    return {"v": new}
+
+
+def _row_key(base: List[Any], new: List[Any]) -> Optional[str]:
+    """First of ROW_KEYS holding a unique scalar in every row of both lists."""
+    for field in ROW_KEYS:
+        for rows in (base, new):
+            values = [r.get(field) if isinstance(r, dict) else None for r in rows]
+            if not all(isinstance(v, (str, int, float)) for v in values) or len(set(values)) < len(values):
+                break
+        else:
+            return field
+    return None
+
+
+def _sequence_patch(base: List[Any], new: List[Any], field: Optional[str]) -> List[Dict[str, Any]]:
+    if field is not None:
+        position = {row[field]: i for i, row in enumerate(base)}
+        matches = [position.get(row[field]) for row in new]
+    else:
+        matches = [i if i < len(base) else None for i in range(len(new))]
+
+    items: List[Dict[str, Any]] = []
+    for i, row in zip(matches, new):
+        if i is None:
+            items.append({"v": row})
+            continue
+        node = make_patch(base[i], row)
+        if node is not None:
+            items.append({"p": i, "n": node})
+        elif items and "c" in items[-1] and sum(items[-1]["c"]) == i:
+            items[-1]["c"][1] += 1
+        else:
+            items.append({"c": [i, 1]})
+    return items
+
+
+def apply_patch(base: Any, node: Optional[Dict[str, Any]]) -> Any:
+    """Inverse of make_patch: apply_patch(base, make_patch(base, new)) == new."""
+    if node is None:
+        return base
+    if "v" in node:
+        return node["v"]
+    if "d" in node:
+        out = {k: v for k, v in base.items() if k not in node.get("r", ())}
+        for key, child in node["d"].items():
+            out[key] = apply_patch(base.get(key), child)
+        return out
+    if "s" in node:
+        out = []
+        for item in node["s"]:
+            if "c" in item:
+                start, count = item["c"]
+                out.extend(base[start:start + count])
+            elif "p" in item:
+                out.append(apply_patch(base[item["p"]], item["n"]))
+            else:
+                out.append(item["v"])
+        return out
+    out = list(base)
+    for i, child in node["l"].items():
+        out[int(i)] = apply_patch(base[int(i)], child)
+    return out
+
+
+def encode_delta(keyframe: Any, payload_json: str) -> bytes:
+    """Patch from the decoded keyframe to the payload, compressed."""
+    return compress_json(make_patch(keyframe, json.loads(payload_json)))
+
+
+def decode_payload(fmt: Optional[str], payload: Any, blob: Optional[bytes], keyframe: Any = None) -> Any:
+    """
+    Payload of one multipleFACT row. fmt is its payload_format (None = plain
+    JSON in `payload`); zlib-delta rows also need their decoded keyframe.
+    """
+    if not fmt:
+        return json.loads(payload) if isinstance(payload, (str, bytes, bytearray)) else payload
+    if fmt == FORMAT_ZLIB:
+        return decompress_json(blob)
+    if fmt == FORMAT_ZLIB_DELTA:
+        if keyframe is None:
+            raise ValueError("zlib-delta payload needs its keyframe")
+        return apply_patch(keyframe, decompress_json(blob))
+    raise ValueError(f"unknown payload_format {fmt!r}")
@@ -0,0 +1,86 @@
+# snapshot_assets.py
+"""
+multipleFACT_asset: the rows of every multipleFACT snapshot in columns, one row
+per asset / pool of a payload section.
+
+    snapshot_id   multipleFACT.id the row belongs to
+    section       payload list it came from (bifrost, moonbeam, hydration,
+                  hydration_price)
+    row_no        1-based position in that list          PRIMARY KEY (snapshot_id, section, row_no)
+    chain         bifrost / moonbeam / hydration
+    symbol        asset symbol; "token0-token1" for Moonbeam pools
+    farm_apy, pool_apy, apy, tvl, volume, price
+    created_at    when the snapshot was written
+
+INDEX (chain, symbol, snapshot_id) turns "APY of vDOT over the last 30
+snapshots" into an index range scan instead of decoding every JSON payload.
+
+SQL_DB_MergeTables.insert_combined_payload writes the rows in the same
+transaction as the multipleFACT row. The table is created by
+db_migration/migration_5.py (which also backfills it from the existing
+payloads) and by SQL_DB_MergeTables.initialize_tables().
+"""
+
+from typing import Any, Dict, List
+
+from bulk_writer import BulkWriter
+
+SNAPSHOT_ASSET_TABLE = "multipleFACT_asset"
+
+CREATE_SNAPSHOT_ASSET_SQL = f"""
+CREATE TABLE IF NOT EXISTS {SNAPSHOT_ASSET_TABLE} (
+    snapshot_id INT NOT NULL,
+    section VARCHAR(32) NOT NULL,
+    row_no INT NOT NULL,
+    chain VARCHAR(32) NOT NULL,
+    symbol VARCHAR(255),
+    farm_apy DOUBLE,
+    pool_apy DOUBLE,
+    apy DOUBLE,
+    tvl DOUBLE,
+    volume DOUBLE,
+    price DOUBLE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (snapshot_id, section, row_no),
+    INDEX idx_chain_symbol_snapshot (chain, symbol, snapshot_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+SNAPSHOT_COLUMNS = ("section", "row_no", "chain", "symbol", "farm_apy", "pool_apy", "apy", "tvl", "volume", "price")
+
+snapshot_writer = BulkWriter(SNAPSHOT_ASSET_TABLE, SNAPSHOT_COLUMNS, leading_columns=("snapshot_id",))
+
+# payload list -> (section, chain, symbol key(s), {column: payload field})
+SECTIONS = {
+    "bifrost_data": ("bifrost", "bifrost", ("Asset",),
+                     {"farm_apy": "apyReward", "pool_apy": "apyBase", "apy": "apy", "tvl": "tvl", "price": "price"}),
+    "moonbeam_data": ("moonbeam", "moonbeam", ("token0_symbol", "token1_symbol"),
+                      {"farm_apy": "farming_apr", "pool_apy": "pools_apr", "apy": "final_apr",
+                       "volume": "volume_usd_24h"}),
+    "hydration_data": ("hydration", "hydration", ("symbol",),
+                       {"farm_apy": "farm_apr", "pool_apy": "pool_apr", "apy": "total_apr", "tvl": "tvl_usd",
+                        "volume": "volume_usd"}),
+    "hydration_price_data": ("hydration_price", "hydration", ("symbol",), {"price": "price_usdt"}),
+}
+
+SELECT_ASSET_HISTORY_SQL = f"""
+SELECT snapshot_id, section, symbol, farm_apy, pool_apy, apy, tvl, volume, price, created_at
+FROM {SNAPSHOT_ASSET_TABLE}
+WHERE chain = %s AND symbol = %s
+ORDER BY snapshot_id DESC
+LIMIT %s
+"""
+
+
+def snapshot_rows(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rows of a merged payload (run_merge's payload_obj) for snapshot_writer."""
+    out: List[Dict[str, Any]] = []
+    for key, (section, chain, symbol_keys, fields) in SECTIONS.items():
+        for row_no, rec in enumerate(payload.get(key) or [], start=1):
+            symbols = [rec.get(k) for k in symbol_keys if rec.get(k) is not None]
+            row = {"section": section, "row_no": row_no, "chain": chain,
+                   "symbol": "-".join(str(s) for s in symbols) if symbols else None}
+            for column, field in fields.items():
+                row[column] = rec.get(field)
+            out.append(row)
+    return out
@@ -1,13 +1,18 @@
 import requests
 import os
 import math
+import itertools
 import pandas as pd
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from SQL_DB_stella import SQL_DB_Stella
 from logging_config import logger
-from utils import LivelinessProbe
+from utils import LivelinessProbe, HTTP_TIMEOUT, create_http_session
+from clmm_math import pools_token_amounts, stream_token_amounts
+from tick_math import exact_token_amounts
+from http_cache import cached_get, parse_once
 
 # Load environment variables from .env file
 load_dotenv()
@@ -34,17 +39,52 @@ graph_url = f"https://gateway.thegraph.com/api/{apiKEY}/subgraphs/id/LgiKJnsTspb
 pools_apr_url = "https://apr-api.stellaswap.com/api/v1/integral/poolsApr"
 farming_apr_url = "https://apr-api.stellaswap.com/api/v1/integral/offchain/farmingAPR"
 
+# Max concurrent position queries per cycle (1 = serial)
+FETCH_CONCURRENCY = int(os.getenv("STELLA_FETCH_CONCURRENCY", 8))
+# Pools per GraphQL request; >1 batches pools into one request with aliased sub-queries
+POOLS_PER_QUERY = int(os.getenv("STELLA_POOLS_PER_QUERY", 1))
+# Positions per page when paging through a pool's positions (The Graph caps `first` at 1000)
+POSITIONS_PAGE_SIZE = int(os.getenv("STELLA_POSITIONS_PAGE_SIZE", 1000))
+# Token amount computation: "float" (vectorized NumPy) or "exact" (Q64.96 integer tick math)
+AMOUNT_MODE = os.getenv("STELLA_AMOUNT_MODE", "float")
+AMOUNT_MODES = ("float", "exact")
+
+POSITION_FIELDS = """
+        id
+        tickLower {
+          tickIdx
+        }
+        tickUpper {
+          tickIdx
+        }
+        liquidity
+        pool {
+          tick
+          sqrtPrice
+          token0 {
+            symbol
+            decimals
+          }
+          token1 {
+            symbol
+            decimals
+          }
+        }
+"""
+
 # Function to fetch Pools APR data
-def fetch_pools_apr():
+def pools_apr_result(data):
+    if data.get("isSuccess") and "result" in data:
+        return data["result"]
+    logger.warning("Pools APR API response missing expected data.")
+    return {}
+
+def fetch_pools_apr(session=None):
     try:
-        response = requests.get(pools_apr_url)
+        response = cached_get(pools_apr_url, session=session, timeout=HTTP_TIMEOUT)
         if response.status_code == 200:
-            data = response.json()
-            if data.get("isSuccess") and "result" in data:
-                return data["result"]
-            else:
-                logger.warning("Pools APR API response missing expected data.")
-                return {}
+            # an unchanged body returns the result parsed in an earlier cycle
+            return parse_once(response, pools_apr_result)
         else:
             logger.error(f"Pools APR API request failed with status code {response.status_code}: {response.text}")
             return {}
@@ -53,16 +93,17 @@ def fetch_pools_apr():
         return {}
 
 # Function to fetch Farming APR data
-def fetch_farming_apr():
+def farming_apr_pools(data):
+    if data.get("code") == 200 and "result" in data and "pools" in data["result"]:
+        return data["result"]["pools"]
+    logger.warning("Farming APR API response missing expected data.")
+    return {}
+
+def fetch_farming_apr(session=None):
     try:
-        response = requests.get(farming_apr_url)
+        response = cached_get(farming_apr_url, session=session, timeout=HTTP_TIMEOUT)
         if response.status_code == 200:
-            data = response.json()
-            if data.get("code") == 200 and "result" in data and "pools" in data["result"]:
-                return data["result"]["pools"]
-            else:
-                logger.warning("Farming APR API response missing expected data.")
-                return {}
+            return parse_once(response, farming_apr_pools)
         else:
             logger.error(f"Farming APR API request failed with status code {response.status_code}: {response.text}")
             return {}
@@ -71,7 +112,7 @@ def fetch_farming_apr():
         return {}
 
 # Function to fetch pool data with 24h volume
-def fetch_pool_data(timestamp_23h_ago, timestamp_25h_ago):
+def fetch_pool_data(timestamp_23h_ago, timestamp_25h_ago, session=None):
     query = f"""
     {{
       pools(first: 55) {{
@@ -109,7 +150,7 @@ def fetch_pool_data(timestamp_23h_ago, timestamp_25h_ago):
     """
     headers = {"Content-Type": "application/json"}
     try:
-        response = requests.post(graph_url, json={'query': query}, headers=headers)
+        response = (session or requests).post(graph_url, json={'query': query}, headers=headers, timeout=HTTP_TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
@@ -119,68 +160,166 @@ def fetch_pool_data(timestamp_23h_ago, timestamp_25h_ago):
         logger.error(f"Error fetching pool data: {e}")
         return None
 
+# Raised when a page of a paginated position query fails
+class PositionQueryError(Exception):
+    pass
+
+def _positions_query(pool_id, page_size, after_id=None, alias="positions"):
+    where = f'pool: "{pool_id.lower()}", liquidity_gt: 0'
+    if after_id is not None:
+        where += f', id_gt: "{after_id}"'
+    prefix = "" if alias == "positions" else f"{alias}: "
+    return f"""
+      {prefix}positions(where: {{ {where} }}, orderBy: id, orderDirection: asc, first: {page_size}) {{{POSITION_FIELDS}      }}"""
+
+# Function to iterate over all active positions of a pool, one page at a time (id_gt keyset paging)
+def iter_position_pages(pool_id, session=None, page_size=None, after_id=None):
+    """
+    Yields lists of positions ordered by id. Each page asks for positions
+    with id > last id of the previous page, so every request is an index
+    seek and only one page is held in memory. Stops at the first short page.
+    Raises PositionQueryError if a page cannot be fetched.
+    """
+    page_size = int(page_size or POSITIONS_PAGE_SIZE)
+    headers = {"Content-Type": "application/json"}
+    while True:
+        query = f"""
+    {{{_positions_query(pool_id, page_size, after_id)}
+    }}
+    """
+        response = (session or requests).post(graph_url, json={'query': query}, headers=headers, timeout=HTTP_TIMEOUT)
+        if response.status_code != 200:
+            raise PositionQueryError(f"Token amount query failed for pool {pool_id}: {response.status_code}")
+
+        page = (response.json().get('data') or {}).get('positions') or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after_id = page[-1]["id"]
+
+# Function to sum the token amounts of a stream of position pages of one pool
+def sum_position_pages(pages, mode=None):
+    mode = mode or AMOUNT_MODE
+    if mode == "exact":
+        return exact_token_amounts(pages)
+    if mode == "float":
+        return stream_token_amounts(pages)
+    raise ValueError(f"Unknown amount mode {mode!r}, expected one of {AMOUNT_MODES}")
+
 # Function to fetch position data and calculate token amounts
-def fetch_token_amounts(pool_id):
+def fetch_token_amounts(pool_id, session=None, page_size=None, mode=None):
+    try:
+        totals = sum_position_pages(iter_position_pages(pool_id, session=session, page_size=page_size), mode)
+    except PositionQueryError as e:
+        logger.error(str(e))
+        return 0, 0
+
+    if totals is None:
+        logger.warning(f"No active positions found for pool: {pool_id}")
+        return 0, 0
+    return totals
+
+# Function to fetch the positions of several pools in one GraphQL request (aliased sub-queries)
+def fetch_token_amounts_batch(pool_ids, session=None, page_size=None, mode=None):
+    """
+    The first page of every pool comes from one aliased request; pools whose
+    first page is full continue with keyset paging on their own.
+    """
+    page_size = int(page_size or POSITIONS_PAGE_SIZE)
+    sub_queries = "".join(
+        _positions_query(pool_id, page_size, alias=f"p{i}") for i, pool_id in enumerate(pool_ids)
+    )
     query = f"""
-    {{
-      positions(where: {{ pool: "{pool_id.lower()}", liquidity_gt: 0 }}, first: 1000) {{
-        id
-        tickLower {{
-          tickIdx
-        }}
-        tickUpper {{
-          tickIdx
-        }}
-        liquidity
-        pool {{
-          tick
-          sqrtPrice
-          token0 {{
-            symbol
-            decimals
-          }}
-          token1 {{
-            symbol
-            decimals
-          }}
-        }}
-      }}
+    {{{sub_queries}
     }}
     """
     headers = {"Content-Type": "application/json"}
-    response = requests.post(graph_url, json={'query': query}, headers=headers)
-    
+    response = (session or requests).post(graph_url, json={'query': query}, headers=headers, timeout=HTTP_TIMEOUT)
+
     if response.status_code != 200:
-        logger.error(f"Token amount query failed for pool {pool_id}: {response.status_code}")
-        return 0, 0
-    
-    data = response.json()
-    positions = data.get('data', {}).get('positions', [])
-    if not positions:
-        logger.warning(f"No active positions found for pool: {pool_id}")
-        return 0, 0
-    
-    pool = positions[0]["pool"]
-    sqrt_price_current = int(pool["sqrtPrice"]) / (2 ** 96)
-    token0_decimals = int(pool["token0"]["decimals"])
-    token1_decimals = int(pool["token1"]["decimals"])
-    
-    total_amount0, total_amount1 = 0, 0
-    
-    for pos in positions:
-        tick_lower = int(pos["tickLower"]["tickIdx"])
-        tick_upper = int(pos["tickUpper"]["tickIdx"])
-        liquidity = int(pos["liquidity"])
-        
-        sqrt_price_low = math.sqrt(1.0001 ** tick_lower)
-        sqrt_price_high = math.sqrt(1.0001 ** tick_upper)
-        
-        amount0, amount1 = calculate_token_amounts(liquidity, sqrt_price_current, sqrt_price_low, sqrt_price_high)
-        
-        total_amount0 += amount0 / (10 ** token0_decimals)
-        total_amount1 += amount1 / (10 ** token1_decimals)
-    
-    return total_amount0, total_amount1
+        logger.error(f"Token amount batch query failed for pools {pool_ids}: {response.status_code}")
+        return {pool_id: (0, 0) for pool_id in pool_ids}
+
+    data = response.json().get('data') or {}
+    first_pages = {pool_id: data.get(f"p{i}") or [] for i, pool_id in enumerate(pool_ids)}
+
+    single_page = {pool_id: page for pool_id, page in first_pages.items() if len(page) < page_size}
+    if (mode or AMOUNT_MODE) == "float":
+        # pools that fit in one page are summed together in a single vectorized pass
+        amounts = pools_token_amounts(single_page)
+    else:
+        amounts = {pool_id: sum_position_pages([page], mode) for pool_id, page in single_page.items()}
+    for pool_id, first_page in first_pages.items():
+        if len(first_page) < page_size:
+            continue
+        pages = itertools.chain([first_page], iter_position_pages(
+            pool_id, session=session, page_size=page_size, after_id=first_page[-1]["id"]))
+        try:
+            amounts[pool_id] = sum_position_pages(pages, mode)
+        except PositionQueryError as e:
+            logger.error(str(e))
+            amounts[pool_id] = (0, 0)
+
+    result = {}
+    for pool_id in pool_ids:
+        if amounts[pool_id] is None:
+            logger.warning(f"No active positions found for pool: {pool_id}")
+            result[pool_id] = (0, 0)
+        else:
+            result[pool_id] = amounts[pool_id]
+    return result
+
+# Function to fetch token amounts for many pools with a bounded worker pool
+def fetch_all_token_amounts(pool_ids, concurrency=None, pools_per_query=None, session=None, mode=None):
+    """
+    Returns {pool_id: (amount_token0, amount_token1)}. Queries run on up to
+    `concurrency` threads sharing one keep-alive session; with
+    pools_per_query > 1 each request carries that many pools as aliased
+    sub-queries. A failed or timed-out query yields (0, 0) for its pools.
+    `mode` selects the amount computation ("float" or "exact", see AMOUNT_MODE).
+    """
+    if (mode or AMOUNT_MODE) not in AMOUNT_MODES:
+        raise ValueError(f"Unknown amount mode {mode or AMOUNT_MODE!r}, expected one of {AMOUNT_MODES}")
+    concurrency = max(1, int(concurrency or FETCH_CONCURRENCY))
+    pools_per_query = max(1, int(pools_per_query or POOLS_PER_QUERY))
+    own_session = session is None
+    if own_session:
+        session = create_http_session(pool_maxsize=concurrency)
+
+    def run_single(pool_id):
+        try:
+            return {pool_id: fetch_token_amounts(pool_id, session=session, mode=mode)}
+        except Exception as e:
+            logger.error(f"Token amount query failed for pool {pool_id}: {e}")
+            return {pool_id: (0, 0)}
+
+    def run_batch(chunk):
+        try:
+            return fetch_token_amounts_batch(chunk, session=session, mode=mode)
+        except Exception as e:
+            logger.error(f"Token amount batch query failed for pools {chunk}: {e}")
+            return {pool_id: (0, 0) for pool_id in chunk}
+
+    if pools_per_query == 1:
+        worker, jobs = run_single, list(pool_ids)
+    else:
+        worker = run_batch
+        jobs = [pool_ids[i:i + pools_per_query] for i in range(0, len(pool_ids), pools_per_query)]
+
+    amounts = {}
+    try:
+        if concurrency == 1:
+            results = [worker(job) for job in jobs]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(worker, jobs))
+        for result in results:
+            amounts.update(result)
+    finally:
+        if own_session:
+            session.close()
+    return amounts
 
 # Function to calculate token amounts
 def calculate_token_amounts(liquidity, sqrt_price_current, sqrt_price_low, sqrt_price_high):
@@ -195,17 +334,20 @@ def calculate_token_amounts(liquidity, sqrt_price_current, sqrt_price_low, sqrt_
     return amount0, amount1
 
 # Function to process the fetched data
-def process_data(data, pools_apr_data, farming_apr_data):
+def process_data(data, pools_apr_data, farming_apr_data, concurrency=None, pools_per_query=None, session=None):
     if not data or 'data' not in data or 'pools' not in data['data']:
         logger.warning("No valid data to process.")
         return []
     
     processed_data = []
     pools = data['data']['pools']
+    token_amounts = fetch_all_token_amounts(
+        [pool['id'] for pool in pools], concurrency=concurrency, pools_per_query=pools_per_query, session=session
+    )
     
     for pool in pools:
         pool_id = pool['id']
-        amount_token0, amount_token1 = fetch_token_amounts(pool_id)
+        amount_token0, amount_token1 = token_amounts[pool_id]
         
         farming_data = farming_apr_data.get(pool_id, {})
         farming_apr = float(farming_data.get("apr", 0)) if farming_data else 0
@@ -257,9 +399,8 @@ def process_data(data, pools_apr_data, farming_apr_data):
     
     return processed_data
 
-# Main execution
-def main():
-    sql_db = SQL_DB_Stella(
+def connect_db():
+    return SQL_DB_Stella(
         userName=db_user,
         passWord=db_password,
         dataBase=db_name,
@@ -267,28 +408,37 @@ def main():
         host=db_host,
         initializeTable=True
     )
+
+# One fetch-and-store cycle; returns False if the pool query failed
+def collect_once(sql_db, session=None):
+    logger.info("Fetching data...")
+    current_timestamp = int(datetime.utcnow().timestamp())
+    timestamp_23h_ago = current_timestamp - (23 * 60 * 60)
+    timestamp_25h_ago = current_timestamp - (25 * 60 * 60)
+    
+    batch_id = int(time.time())
+    
+    pools_apr_data = fetch_pools_apr(session=session)
+    farming_apr_data = fetch_farming_apr(session=session)
+    raw_data = fetch_pool_data(timestamp_23h_ago, timestamp_25h_ago, session=session)
+    if not raw_data:
+        return False
+
+    processed_data = process_data(raw_data, pools_apr_data, farming_apr_data, session=session)
+    
+    for pool in processed_data:
+        logger.info(f"Pool {pool['pool_id']}: Token0: {pool['symbol']} - {pool['amount_token0']:.6f}, Token1: {pool['token1_symbol']} - {pool['amount_token1']:.6f}, 24h Vol: {pool['volume_usd_24h']}, APR: {pool['final_apr']}%")
+    
+    sql_db.update_pool_database(processed_data, batch_id)
+    return True
+
+# Main execution
+def main():
+    sql_db = connect_db()
     
     try:
         while True:
-            logger.info("Fetching data...")
-            current_timestamp = int(datetime.utcnow().timestamp())
-            timestamp_23h_ago = current_timestamp - (23 * 60 * 60)
-            timestamp_25h_ago = current_timestamp - (25 * 60 * 60)
-            
-            batch_id = int(time.time())
-            
-            pools_apr_data = fetch_pools_apr()
-            farming_apr_data = fetch_farming_apr()
-            raw_data = fetch_pool_data(timestamp_23h_ago, timestamp_25h_ago)
-            
-            if raw_data:
-                processed_data = process_data(raw_data, pools_apr_data, farming_apr_data)
-                
-                for pool in processed_data:
-                    logger.info(f"Pool {pool['pool_id']}: Token0: {pool['symbol']} - {pool['amount_token0']:.6f}, Token1: {pool['token1_symbol']} - {pool['amount_token1']:.6f}, 24h Vol: {pool['volume_usd_24h']}, APR: {pool['final_apr']}%")
-                
-                sql_db.update_pool_database(processed_data, batch_id)
-            
+            collect_once(sql_db)
             LivelinessProbe.record_heartbeat("stellaswap")
             logger.info("Sleeping for 1 hour...")
             time.sleep(3600)
@@ -0,0 +1,193 @@
+# tick_math.py
+"""
+Exact fixed-point (Q64.96) tick math for concentrated-liquidity pools.
+
+get_sqrt_ratio_at_tick() is the integer TickMath algorithm the Uniswap v3 /
+Algebra contracts use, so sqrtPriceX96 values match the chain bit for bit.
+amounts_for_liquidity() is LiquidityAmounts.getAmountsForLiquidity: token
+amounts in raw units, rounded down, with no float anywhere.
+
+A SqrtPriceTable precomputes sqrtPriceX96 for every tick that is a multiple
+of the tick spacing (position bounds always are). It is built once and
+cached on disk as fixed-width 20-byte big-endian integers; ticks off the
+grid are computed directly.
+
+Environment (.env) variables:
+  STELLA_TICK_SPACING     tick spacing of the lookup table (default 60)
+  STELLA_TICK_TABLE_DIR   directory of the on-disk table (default CAO/.cache)
+
+Usage:
+  table = get_tick_table()
+  amount0, amount1 = amounts_for_liquidity(sqrt_price_x96, table[tick_lower], table[tick_upper], liquidity)
+  total0, total1 = exact_token_amounts(pages)
+"""
+
+import os
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from logging_config import logger
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+Q96 = 1 << 96
+
+DEFAULT_TICK_SPACING = 60
+_MAGIC = b"SQRTX96\x01"
+_HEADER = struct.Struct(">8sii")
+_VALUE_BYTES = 20  # sqrtPriceX96 is a uint160
+
+# ratio multipliers for bits 1..19 of |tick|, Q128.128
+_TICK_FACTORS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+)
+_MAX_UINT256 = (1 << 256) - 1
+
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """sqrt(1.0001 ** tick) * 2**96 as an integer, exactly as TickMath computes it."""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"tick {tick} out of range [{MIN_TICK}, {MAX_TICK}]")
+
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 1 << 128
+    for bit, factor in _TICK_FACTORS:
+        if abs_tick & bit:
+            ratio = (ratio * factor) >> 128
+    if tick > 0:
+        ratio = _MAX_UINT256 // ratio
+
+    # Q128.128 -> Q64.96, rounding up
+    return (ratio >> 32) + (1 if ratio & 0xffffffff else 0)
+
+
+def amounts_for_liquidity(sqrt_price_x96: int, sqrt_price_a_x96: int, sqrt_price_b_x96: int,
+                          liquidity: int) -> Tuple[int, int]:
+    """Raw (amount0, amount1) held by `liquidity` between two sqrt prices, rounded down."""
+    if sqrt_price_a_x96 > sqrt_price_b_x96:
+        sqrt_price_a_x96, sqrt_price_b_x96 = sqrt_price_b_x96, sqrt_price_a_x96
+    if sqrt_price_a_x96 == sqrt_price_b_x96:
+        return 0, 0
+
+    if sqrt_price_x96 <= sqrt_price_a_x96:
+        amount0 = ((liquidity << 96) * (sqrt_price_b_x96 - sqrt_price_a_x96) // sqrt_price_b_x96) // sqrt_price_a_x96
+        return amount0, 0
+    if sqrt_price_x96 < sqrt_price_b_x96:
+        amount0 = ((liquidity << 96) * (sqrt_price_b_x96 - sqrt_price_x96) // sqrt_price_b_x96) // sqrt_price_x96
+        amount1 = (liquidity * (sqrt_price_x96 - sqrt_price_a_x96)) >> 96
+        return amount0, amount1
+    return 0, (liquidity * (sqrt_price_b_x96 - sqrt_price_a_x96)) >> 96
+
+
+class SqrtPriceTable:
+    def __init__(self, tick_spacing: Optional[int] = None, cache_dir: Optional[str] = None) -> None:
+        self.tick_spacing = int(tick_spacing or os.getenv("STELLA_TICK_SPACING", DEFAULT_TICK_SPACING))
+        if self.tick_spacing < 1:
+            raise ValueError("tick_spacing must be >= 1")
+        self.cache_dir = cache_dir or os.getenv(
+            "STELLA_TICK_TABLE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+        )
+        self.path = os.path.join(self.cache_dir, f"sqrt_price_x96_spacing{self.tick_spacing}.bin")
+        # grid ticks are min_tick, min_tick + spacing, ..., -min_tick
+        self.min_tick = -(MAX_TICK // self.tick_spacing) * self.tick_spacing
+        self.size = 2 * (MAX_TICK // self.tick_spacing) + 1
+        self._values = self._load() or self._build()
+
+    def _load(self) -> Optional[List[int]]:
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        expected = _HEADER.size + self.size * _VALUE_BYTES
+        if len(data) != expected or _HEADER.unpack_from(data) != (_MAGIC, self.tick_spacing, self.size):
+            logger.warning(f"Ignoring malformed tick table cache {self.path}")
+            return None
+        return [
+            int.from_bytes(data[i:i + _VALUE_BYTES], "big")
+            for i in range(_HEADER.size, expected, _VALUE_BYTES)
+        ]
+
+    def _build(self) -> List[int]:
+        values = [get_sqrt_ratio_at_tick(self.min_tick + i * self.tick_spacing) for i in range(self.size)]
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, self.tick_spacing, self.size))
+                f.write(b"".join(v.to_bytes(_VALUE_BYTES, "big") for v in values))
+            os.replace(tmp_path, self.path)
+            logger.info(f"Built tick table {self.path} ({self.size} ticks)")
+        except OSError as e:
+            logger.warning(f"Could not cache tick table at {self.path}: {e}")
+        return values
+
+    def __getitem__(self, tick: int) -> int:
+        offset = tick - self.min_tick
+        if offset % self.tick_spacing == 0 and 0 <= offset < self.size * self.tick_spacing:
+            return self._values[offset // self.tick_spacing]
+        return get_sqrt_ratio_at_tick(tick)
+
+
+_tables: Dict[int, SqrtPriceTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_tick_table(tick_spacing: Optional[int] = None) -> SqrtPriceTable:
+    """Return the shared table for this tick spacing, loading or building it on first use."""
+    spacing = int(tick_spacing or os.getenv("STELLA_TICK_SPACING", DEFAULT_TICK_SPACING))
+    with _tables_lock:
+        table = _tables.get(spacing)
+        if table is None:
+            table = SqrtPriceTable(spacing)
+            _tables[spacing] = table
+        return table
+
+
+def exact_token_amounts(chunks: Iterable[Sequence[dict]],
+                        table: Optional[SqrtPriceTable] = None) -> Optional[Tuple[float, float]]:
+    """
+    Integer counterpart of clmm_math.stream_token_amounts: sums raw amounts
+    of a stream of position chunks (one pool) exactly, then scales by the
+    token decimals. None if every chunk is empty.
+    """
+    table = table or get_tick_table()
+    pool = None
+    total0, total1 = 0, 0
+    for chunk in chunks:
+        for pos in chunk:
+            if pool is None:
+                pool = pos["pool"]
+                sqrt_price_x96 = int(pool["sqrtPrice"])
+            amount0, amount1 = amounts_for_liquidity(
+                sqrt_price_x96,
+                table[int(pos["tickLower"]["tickIdx"])],
+                table[int(pos["tickUpper"]["tickIdx"])],
+                int(pos["liquidity"]),
+            )
+            total0 += amount0
+            total1 += amount1
+    if pool is None:
+        return None
+    return total0 / 10 ** int(pool["token0"]["decimals"]), total1 / 10 ** int(pool["token1"]["decimals"])
@@ -4,9 +4,42 @@ import json
 import time
 import functools
 import shutil
+import sys
 import mysql.connector
+import requests
+from requests.adapters import HTTPAdapter
 from logging_config import logger
 
+# Default per-request timeout (seconds) for the HTTP fetchers
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 15))
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies `timeout` to every request that does not pass its own."""
+
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.timeout = HTTP_TIMEOUT if timeout is None else timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+def create_http_session(pool_maxsize=10, pool_block=False, timeout=None):
+    """
+    Returns a requests.Session with keep-alive connection pooling sized for
+    `pool_maxsize` concurrent requests per host. Share one session across the
+    requests of a fetch cycle instead of calling requests.get per request.
+
+    pool_block=True makes pool_maxsize a hard per-host connection limit
+    (further requests wait for a free connection); with `timeout` every
+    request without its own timeout gets that one.
+    """
+    session = TimeoutSession(timeout) if timeout is not None else requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 def retry(max_retries=3, delay=2, backoff=2, exceptions=(Exception,)):
     """
     Decorator to retry a function call if it raises specified exceptions.
@@ -153,14 +186,80 @@ def generate_batch_id():
     """Generates a monotonic batch ID (integer timestamp)."""
     return int(time.time())
 
+# Same output as json.dumps(obj, sort_keys=True, default=str), reused for every leaf
+_canonical_json = json.JSONEncoder(sort_keys=True, default=str).encode
+
+
+class StreamingHasher:
+    """
+    SHA-256 of the canonical JSON of a payload (json.dumps(sort_keys=True,
+    default=str)) without building the whole string: dicts holding
+    containers are walked key by key and lists are encoded LIST_SLICE items
+    at a time, so only one slice of records is ever held as JSON. The digest
+    is identical to hashing the full json.dumps output, so stored dedup
+    hashes stay valid.
+
+    pandas DataFrames (the payload itself or a dict value) take a fast path:
+    every column's name, dtype and pd.util.hash_pandas_object() value hashes
+    are fed directly, with no to_dict('records') round trip; dict / list
+    cells are hashed through their canonical JSON. That digest differs from
+    the one of the frame's records.
+    """
+
+    LIST_SLICE = 1000
+
+    def __init__(self):
+        self._sha = hashlib.sha256()
+
+    def _write(self, s):
+        self._sha.update(s.encode('utf-8'))
+
+    def update(self, data):
+        self._feed(data, sys.modules.get('pandas'))
+        return self
+
+    def _feed(self, obj, pd):
+        # pandas is only looked up if some caller already imported it
+        if pd is not None and isinstance(obj, pd.DataFrame):
+            self._feed_frame(obj, pd)
+        elif isinstance(obj, dict) and all(type(k) is str for k in obj) and any(
+                isinstance(v, (dict, list, tuple)) or (pd is not None and isinstance(v, pd.DataFrame))
+                for v in obj.values()):
+            self._write("{")
+            for i, key in enumerate(sorted(obj)):
+                self._write((", " if i else "") + _canonical_json(key) + ": ")
+                self._feed(obj[key], pd)
+            self._write("}")
+        elif isinstance(obj, (list, tuple)) and len(obj) > self.LIST_SLICE:
+            self._write("[")
+            for start in range(0, len(obj), self.LIST_SLICE):
+                chunk = _canonical_json(obj[start:start + self.LIST_SLICE])
+                self._write((", " if start else "") + chunk[1:-1])
+            self._write("]")
+        else:
+            self._write(_canonical_json(obj))
+
+    def _feed_frame(self, df, pd):
+        self._write(f"<DataFrame {len(df)}>")
+        for i, (name, dtype) in enumerate(zip(df.columns, df.dtypes)):
+            self._write(_canonical_json([str(name), str(dtype)]))
+            column = df.iloc[:, i]
+            if column.dtype == object and any(isinstance(v, (dict, list, tuple)) for v in column):
+                # hash_pandas_object would hash str() of these, which depends on dict key order
+                column = column.map(lambda v: _canonical_json(v) if isinstance(v, (dict, list, tuple)) else v)
+            hashes = pd.util.hash_pandas_object(column, index=False)
+            self._sha.update(hashes.to_numpy(dtype='<u8').tobytes())
+
+    def hexdigest(self):
+        return self._sha.hexdigest()
+
+
 class DataValidator:
     @staticmethod
     def compute_hash(data):
-        """Computes SHA256 hash of data (dict or list)."""
+        """Computes SHA256 hash of data (dict, list or DataFrame), see StreamingHasher."""
         try:
-            # Sort keys for consistent hashing
-            s = json.dumps(data, sort_keys=True, default=str)
-            return hashlib.sha256(s.encode('utf-8')).hexdigest()
+            return StreamingHasher().update(data).hexdigest()
         except Exception as e:
             logger.error(f"Error computing hash: {e}")
             return None
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# bench_bulk_writer.py
+"""
+Micro-benchmark: rows/sec of the BulkWriter path against the legacy
+per-row, string-escaped INSERT path (one connection + commit per row).
+
+By default both paths run against an in-process fake MySQL connection that
+charges a simulated network round-trip per connect/execute/commit, so the
+numbers show client-side CPU plus round-trip counts without a server.
+With --live they run against the database configured in CAO/.env, writing
+into a scratch table that is dropped afterwards.
+
+Usage:
+  python benchmarks/bench_bulk_writer.py                     # 10, 1k, 100k rows
+  python benchmarks/bench_bulk_writer.py --rtt-ms 0.5 --sizes 10 1000
+  python benchmarks/bench_bulk_writer.py --live
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+from bulk_writer import BulkWriter, write_batch  # noqa: E402
+from db_pool import get_pool, close_all_pools  # noqa: E402
+from SQL_DB_hydration import HYDRATION_DATA_COLUMNS  # noqa: E402
+
+SCRATCH_TABLE = "bench_hydration_data"
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        self.conn.round_trip()
+
+    def fetchall(self):
+        raise Exception("no result set")
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Stand-in for a MySQL connection: every call costs one simulated round trip."""
+    round_trips = 0
+
+    def __init__(self, rtt, **kwargs):
+        self.rtt = rtt
+        # TCP + auth handshake is roughly three round trips
+        for _ in range(3):
+            self.round_trip()
+
+    def round_trip(self):
+        FakeConnection.round_trips += 1
+        if self.rtt:
+            end = time.perf_counter() + self.rtt
+            while time.perf_counter() < end:
+                pass
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.round_trip()
+
+    def rollback(self):
+        self.round_trip()
+
+    def is_connected(self):
+        self.round_trip()
+        return True
+
+    def close(self):
+        pass
+
+
+def make_records(n):
+    return [
+        {
+            "asset_id": str(i),
+            "symbol": f"TOK'{i}",
+            "farm_apr": 1.5 + i,
+            "pool_apr": None if i % 7 == 0 else 0.25,
+            "total_apr": 1.75 + i,
+            "tvl_usd": 1000.0 * i,
+            "volume_usd": 10.0 * i,
+            "timestamp": "2025-01-01T00:00:00",
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_insert(connect, records, batch_id, table):
+    """The pre-BulkWriter path: iterrows + string escaping + connection per row."""
+    df = pd.DataFrame(records)
+    for _, row in df.iterrows():
+        values_list = [
+            "NULL" if pd.isna(value) else
+            "'" + str(value).replace("'", "\\'") + "'" if isinstance(value, str) else
+            str(value)
+            for value in [batch_id] + row.tolist()
+        ]
+        values = ', '.join(values_list)
+        query = f"""
+        INSERT INTO {table} (
+            batch_id, asset_id, symbol, farm_apr, pool_apr, total_apr,
+            tvl_usd, volume_usd, timestamp
+        ) VALUES ({values})
+        """
+        cnx = connect()
+        cursor = cnx.cursor()
+        cursor.execute(query)
+        cnx.commit()
+        cursor.close()
+        cnx.close()
+
+
+def bulk_insert(pool, records, batch_id, table, chunk_size):
+    writer = BulkWriter(table, HYDRATION_DATA_COLUMNS, leading_columns=("batch_id",), chunk_size=chunk_size)
+    write_batch(pool, [(writer, records, (batch_id,))])
+
+
+def timed(fn):
+    FakeConnection.round_trips = 0
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start, FakeConnection.round_trips
+
+
+def run_fake(sizes, rtt, chunk_size, legacy_max):
+    print(f"Simulated round trip: {rtt * 1000:.3f} ms, chunk size {chunk_size}")
+    print(f"{'rows':>8} | {'legacy rows/s':>14} {'trips':>8} | {'bulk rows/s':>14} {'trips':>8} | speedup")
+    with patch('mysql.connector.connect', side_effect=lambda **kw: FakeConnection(rtt, **kw)):
+        for n in sizes:
+            records = make_records(n)
+            pool = get_pool('bench', 'bench', 'fake', 'bench', 0)
+            bulk_t, bulk_trips = timed(lambda: bulk_insert(pool, records, 1, SCRATCH_TABLE, chunk_size))
+            close_all_pools()
+            if n <= legacy_max:
+                legacy_t, legacy_trips = timed(
+                    lambda: legacy_insert(lambda: FakeConnection(rtt), records, 1, SCRATCH_TABLE))
+                print(f"{n:>8} | {n / legacy_t:>14,.0f} {legacy_trips:>8} | "
+                      f"{n / bulk_t:>14,.0f} {bulk_trips:>8} | {legacy_t / bulk_t:6.1f}x")
+            else:
+                print(f"{n:>8} | {'(skipped)':>14} {n * 5:>8} | {n / bulk_t:>14,.0f} {bulk_trips:>8} |")
+
+
+def run_live(sizes, chunk_size, legacy_max):
+    import mysql.connector
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(cao_dir, '.env'))
+    cfg = dict(
+        user=os.getenv("DB_USERNAME"), password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST", "127.0.0.1"), database=os.getenv("DB_NAME"),
+        port=int(os.getenv("DB_PORT", 3306)),
+    )
+    pool = get_pool(cfg['user'], cfg['password'], cfg['host'], cfg['database'], cfg['port'])
+    with pool.connection() as cnx:
+        cur = cnx.cursor()
+        cur.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        cur.execute(f"CREATE TABLE {SCRATCH_TABLE} LIKE hydration_data")
+        cur.close()
+    print(f"Live database {cfg['host']}:{cfg['port']}/{cfg['database']}, chunk size {chunk_size}")
+    print(f"{'rows':>8} | {'legacy rows/s':>14} | {'bulk rows/s':>14} | speedup")
+    try:
+        for n in sizes:
+            records = make_records(n)
+            start = time.perf_counter()
+            bulk_insert(pool, records, 1, SCRATCH_TABLE, chunk_size)
+            bulk_t = time.perf_counter() - start
+            if n <= legacy_max:
+                start = time.perf_counter()
+                legacy_insert(lambda: mysql.connector.connect(**cfg), records, 2, SCRATCH_TABLE)
+                legacy_t = time.perf_counter() - start
+                print(f"{n:>8} | {n / legacy_t:>14,.0f} | {n / bulk_t:>14,.0f} | {legacy_t / bulk_t:6.1f}x")
+            else:
+                print(f"{n:>8} | {'(skipped)':>14} | {n / bulk_t:>14,.0f} |")
+    finally:
+        with pool.connection() as cnx:
+            cur = cnx.cursor()
+            cur.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+            cur.close()
+        close_all_pools()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BulkWriter vs legacy per-row INSERT benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--rtt-ms", type=float, default=0.05,
+                        help="simulated round-trip time for the fake connection (default 0.05ms)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--legacy-max", type=int, default=100000,
+                        help="skip the legacy path above this many rows")
+    parser.add_argument("--live", action="store_true", help="run against the database in CAO/.env")
+    args = parser.parse_args()
+
+    if args.live:
+        run_live(args.sizes, args.chunk_size, args.legacy_max)
+    else:
+        run_fake(args.sizes, args.rtt_ms / 1000.0, args.chunk_size, args.legacy_max)
+
+
+if __name__ == "__main__":
+    main()
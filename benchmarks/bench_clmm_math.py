@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# bench_clmm_math.py
+"""
+Micro-benchmark: positions/sec of the vectorized clmm_math engine against
+the scalar per-position loop (math.sqrt(1.0001 ** tick) +
+calculate_token_amounts) that stellaswap_store_raw_data used before.
+
+The end-to-end columns start from the subgraph position dicts, so they
+include the string -> number parsing every real cycle pays; "compute only"
+times just the math on already-parsed ticks and liquidity. The multi-pool column
+spreads the same positions over 100 pools and sums them with one
+pools_token_amounts() call.
+
+Usage:
+  python benchmarks/bench_clmm_math.py                  # 1k, 10k, 100k positions
+  python benchmarks/bench_clmm_math.py --sizes 1000 --repeat 5
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+for var in ('API_KEY', 'DB_USERNAME', 'DB_PASSWORD', 'DB_NAME'):
+    os.environ.setdefault(var, 'bench')
+
+import clmm_math  # noqa: E402
+from stellaswap_store_raw_data import calculate_token_amounts  # noqa: E402
+
+N_POOLS = 100
+
+
+def make_positions(n, sqrt_price, seed=0):
+    rng = np.random.default_rng(seed)
+    lower = rng.integers(-50000, 50000, n)
+    width = rng.integers(10, 20000, n)
+    liquidity = rng.integers(1, 10**12, n) * 10**6
+    pool = {
+        "sqrtPrice": str(int(sqrt_price * 2**96)),
+        "token0": {"decimals": "18"},
+        "token1": {"decimals": "6"},
+    }
+    return [
+        {
+            "tickLower": {"tickIdx": str(int(lo))},
+            "tickUpper": {"tickIdx": str(int(lo + w))},
+            "liquidity": str(int(liq)),
+            "pool": pool,
+        }
+        for lo, w, liq in zip(lower, width, liquidity)
+    ]
+
+
+def scalar_totals(positions):
+    pool = positions[0]["pool"]
+    sqrt_price_current = int(pool["sqrtPrice"]) / (2 ** 96)
+    token0_decimals = int(pool["token0"]["decimals"])
+    token1_decimals = int(pool["token1"]["decimals"])
+    total_amount0, total_amount1 = 0, 0
+    for pos in positions:
+        sqrt_price_low = math.sqrt(1.0001 ** int(pos["tickLower"]["tickIdx"]))
+        sqrt_price_high = math.sqrt(1.0001 ** int(pos["tickUpper"]["tickIdx"]))
+        amount0, amount1 = calculate_token_amounts(
+            int(pos["liquidity"]), sqrt_price_current, sqrt_price_low, sqrt_price_high)
+        total_amount0 += amount0 / (10 ** token0_decimals)
+        total_amount1 += amount1 / (10 ** token1_decimals)
+    return total_amount0, total_amount1
+
+
+def scalar_compute(tick_lower, tick_upper, liquidity, sqrt_price_current):
+    total_amount0, total_amount1 = 0, 0
+    for lo, hi, liq in zip(tick_lower, tick_upper, liquidity):
+        amount0, amount1 = calculate_token_amounts(
+            liq, sqrt_price_current, math.sqrt(1.0001 ** lo), math.sqrt(1.0001 ** hi))
+        total_amount0 += amount0
+        total_amount1 += amount1
+    return total_amount0, total_amount1
+
+
+def vector_compute(tick_lower, tick_upper, liquidity, sqrt_price_current):
+    amount0, amount1 = clmm_math.token_amounts(
+        liquidity, sqrt_price_current,
+        clmm_math.tick_to_sqrt_price(tick_lower), clmm_math.tick_to_sqrt_price(tick_upper))
+    return amount0.sum(), amount1.sum()
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vs scalar concentrated-liquidity amounts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("End to end = from subgraph position dicts; compute only = from pre-parsed ticks/liquidity")
+    print(f"{'positions':>9} | {'scalar pos/s':>13} | {'vector pos/s':>13} {'speedup':>7} | "
+          f"{'100-pool pos/s':>14} {'speedup':>7} | {'compute only':>12} | max rel err")
+    for n in args.sizes:
+        positions = make_positions(n, 1.2)
+        per_pool = max(1, n // N_POOLS)
+        pools = {f"p{i}": positions[i * per_pool:(i + 1) * per_pool] for i in range(N_POOLS)}
+
+        scalar_t, expected = best_of(lambda: scalar_totals(positions), args.repeat)
+        vector_t, got = best_of(lambda: clmm_math.pool_token_amounts(positions), args.repeat)
+        multi_t, _ = best_of(lambda: clmm_math.pools_token_amounts(pools), args.repeat)
+
+        arrays = clmm_math.positions_to_arrays(positions)
+        parsed = [[int(v) for v in a] for a in arrays]
+        scalar_c, _ = best_of(lambda: scalar_compute(*parsed, 1.2), args.repeat)
+        vector_c, _ = best_of(lambda: vector_compute(*arrays, 1.2), args.repeat)
+
+        err = max(abs(g - e) / abs(e) for g, e in zip(got, expected) if e)
+        print(f"{n:>9} | {n / scalar_t:>13,.0f} | {n / vector_t:>13,.0f} {scalar_t / vector_t:6.1f}x | "
+              f"{n / multi_t:>14,.0f} {scalar_t / multi_t:6.1f}x | {scalar_c / vector_c:11.1f}x | {err:.1e}")
+
+if __name__ == "__main__":
+    main()
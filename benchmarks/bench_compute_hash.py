@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# bench_compute_hash.py
+"""
+Micro-benchmark: CPU time and peak memory of the dedup hash,
+DataValidator.compute_hash (StreamingHasher) against what it did before
+(sha256 of one json.dumps(sort_keys=True, default=str) string).
+
+"payload" is a run_merge-shaped dict of record lists (digests must match).
+"frames" is the Bifrost cycle: two sanitized DataFrames, hashed before as
+{"df1": df1.to_dict('records'), ...} and now directly through the
+hash_pandas_object fast path (different digest by design, so "same" is n/a).
+Peak memory is measured with tracemalloc, in a separate run from the timing.
+
+Usage:
+  python benchmarks/bench_compute_hash.py
+  python benchmarks/bench_compute_hash.py --rows 500000 --repeat 5
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+from utils import DataValidator  # noqa: E402
+
+
+def make_records(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    base = datetime.datetime(2026, 10, 17)
+    return [
+        {"symbol": f"T{s}", "apy": float(a), "tvl": float(t), "volume": None if i % 5 == 0 else float(t) / 3,
+         "price": float(p), "chain": "hydration", "created_at": base + datetime.timedelta(seconds=i)}
+        for i, (s, a, t, p) in enumerate(zip(rng.integers(0, 500, n_rows), rng.random(n_rows) * 100,
+                                             rng.random(n_rows) * 1e7, rng.random(n_rows) * 50))
+    ]
+
+
+def legacy_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def legacy_frames_hash(df1, df2):
+    return legacy_hash({"df1": df1.to_dict('records'), "df2": df2.to_dict('records')})
+
+
+def cpu_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dedup hash: streaming vs one json.dumps string")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+    payload = {"hydration_data": records, "bifrost_site_data": records[: args.rows // 4],
+               "batch_id_hydration": 1760684400, "combined_created_at": "2026-10-17T09:00:00"}
+    df1 = pd.DataFrame(records[: args.rows // 2])
+    df2 = pd.DataFrame(records[args.rows // 2:])
+
+    cases = [
+        ("payload", lambda: legacy_hash(payload), lambda: DataValidator.compute_hash(payload), True),
+        ("frames", lambda: legacy_frames_hash(df1, df2),
+         lambda: DataValidator.compute_hash({"df1": df1, "df2": df2}), False),
+    ]
+    print(f"{'input':<7} | {'rows':>9} | {'old cpu ms':>10} | {'new cpu ms':>10} {'speedup':>7} | "
+          f"{'old peak MB':>11} | {'new peak MB':>11} | same")
+    for name, old, new, comparable in cases:
+        same = (old() == new()) if comparable else "n/a"
+        old_t = cpu_time(old, args.repeat)
+        new_t = cpu_time(new, args.repeat)
+        old_mb = peak_memory(old) / 2**20
+        new_mb = peak_memory(new) / 2**20
+        print(f"{name:<7} | {args.rows:>9,} | {old_t * 1000:>10.0f} | {new_t * 1000:>10.0f} "
+              f"{old_t / max(new_t, 1e-9):6.1f}x | {old_mb:>11.1f} | {new_mb:>11.1f} | {same}")
+
+
+if __name__ == "__main__":
+    main()
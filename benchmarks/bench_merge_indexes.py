@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# bench_merge_indexes.py
+"""
+Benchmark: read latency of the merge job's "latest batch" queries
+(SQL_DB_MergeTables Q_*_DATA / Q_*_META) on large source tables, before
+and after db_migration/migration_2.py adds the (batch_id) and
+(created_at, batch_id) indexes.
+
+Needs a MySQL 8 server (credentials from CAO/.env). Everything happens in
+a scratch database (default <DB_NAME>_bench) that is created, filled with
+synthetic hourly batches and dropped afterwards (unless --keep); the real
+tables are never touched.
+
+Usage:
+  python benchmarks/bench_merge_indexes.py                       # 1M rows per table
+  python benchmarks/bench_merge_indexes.py --rows 3000000 --batch-rows 40 --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import mysql.connector
+from dotenv import load_dotenv
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+from SQL_DB import SQL_DB  # noqa: E402
+from SQL_DB_hydration import SQL_DB_Hydration  # noqa: E402
+from SQL_DB_hydration_price import SQL_DB_Hydration_Price  # noqa: E402
+from SQL_DB_stella import SQL_DB_Stella  # noqa: E402
+from SQL_DB_mergeTables import SQL_DB_MergeTables as M  # noqa: E402
+from db_migration import migration_2  # noqa: E402
+from db_pool import close_all_pools  # noqa: E402
+
+# table -> column that carries the asset symbol (used by the Bifrost joins)
+SYMBOL_COLUMNS = {
+    "hydration_data": "symbol",
+    "pool_data": "symbol",
+    "Hydration_price": "symbol",
+    "Bifrost_site_table": "Asset",
+    "Bifrost_staking_table": "symbol",
+}
+
+QUERIES = [
+    ("bifrost data", M.Q_BIFROST_DATA),
+    ("pools data", M.Q_POOLS_DATA),
+    ("hydration data", M.Q_HYDRATION_DATA),
+    ("hydration price", M.Q_HYDRATION_PRICE_DATA),
+    ("bifrost x hydration", M.Q_BIFROST_HYDRATION_COMBINED),
+    ("bifrost meta", M.Q_BIFROST_META),
+    ("pools meta", M.Q_POOLS_META),
+    ("hydration meta", M.Q_HYDRATION_META),
+    ("hydration price meta", M.Q_HYDRATION_PRICE_META),
+]
+
+FILL_CHUNK = 200_000
+
+
+def create_tables(cfg):
+    SQL_DB(db_config=cfg, initializeTable=True)
+    args = dict(userName=cfg['user'], passWord=cfg['password'], host=cfg['host'],
+                dataBase=cfg['database'], db_port=cfg['port'], initializeTable=True)
+    SQL_DB_Hydration(**args)
+    SQL_DB_Hydration_Price(**args)
+    SQL_DB_Stella(**args)
+
+
+def drop_bench_indexes(cursor):
+    for table in SYMBOL_COLUMNS:
+        cursor.execute(
+            "SELECT DISTINCT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,)
+        )
+        have = {row[0] for row in cursor.fetchall()}
+        for name, _ in migration_2.INDEXES:
+            if name in have:
+                cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+
+
+def fill(cnx, rows, batch_rows):
+    """rows synthetic rows per table: one batch of batch_rows assets per hour."""
+    cur = cnx.cursor()
+    cur.execute(f"SET SESSION cte_max_recursion_depth = {FILL_CHUNK + 1}")
+    for table, symbol_col in SYMBOL_COLUMNS.items():
+        cur.execute(f"TRUNCATE TABLE {table}")
+        start = time.perf_counter()
+        for offset in range(0, rows, FILL_CHUNK):
+            n = min(FILL_CHUNK, rows - offset)
+            cur.execute(f"""
+                INSERT INTO {table} (batch_id, {symbol_col}, created_at)
+                WITH RECURSIVE seq (n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n < {n - 1})
+                SELECT 1600000000 + ((n + {offset}) DIV {batch_rows}) * 3600,
+                       CONCAT('T', (n + {offset}) MOD {batch_rows}),
+                       TIMESTAMP('2020-09-13 12:00:00') + INTERVAL ((n + {offset}) DIV {batch_rows}) HOUR
+                FROM seq
+            """)
+            cnx.commit()
+        print(f"  filled {table}: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+    cur.close()
+
+
+def time_queries(cnx, repeat):
+    cur = cnx.cursor()
+    timings = {}
+    for name, query in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cur.execute(query)
+            cur.fetchall()
+            samples.append(time.perf_counter() - start)
+        timings[name] = statistics.median(samples)
+    cur.close()
+    return timings
+
+
+def explain(cnx, query):
+    cur = cnx.cursor(dictionary=True)
+    cur.execute("EXPLAIN " + query)
+    plan = cur.fetchall()
+    cur.close()
+    return "; ".join(
+        f"{r['table']}: type={r['type']} key={r['key']} rows={r['rows']} {r.get('Extra') or ''}".strip()
+        for r in plan
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge query latency before/after migration_2 indexes")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows per source table")
+    parser.add_argument("--batch-rows", type=int, default=40, help="rows per hourly batch")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database", help="scratch database (default <DB_NAME>_bench)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    load_dotenv(os.path.join(cao_dir, '.env'))
+    cfg = dict(
+        user=os.getenv("DB_USERNAME"), password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST", "127.0.0.1"), port=int(os.getenv("DB_PORT", 3306)),
+    )
+    cfg['database'] = args.database or f"{os.getenv('DB_NAME')}_bench"
+    if cfg['database'] == os.getenv("DB_NAME"):
+        parser.error("--database must not be the production database")
+
+    server = mysql.connector.connect(user=cfg['user'], password=cfg['password'], host=cfg['host'], port=cfg['port'])
+    server.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{cfg['database']}`")
+    try:
+        print(f"Scratch database {cfg['database']}: {args.rows:,} rows per table, {args.batch_rows} rows per batch")
+        create_tables(cfg)
+        cnx = mysql.connector.connect(**cfg)
+        cur = cnx.cursor()
+        drop_bench_indexes(cur)
+        cur.close()
+        fill(cnx, args.rows, args.batch_rows)
+
+        print("\nBefore indexes:", explain(cnx, M.Q_POOLS_META))
+        before = time_queries(cnx, args.repeat)
+
+        start = time.perf_counter()
+        added = migration_2.add_indexes(cnx)
+        print(f"\nmigration_2 added {len(added)} indexes in {time.perf_counter() - start:.1f}s")
+        print("After indexes: ", explain(cnx, M.Q_POOLS_META))
+        after = time_queries(cnx, args.repeat)
+        cnx.close()
+
+        print(f"\n{'query':<22} | {'before ms':>10} | {'after ms':>10} | speedup")
+        for name, _ in QUERIES:
+            print(f"{name:<22} | {before[name] * 1000:>10.1f} | {after[name] * 1000:>10.1f} | "
+                  f"{before[name] / max(after[name], 1e-9):6.0f}x")
+        total_before, total_after = sum(before.values()), sum(after.values())
+        print(f"{'merge read total':<22} | {total_before * 1000:>10.1f} | {total_after * 1000:>10.1f} | "
+              f"{total_before / max(total_after, 1e-9):6.0f}x")
+    finally:
+        close_all_pools()
+        if not args.keep:
+            server.cursor().execute(f"DROP DATABASE IF EXISTS `{cfg['database']}`")
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# bench_merge_json.py
+"""
+Micro-benchmark: CPU time and peak memory of turning merge cursor rows into
+JSON-safe records, SQL_DB_MergeTables._rows_to_json_array (one pass over the
+tuples) against the pandas path run_merge used before (DataFrame -> replace
+inf -> astype(object) -> where(notna) -> applymap(_sanitize_scalar) ->
+to_dict(records) -> _deep_clean, plus the _deep_clean of the whole payload).
+
+Rows are synthetic cursor tuples shaped like the merge queries: Decimal
+columns (DECIMAL(20,6) values), floats with some NaN/inf, strings, ints and
+NULLs. "wide" is few rows with many columns, "long" many rows with the
+merge's usual ~10 columns. Peak memory is measured with tracemalloc, in a
+separate run from the timing.
+
+Usage:
+  python benchmarks/bench_merge_json.py
+  python benchmarks/bench_merge_json.py --long-rows 500000 --repeat 5
+"""
+
+import argparse
+import decimal
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+for var in ('API_KEY', 'DB_USERNAME', 'DB_PASSWORD', 'DB_NAME'):
+    os.environ.setdefault(var, 'bench')
+
+from SQL_DB_mergeTables import SQL_DB_MergeTables  # noqa: E402
+
+# column kinds, cycled to the requested width
+KINDS = ("str", "decimal", "decimal", "float", "int", "decimal", "float", "null_decimal", "decimal", "str")
+
+
+def make_rows(n_rows, n_cols, seed=0):
+    rng = np.random.default_rng(seed)
+    kinds = [KINDS[i % len(KINDS)] for i in range(n_cols)]
+    columns = [f"{kind}_{i}" for i, kind in enumerate(kinds)]
+    cols = []
+    for kind in kinds:
+        if kind == "str":
+            cols.append([f"T{v}" for v in rng.integers(0, 500, n_rows)])
+        elif kind == "int":
+            cols.append(rng.integers(0, 10**9, n_rows).tolist())
+        elif kind == "float":
+            values = rng.random(n_rows) * 1e4
+            values[rng.random(n_rows) < 0.05] = np.nan
+            values[rng.random(n_rows) < 0.01] = np.inf
+            cols.append(values.tolist())
+        else:
+            values = [decimal.Decimal(f"{v:.6f}") for v in rng.random(n_rows) * 1e6]
+            if kind == "null_decimal":
+                values = [None if i % 3 == 0 else v for i, v in enumerate(values)]
+            cols.append(values)
+    return columns, list(zip(*cols))
+
+
+def pandas_path(db, columns, rows):
+    df = pd.DataFrame(rows, columns=columns)
+    if df.empty:
+        return []
+    df = df.replace([np.inf, -np.inf], np.nan)
+    df = df.astype(object)
+    df = df.where(pd.notna(df), None)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        df = df.applymap(db._sanitize_scalar)
+    records = df.to_dict(orient='records')
+    records = db._deep_clean(records)
+    # run_merge then deep-cleaned the whole payload once more
+    return db._deep_clean(records)
+
+
+def cursor_path(db, columns, rows):
+    return db._rows_to_json_array(columns, rows)
+
+
+def cpu_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cursor rows -> JSON records: single pass vs pandas")
+    parser.add_argument("--wide-rows", type=int, default=2000)
+    parser.add_argument("--wide-cols", type=int, default=80)
+    parser.add_argument("--long-rows", type=int, default=200_000)
+    parser.add_argument("--long-cols", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db = SQL_DB_MergeTables(userName='bench', passWord='bench', host='localhost', dataBase='bench', port=3306)
+    shapes = [("wide", args.wide_rows, args.wide_cols), ("long", args.long_rows, args.long_cols)]
+
+    print(f"{'table':<5} | {'rows x cols':>13} | {'pandas cpu ms':>13} | {'cursor cpu ms':>13} {'speedup':>7} | "
+          f"{'pandas peak MB':>14} | {'cursor peak MB':>14} | same")
+    for name, n_rows, n_cols in shapes:
+        columns, rows = make_rows(n_rows, n_cols)
+        old = pandas_path(db, columns, rows)
+        new = cursor_path(db, columns, rows)
+        same = old == new
+        del old, new
+
+        old_t = cpu_time(lambda: pandas_path(db, columns, rows), args.repeat)
+        new_t = cpu_time(lambda: cursor_path(db, columns, rows), args.repeat)
+        old_mb = peak_memory(lambda: pandas_path(db, columns, rows)) / 2**20
+        new_mb = peak_memory(lambda: cursor_path(db, columns, rows)) / 2**20
+        print(f"{name:<5} | {f'{n_rows:,} x {n_cols}':>13} | {old_t * 1000:>13.0f} | {new_t * 1000:>13.0f} "
+              f"{old_t / max(new_t, 1e-9):6.1f}x | {old_mb:>14.1f} | {new_mb:>14.1f} | {same}")
+
+
+if __name__ == "__main__":
+    main()
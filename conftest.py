@@ -0,0 +1,16 @@
+"""
+Root pytest fixtures, shared by the top-level test_*.py files and tests/.
+"""
+
+import sys
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_connection_pools():
+    """Drop shared pooled connections (db_pool) so mocked connections never leak between tests or files."""
+    yield
+    db_pool = sys.modules.get("db_pool")
+    if db_pool is not None:
+        db_pool.close_all_pools()
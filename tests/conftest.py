@@ -157,6 +157,12 @@ def setup_test_db(test_db_config):
         pytest.fail(f"Failed to setup test database: {e}")
 
 
+@pytest.fixture(autouse=True)
+def isolated_http_cache(tmp_path, monkeypatch):
+    """Keep the fetchers' on-disk HTTP response cache (http_cache.py) inside the test's tmp dir."""
+    monkeypatch.setenv("HTTP_CACHE_DIR", str(tmp_path / "http_cache"))
+
+
 @pytest.fixture
 def mock_db_connection():
     """Mock MySQL connection object."""
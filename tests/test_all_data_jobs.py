@@ -39,12 +39,39 @@ class TestAllDataJobs(unittest.TestCase):
         self.assertEqual(mock_popen.call_count, 1)
         mock_popen.assert_called_with([sys.executable, 'mock.py'], cwd=str(all_data_jobs.BASE_DIR))
 
+    def test_orchestrator_fetch_mode(self):
+        self.assertEqual(JobOrchestrator(fetch_mode='async').scripts, [all_data_jobs.FETCH_ENGINE_SCRIPT])
+        self.assertEqual(len(JobOrchestrator(fetch_mode='subprocess').scripts), 4)
+        with patch.dict(os.environ, {'FETCH_MODE': 'ASYNC'}):
+            self.assertEqual(JobOrchestrator().scripts, [all_data_jobs.FETCH_ENGINE_SCRIPT])
+        with self.assertRaises(ValueError):
+            JobOrchestrator(fetch_mode='threads')
+
     @patch('all_data_jobs.subprocess.run')
     def test_orchestrator_run_merge(self, mock_run):
         orch = JobOrchestrator(merge_script='merge.py')
         orch.run_merge_script()
         mock_run.assert_called_with([sys.executable, 'merge.py'], cwd=str(all_data_jobs.BASE_DIR), check=True)
 
+    @patch('all_data_jobs.subprocess.run')
+    def test_orchestrator_run_maintenance(self, mock_run):
+        orch = JobOrchestrator(maintenance_script='maintain.py')
+        orch.run_maintenance_script()
+        mock_run.assert_called_with([sys.executable, 'maintain.py'], cwd=str(all_data_jobs.BASE_DIR), check=True)
+
+    @patch('all_data_jobs.initialize_tables')
+    @patch('all_data_jobs.JobOrchestrator.start_long_running_scripts')
+    @patch('all_data_jobs.JobOrchestrator.stop_all')
+    @patch('all_data_jobs.JobOrchestrator.run_merge_script')
+    @patch('all_data_jobs.JobOrchestrator.run_maintenance_script')
+    @patch('all_data_jobs.HealthMonitor.check_db_connection', return_value=True)
+    def test_maintenance_interval(self, mock_health, mock_maint, mock_merge, mock_stop, mock_start, mock_init):
+        with patch('all_data_jobs.time.sleep'):
+            JobOrchestrator().run(max_iterations=2, maintenance_interval_sec=86400)
+            self.assertEqual(mock_maint.call_count, 1)
+            JobOrchestrator().run(max_iterations=2, maintenance_interval_sec=0)
+            self.assertEqual(mock_maint.call_count, 1)
+
     @patch('all_data_jobs.initialize_tables')
     def test_orchestrator_stop_logic(self, mock_init):
         mock_p1 = MagicMock()
@@ -8,6 +8,7 @@ import unittest
 from unittest.mock import MagicMock, patch
 import sys
 import os
+import time
 import pandas as pd
 
 # Setup path and environment
@@ -96,5 +97,59 @@ class TestMain(unittest.TestCase):
         self.assertTrue(mock_db_instance.update_bifrost_database.called)
 
 
+
+class TestConcurrentFetchAndBackoff(unittest.TestCase):
+    """Test the concurrent site/staking fetch and the retry backoff."""
+
+    def test_site_and_staking_fetched_concurrently(self):
+        def slow(df):
+            def fetch(session=None, responses=None):
+                time.sleep(0.2)
+                return df
+            return fetch
+
+        site, staking = pd.DataFrame({'Asset': ['DOT']}), pd.DataFrame({'symbol': ['vDOT']})
+        with patch('Bifrost_Data_fetching.fetch_data', side_effect=slow(site)), \
+             patch('Bifrost_Data_fetching.fetch_data2', side_effect=slow(staking)):
+            start = time.perf_counter()
+            frames = Bifrost_Data_fetching.fetch_site_and_staking()
+            elapsed = time.perf_counter() - start
+
+        self.assertIs(frames[0], site)
+        self.assertIs(frames[1], staking)
+        self.assertLess(elapsed, 0.35)
+
+    @patch('Bifrost_Data_fetching.fetch_data2', return_value=pd.DataFrame({'symbol': ['vDOT']}))
+    @patch('Bifrost_Data_fetching.fetch_data', return_value=None)
+    def test_failed_endpoint_skips_store(self, mock_fetch1, mock_fetch2):
+        db = MagicMock()
+        self.assertFalse(Bifrost_Data_fetching.collect_once(db))
+        db.update_bifrost_database.assert_not_called()
+
+    def test_retry_delay_is_bounded(self):
+        with patch.dict(os.environ, {'BIFROST_RETRY_DELAY': '30', 'BIFROST_RETRY_MAX_DELAY': '100'}):
+            delays = [Bifrost_Data_fetching.retry_delay(n) for n in range(1, 6)]
+        self.assertEqual(delays, [30, 60, 100, 100, 100])
+
+    @patch('Bifrost_Data_fetching.connect_db')
+    @patch('Bifrost_Data_fetching.fetch_data2', side_effect=ConnectionError('down'))
+    @patch('Bifrost_Data_fetching.fetch_data', side_effect=ConnectionError('down'))
+    def test_outage_backs_off_instead_of_hot_looping(self, mock_fetch1, mock_fetch2, mock_connect):
+        sleeps = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 3:
+                raise KeyboardInterrupt
+
+        with patch('Bifrost_Data_fetching.time.sleep', side_effect=fake_sleep), \
+             patch.dict(os.environ, {'BIFROST_RETRY_DELAY': '30', 'BIFROST_RETRY_MAX_DELAY': '900'}):
+            with self.assertRaises(KeyboardInterrupt):
+                Bifrost_Data_fetching.run_pipeline()
+
+        self.assertEqual(sleeps, [30, 60, 120])
+        self.assertEqual(mock_fetch1.call_count, 3)
+
+
 if __name__ == '__main__':
     unittest.main()
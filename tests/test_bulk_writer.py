@@ -0,0 +1,168 @@
+"""
+Tests for bulk_writer.py module.
+
+Tests column-wise parameter building, chunked multi-row INSERT generation
+and single-transaction batch writes used by the SQL_DB_* writers.
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import pandas as pd
+import numpy as np
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+from bulk_writer import BulkWriter, build_rows, write_batch
+from db_pool import ConnectionPool
+from SQL_DB_hydration import SQL_DB_Hydration
+from SQL_DB_hydration_price import SQL_DB_Hydration_Price
+from SQL_DB_stella import SQL_DB_Stella
+
+
+class TestBuildRows(unittest.TestCase):
+    """Test parameter tuple construction."""
+
+    def test_records_and_dataframe_match(self):
+        """Test that records and the equivalent DataFrame give the same rows."""
+        records = [
+            {'a': 1, 'b': 'x', 'c': 1.5},
+            {'a': 2, 'b': None, 'c': float('nan')},
+        ]
+        from_records = build_rows(records, ['a', 'b', 'c'], leading=(9,))
+        from_df = build_rows(pd.DataFrame(records), ['a', 'b', 'c'], leading=(9,))
+
+        self.assertEqual(from_records, [(9, 1, 'x', 1.5), (9, 2, None, None)])
+        self.assertEqual(from_df, from_records)
+
+    def test_special_values(self):
+        """Test NaN/inf/NA/numpy/list conversion."""
+        records = [{'v': np.float64(2.5)}, {'v': np.inf}, {'v': pd.NA}, {'v': [1, 2]}, {'v': np.int64(3)}]
+        rows = build_rows(records, ['v'])
+
+        self.assertEqual(rows, [(2.5,), (None,), (None,), ('[1, 2]',), (3,)])
+        self.assertIs(type(rows[4][0]), int)
+
+    def test_missing_column_is_null(self):
+        """Test that schema columns absent from the data become NULL."""
+        self.assertEqual(build_rows([{'a': 1}], ['a', 'b']), [(1, None)])
+        self.assertEqual(build_rows(pd.DataFrame({'a': [1]}), ['a', 'b']), [(1, None)])
+
+
+class TestBulkWriter(unittest.TestCase):
+    """Test chunked INSERT statements."""
+
+    def test_chunking(self):
+        """Test that rows are split into chunk_size multi-row INSERTs."""
+        writer = BulkWriter('t', ['a'], leading_columns=['batch_id'], chunk_size=2)
+        stmts = list(writer.statements([{'a': i} for i in range(5)], leading=(7,)))
+
+        self.assertEqual(len(stmts), 3)
+        self.assertEqual(stmts[0][0], 'INSERT INTO t (batch_id, a) VALUES (%s, %s), (%s, %s)')
+        self.assertEqual(stmts[0][1], [7, 0, 7, 1])
+        self.assertEqual(stmts[2][0], 'INSERT INTO t (batch_id, a) VALUES (%s, %s)')
+        self.assertEqual(stmts[2][1], [7, 4])
+
+    def test_values_never_in_sql(self):
+        """Test that string values are parameters, not SQL text."""
+        writer = BulkWriter('t', ['s'])
+        sql, params = next(writer.statements([{'s': "x'); DROP TABLE t; --"}]))
+        self.assertNotIn('DROP', sql)
+        self.assertEqual(params, ["x'); DROP TABLE t; --"])
+
+    def test_upsert(self):
+        """Test that update_columns turns the INSERT into an upsert."""
+        writer = BulkWriter('t', ['k', 'v'], update_columns=['v'])
+        self.assertEqual(writer.insert_sql(2), 'INSERT INTO t (k, v) VALUES (%s, %s), (%s, %s) '
+                                               'ON DUPLICATE KEY UPDATE v = VALUES(v)')
+
+    @patch.dict(os.environ, {'DB_BULK_CHUNK_SIZE': '3'})
+    def test_chunk_size_from_env(self):
+        """Test that DB_BULK_CHUNK_SIZE configures the chunk size."""
+        self.assertEqual(BulkWriter('t', ['a']).chunk_size, 3)
+
+
+class TestWriteBatch(unittest.TestCase):
+    """Test single-transaction batch writes."""
+
+    @patch('mysql.connector.connect')
+    def test_commit_once(self, mock_connect):
+        """Test that all writers share one connection and one commit."""
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306)
+        w1 = BulkWriter('t1', ['a'], chunk_size=1)
+        w2 = BulkWriter('t2', ['b'])
+
+        n = write_batch(pool, [(w1, [{'a': 1}, {'a': 2}], ()), (w2, [{'b': 3}], ())])
+
+        self.assertEqual(n, 3)
+        self.assertEqual(mock_connect.return_value.cursor.return_value.execute.call_count, 3)
+        self.assertEqual(mock_connect.return_value.commit.call_count, 1)
+
+    @patch('mysql.connector.connect')
+    def test_rollback_on_error(self, mock_connect):
+        """Test that a failing chunk rolls back the batch and re-raises."""
+        mock_connect.return_value.cursor.return_value.execute.side_effect = [None, RuntimeError("fail")]
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306)
+        writer = BulkWriter('t', ['a'], chunk_size=1)
+
+        with self.assertRaises(RuntimeError):
+            write_batch(pool, [(writer, [{'a': 1}, {'a': 2}], ())])
+
+        mock_connect.return_value.commit.assert_not_called()
+        mock_connect.return_value.rollback.assert_called()
+
+
+class TestWriters(unittest.TestCase):
+    """Test the SQL_DB_* writers built on BulkWriter."""
+
+    @patch('mysql.connector.connect')
+    def test_hydration_prices_with_batch_row(self, mock_connect):
+        """Test that prices and the batch hash row are written in one transaction."""
+        cursor = mock_connect.return_value.cursor.return_value
+        db = SQL_DB_Hydration_Price(userName='u', passWord='p', host='h', dataBase='d', db_port=3306)
+
+        db.update_hydration_prices(
+            [{'asset_id': '0', 'symbol': 'HDX', 'price_usdt': 0.01, 'extra': 1}], 55, data_hash='abc'
+        )
+
+        calls = cursor.execute.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[0][0], ('INSERT INTO Hydration_price (batch_id, asset_id, symbol, price_usdt) '
+                                       'VALUES (%s, %s, %s, %s)', [55, '0', 'HDX', 0.01]))
+        self.assertEqual(calls[1][0][1], [55, 'abc'])
+        self.assertIn('INSERT INTO latest_batch', calls[2][0][0])
+        self.assertEqual(calls[2][0][1], ['Hydration_price', 55, 1, 'abc'])
+        self.assertEqual(mock_connect.return_value.commit.call_count, 1)
+
+    @patch('mysql.connector.connect')
+    def test_hydration_chunked(self, mock_connect):
+        """Test that hydration_data honours chunk_size."""
+        cursor = mock_connect.return_value.cursor.return_value
+        db = SQL_DB_Hydration(userName='u', passWord='p', host='h', dataBase='d', db_port=3306, chunk_size=2)
+
+        db.update_hydration_database([{'asset_id': str(i), 'symbol': 'S'} for i in range(5)], 1)
+
+        # 3 chunks + the latest_batch upsert
+        self.assertEqual(cursor.execute.call_count, 4)
+        self.assertEqual(mock_connect.return_value.commit.call_count, 1)
+
+    @patch('mysql.connector.connect')
+    def test_pool_data_columns_by_name(self, mock_connect):
+        """Test that pool_data values are mapped by column name, not dict order."""
+        cursor = mock_connect.return_value.cursor.return_value
+        db = SQL_DB_Stella(userName='u', passWord='p', dataBase='d', host='h', db_port=3306)
+
+        db.update_pool_database([{'timestamp': 'ts', 'pool_id': 'p1'}], 9)
+
+        params = cursor.execute.call_args_list[0][0][1]
+        self.assertEqual(params[:2], [9, 'p1'])
+        self.assertEqual(params[-1], 'ts')
+
+
+if __name__ == '__main__':
+    unittest.main()
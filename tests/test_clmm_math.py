@@ -0,0 +1,123 @@
+"""
+Tests for clmm_math.py module.
+
+Tests that the vectorized concentrated-liquidity amounts match the scalar
+calculate_token_amounts, per pool, across many pools and over streamed pages.
+"""
+
+import unittest
+import sys
+import os
+import math
+import numpy as np
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+os.environ.setdefault('API_KEY', 'test_key')
+os.environ.setdefault('DB_USERNAME', 'test_user')
+os.environ.setdefault('DB_PASSWORD', 'test_pass')
+os.environ.setdefault('DB_NAME', 'test_db')
+
+import clmm_math
+from stellaswap_store_raw_data import calculate_token_amounts
+
+
+def _positions(n, sqrt_price, decimals0=18, decimals1=6, seed=0):
+    rng = np.random.default_rng(seed)
+    lower = rng.integers(-50000, 50000, n)
+    width = rng.integers(-2000, 20000, n)  # some ranges are given upper < lower
+    liquidity = rng.integers(1, 10**12, n) * 10**6
+    pool = {
+        "sqrtPrice": str(int(sqrt_price * 2**96)),
+        "token0": {"decimals": str(decimals0)},
+        "token1": {"decimals": str(decimals1)},
+    }
+    return [
+        {
+            "tickLower": {"tickIdx": str(int(lo))},
+            "tickUpper": {"tickIdx": str(int(lo + w))},
+            "liquidity": str(int(liq)),
+            "pool": pool,
+        }
+        for lo, w, liq in zip(lower, width, liquidity)
+    ]
+
+
+def _scalar_totals(positions):
+    pool = positions[0]["pool"]
+    current = int(pool["sqrtPrice"]) / 2**96
+    total0 = total1 = 0
+    for pos in positions:
+        a0, a1 = calculate_token_amounts(
+            int(pos["liquidity"]), current,
+            math.sqrt(1.0001 ** int(pos["tickLower"]["tickIdx"])),
+            math.sqrt(1.0001 ** int(pos["tickUpper"]["tickIdx"])),
+        )
+        total0 += a0 / 10 ** int(pool["token0"]["decimals"])
+        total1 += a1 / 10 ** int(pool["token1"]["decimals"])
+    return total0, total1
+
+
+class TestTokenAmounts(unittest.TestCase):
+    """Test element-wise amounts against the scalar formula."""
+
+    def test_matches_scalar_per_position(self):
+        current = 1.3
+        low = np.array([0.5, 1.0, 1.4, 2.0, 1.3])
+        high = np.array([1.0, 2.0, 1.8, 0.9, 1.3])  # includes a swapped range and a zero-width one
+        liquidity = np.array([1e9, 2e12, 3e6, 4e15, 5.0])
+
+        amount0, amount1 = clmm_math.token_amounts(liquidity, current, low, high)
+
+        for i in range(len(low)):
+            e0, e1 = calculate_token_amounts(liquidity[i], current, low[i], high[i])
+            self.assertTrue(math.isclose(amount0[i], e0, rel_tol=1e-12, abs_tol=1e-9))
+            self.assertTrue(math.isclose(amount1[i], e1, rel_tol=1e-12, abs_tol=1e-9))
+
+    def test_tick_to_sqrt_price(self):
+        ticks = [-887272, -1000, 0, 1000, 887272]
+        expected = [math.sqrt(1.0001 ** t) for t in ticks]
+        np.testing.assert_allclose(clmm_math.tick_to_sqrt_price(ticks), expected, rtol=1e-12)
+
+
+class TestPoolTotals(unittest.TestCase):
+    """Test per-pool and multi-pool aggregation."""
+
+    def test_pool_matches_scalar(self):
+        positions = _positions(500, 1.7)
+        total0, total1 = clmm_math.pool_token_amounts(positions)
+        e0, e1 = _scalar_totals(positions)
+        self.assertTrue(math.isclose(total0, e0, rel_tol=1e-9))
+        self.assertTrue(math.isclose(total1, e1, rel_tol=1e-9))
+
+    def test_many_pools_one_pass(self):
+        pools = {
+            "a": _positions(300, 0.8, seed=1),
+            "b": _positions(5, 2.5, decimals0=6, decimals1=18, seed=2),
+            "empty": [],
+            "c": _positions(1000, 1.0, seed=3),
+        }
+        totals = clmm_math.pools_token_amounts(pools)
+
+        self.assertIsNone(totals["empty"])
+        for pool_id in ("a", "b", "c"):
+            expected = _scalar_totals(pools[pool_id])
+            for got, want in zip(totals[pool_id], expected):
+                self.assertTrue(math.isclose(got, want, rel_tol=1e-9), pool_id)
+
+    def test_stream_equals_whole(self):
+        positions = _positions(250, 1.1)
+        pages = [positions[i:i + 100] for i in range(0, 250, 100)]
+        streamed = clmm_math.stream_token_amounts(iter(pages))
+        whole = clmm_math.pool_token_amounts(positions)
+        for got, want in zip(streamed, whole):
+            self.assertTrue(math.isclose(got, want, rel_tol=1e-12))
+        self.assertIsNone(clmm_math.stream_token_amounts(iter([[]])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,9 +19,10 @@ import combine_tables
 class TestCombineTables(unittest.TestCase):
     """Test combine_tables script."""
     
+    @patch('combine_tables.SQL_DB_Rollups')
     @patch('combine_tables.SQL_DB_CombinedTables')
     @patch('combine_tables.load_dotenv')
-    def test_run_logic(self, mock_load_dotenv, mock_sql_db):
+    def test_run_logic(self, mock_load_dotenv, mock_sql_db, mock_rollups):
         """Test the logic in the script."""
         mock_instance = MagicMock()
         mock_sql_db.return_value = mock_instance
@@ -30,6 +31,18 @@ class TestCombineTables(unittest.TestCase):
         combine_tables.main()
         
         self.assertTrue(mock_instance.run_once.called)
+        self.assertTrue(mock_rollups.return_value.run_once.called)
+
+    @patch('combine_tables.SQL_DB_Rollups')
+    @patch('combine_tables.SQL_DB_CombinedTables')
+    @patch('combine_tables.load_dotenv')
+    def test_rollups_disabled(self, mock_load_dotenv, mock_sql_db, mock_rollups):
+        """ROLLUP_ENABLED=0 only combines."""
+        with patch.dict(os.environ, {'ROLLUP_ENABLED': '0'}):
+            combine_tables.main()
+
+        self.assertTrue(mock_sql_db.return_value.run_once.called)
+        mock_rollups.assert_not_called()
 
 
 if __name__ == '__main__':
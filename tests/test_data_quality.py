@@ -3,6 +3,12 @@ import sys
 import os
 import json
 import time
+import datetime
+import hashlib
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
 
 # Setup path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,7 +16,7 @@ project_root = os.path.dirname(current_dir)
 cao_dir = os.path.join(project_root, 'CAO')
 sys.path.insert(0, cao_dir)
 
-from utils import generate_batch_id, DataValidator
+from utils import generate_batch_id, DataValidator, StreamingHasher
 
 class TestDataQuality(unittest.TestCase):
     def test_generate_batch_id_monotonic(self):
@@ -64,5 +70,58 @@ class TestDataQuality(unittest.TestCase):
         data = [{"price": "abc"}]
         self.assertFalse(DataValidator.validate_positive_floats(data, {'price'}))
 
+class TestStreamingHash(unittest.TestCase):
+    """Test that the streaming hash matches hashing the full json.dumps output."""
+
+    def _legacy(self, data):
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def test_matches_json_dumps(self):
+        records = [{"symbol": f"T{i}", "price": i / 7, "n": i, "at": datetime.datetime(2026, 10, 17, i % 24),
+                    "d": Decimal("1.5"), "none": None, "nested": {"b": [1, {"x": "é"}], "a": []}}
+                   for i in range(500)]
+        payloads = [
+            records,
+            {"z": records, "a": {"inner": records[:3], "empty": {}}, "ts": "2026-10-17T09:00:00", "n": None},
+            [[1, 2], (3, 4), [], {}],
+            {1: "int keys", 2: [{"b": 1}]},
+            "plain", 1.5, None, [],
+        ]
+        for data in payloads:
+            self.assertEqual(DataValidator.compute_hash(data), self._legacy(data))
+
+    def test_list_slices(self):
+        data = {"rows": [{"i": i, "s": "x" * 50} for i in range(100)], "tail": list(range(7))}
+        for size in (1, 3, 100):
+            hasher = StreamingHasher()
+            hasher.LIST_SLICE = size
+            self.assertEqual(hasher.update(data).hexdigest(), self._legacy(data))
+
+    def test_dataframe_fast_path(self):
+        df = pd.DataFrame({"Asset": ["DOT", "KSM"], "apy": [0.15, np.nan], "tvl": [1.0, None]})
+        h = DataValidator.compute_hash({"df1": df, "df2": []})
+
+        self.assertEqual(h, DataValidator.compute_hash({"df1": df.copy(), "df2": []}))
+        changed = df.copy()
+        changed.loc[1, "apy"] = 0.2
+        self.assertNotEqual(h, DataValidator.compute_hash({"df1": changed, "df2": []}))
+        self.assertNotEqual(h, DataValidator.compute_hash({"df1": df.rename(columns={"tvl": "TVL"}), "df2": []}))
+        self.assertNotEqual(h, DataValidator.compute_hash({"df1": df.iloc[::-1].reset_index(drop=True), "df2": []}))
+
+    def test_dataframe_nested_cells_are_canonical(self):
+        """dict / list cells hash by content, not by key order."""
+        a = pd.DataFrame({"Asset": ["DOT", "KSM"], "rewards": [{"a": 1, "b": 2}, [{"x": 1, "y": None}]]})
+        b = pd.DataFrame({"Asset": ["DOT", "KSM"], "rewards": [{"b": 2, "a": 1}, [{"y": None, "x": 1}]]})
+        c = pd.DataFrame({"Asset": ["DOT", "KSM"], "rewards": [{"a": 1, "b": 3}, [{"x": 1, "y": None}]]})
+
+        self.assertEqual(DataValidator.compute_hash(a), DataValidator.compute_hash(b))
+        self.assertNotEqual(DataValidator.compute_hash(a), DataValidator.compute_hash(c))
+
+    def test_unserializable_returns_none(self):
+        circular = []
+        circular.append(circular)
+        self.assertIsNone(DataValidator.compute_hash(circular))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,174 @@
+"""
+Tests for db_pool.py module.
+
+Tests connection reuse, pool size limits, stale connection replacement,
+rollback of open transactions on release and pool statistics.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import threading
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+from db_pool import ConnectionPool, get_pool, pool_stats, close_all_pools
+from mysql.connector import errors as mysql_errors
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test ConnectionPool borrowing and releasing."""
+
+    def tearDown(self):
+        close_all_pools()
+
+    @patch('mysql.connector.connect')
+    def test_reuses_connection(self, mock_connect):
+        """Test that a released connection is handed out again."""
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306, pool_size=2)
+        with pool.connection() as c1:
+            pass
+        with pool.connection() as c2:
+            pass
+
+        self.assertIs(c1, c2)
+        self.assertEqual(mock_connect.call_count, 1)
+        stats = pool.stats()
+        self.assertEqual(stats['borrows'], 2)
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertAlmostEqual(stats['reuse_ratio'], 0.5)
+
+    @patch('mysql.connector.connect')
+    def test_stale_connection_replaced(self, mock_connect):
+        """Test that a connection failing the health check is replaced."""
+        stale, fresh = MagicMock(), MagicMock()
+        stale.is_connected.return_value = False
+        mock_connect.side_effect = [stale, fresh]
+
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306, pool_size=1)
+        with pool.connection():
+            pass
+        with pool.connection() as cnx:
+            self.assertIs(cnx, fresh)
+
+        stale.close.assert_called()
+        self.assertEqual(pool.stats()['stale_reconnects'], 1)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    @patch('mysql.connector.connect')
+    def test_release_ends_open_transaction(self, mock_connect):
+        """Test that a read left in a transaction is rolled back before reuse."""
+        reader, idle = MagicMock(), MagicMock()
+        reader.in_transaction, idle.in_transaction = True, False
+        mock_connect.side_effect = [reader, idle]
+
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306, pool_size=2)
+        with pool.connection() as c1, pool.connection() as c2:
+            pass
+
+        reader.rollback.assert_called_once()
+        idle.rollback.assert_not_called()
+        self.assertEqual(pool.stats()['idle'], 2)
+
+    @patch('mysql.connector.connect')
+    def test_failed_release_rollback_discards_connection(self, mock_connect):
+        """Test that a connection which cannot roll back is not handed out again."""
+        mock_connect.return_value.in_transaction = True
+        mock_connect.return_value.rollback.side_effect = Exception("lost connection")
+
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306, pool_size=1)
+        with pool.connection():
+            pass
+
+        stats = pool.stats()
+        self.assertEqual((stats['discarded'], stats['idle'], stats['open']), (1, 0, 0))
+
+    @patch('mysql.connector.connect')
+    def test_error_discards_connection(self, mock_connect):
+        """Test that a connection used in a failing block is closed."""
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306, pool_size=1)
+        with self.assertRaises(RuntimeError):
+            with pool.connection():
+                raise RuntimeError("query failed")
+
+        mock_connect.return_value.rollback.assert_called()
+        mock_connect.return_value.close.assert_called()
+        self.assertEqual(pool.stats()['open'], 0)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    @patch('mysql.connector.connect')
+    def test_exhausted_pool_times_out(self, mock_connect):
+        """Test that borrowing beyond pool_size raises PoolError after the timeout."""
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306, pool_size=1, timeout=0.05)
+        cnx = pool.acquire()
+        with self.assertRaises(mysql_errors.PoolError):
+            pool.acquire()
+        pool.release(cnx)
+
+    @patch('mysql.connector.connect')
+    def test_waiter_gets_released_connection(self, mock_connect):
+        """Test that a blocked borrower receives the connection once it is released."""
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306, pool_size=1, timeout=5)
+        cnx = pool.acquire()
+        got = []
+        t = threading.Thread(target=lambda: got.append(pool.acquire()))
+        t.start()
+        pool.release(cnx)
+        t.join(timeout=5)
+
+        self.assertEqual(got, [cnx])
+        self.assertEqual(mock_connect.call_count, 1)
+
+    @patch('mysql.connector.connect')
+    def test_connect_failure_frees_slot(self, mock_connect):
+        """Test that a failed connect does not leak a pool slot."""
+        mock_connect.side_effect = [mysql_errors.InterfaceError("down"), MagicMock()]
+        pool = ConnectionPool('u', 'p', 'h', 'd', 3306, pool_size=1, timeout=0.05)
+        with self.assertRaises(mysql_errors.InterfaceError):
+            pool.acquire()
+        pool.release(pool.acquire())
+        self.assertEqual(pool.stats()['open'], 1)
+
+
+class TestSharedPools(unittest.TestCase):
+    """Test the module-level pool registry."""
+
+    def tearDown(self):
+        close_all_pools()
+
+    def test_get_pool_shared_per_config(self):
+        """Test that identical credentials share one pool."""
+        a = get_pool('u', 'p', 'h', 'd', 3306)
+        b = get_pool('u', 'p', 'h', 'd', '3306')
+        c = get_pool('u', 'p', 'h', 'other', 3306)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+
+    @patch.dict(os.environ, {'DB_POOL_SIZE': '7'})
+    def test_pool_size_from_env(self):
+        """Test that DB_POOL_SIZE configures the pool size."""
+        self.assertEqual(get_pool('u', 'p', 'h', 'd', 3306).pool_size, 7)
+
+    @patch('mysql.connector.connect')
+    def test_pool_stats_and_close_all(self, mock_connect):
+        """Test pool_stats keys and that close_all_pools closes idle connections."""
+        pool = get_pool('u', 'p', 'h', 'd', 3306)
+        with pool.connection():
+            pass
+
+        stats = pool_stats()
+        self.assertIn('u@h:3306/d', stats)
+        self.assertEqual(stats['u@h:3306/d']['connections_created'], 1)
+
+        close_all_pools()
+        mock_connect.return_value.close.assert_called()
+        self.assertEqual(pool_stats(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -71,5 +71,45 @@ class TestFetchAssetPrices(unittest.TestCase):
         self.assertTrue(mock_sql.called)
 
 
+class TestPriceAssetList(unittest.TestCase):
+    """Test passing the load_assets ID list to the price script."""
+
+    CSV = pd.DataFrame({'ID': [0, 5, 10, 29, 30, 1000771], 'Symbol': ['HDX', 'DOT', 'USDT', 'A', 'B', 'KSM']})
+
+    @patch('fetch_asset_prices.pd.read_csv')
+    def test_load_assets_limit(self, mock_read):
+        mock_read.return_value = self.CSV
+        with patch.dict(os.environ, {'HYDRATION_PRICE_MAX_ASSET_ID': '30'}):
+            self.assertEqual([a['ID'] for a in fetch_asset_prices.load_assets()], [0, 5, 10, 29])
+        with patch.dict(os.environ, {'HYDRATION_PRICE_MAX_ASSET_ID': 'all'}):
+            self.assertEqual(len(fetch_asset_prices.load_assets()), 6)
+
+    @patch.dict(os.environ, {'HYDRATION_NODE_WORKER': '0', 'HYDRATION_PRICE_CONCURRENCY': '16',
+                             'HYDRATION_PRICE_TIMEOUT_MS': '5000'})
+    @patch('fetch_asset_prices.subprocess.run')
+    def test_ids_and_concurrency_passed_to_script(self, mock_run):
+        mock_run.return_value = MagicMock(stdout=json.dumps([{"assetId": "5", "price": 4.0}]))
+
+        res = fetch_asset_prices.fetch_batch_prices([0, 5, 1000771])
+
+        cmd = mock_run.call_args[0][0]
+        self.assertEqual(cmd[cmd.index('--ids') + 1], '0,5,1000771')
+        self.assertEqual(cmd[cmd.index('--concurrency') + 1], '16')
+        self.assertEqual(cmd[cmd.index('--timeout') + 1], '5000')
+        self.assertEqual(res, {'5': 4.0})
+
+    @patch.dict(os.environ, {'HYDRATION_NODE_WORKER': '1'})
+    def test_ids_passed_to_worker(self):
+        worker = MagicMock()
+        worker.call.return_value = [{"assetId": "1000771", "price": 20.0}]
+        with patch('fetch_asset_prices.get_worker', return_value=worker):
+            res = fetch_asset_prices.fetch_batch_prices([1000771])
+
+        method, params = worker.call.call_args[0]
+        self.assertEqual(method, 'prices')
+        self.assertEqual(params['assetIds'], ['1000771'])
+        self.assertEqual(res, {'1000771': 20.0})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,139 @@
+"""
+Tests for fetch_engine.py module.
+
+Tests that the collectors run concurrently in one event loop on one shared
+HTTP client, that a failing collector does not affect the others, and the
+collector selection.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import asyncio
+import threading
+import time
+import types
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+import fetch_engine
+from fetch_engine import AsyncFetchEngine, CollectorSpec
+from utils import create_http_session
+
+
+def _collector(name, results=(True,), delay=0.0, connect_error=None):
+    """Register a fake collector module; returns its list of (thread, session) calls."""
+    module = types.ModuleType(name)
+    calls = []
+    outcomes = list(results)
+
+    def connect_db():
+        if connect_error:
+            raise connect_error
+        return f"db-{name}"
+
+    def collect_once(db, session):
+        calls.append((threading.current_thread().name, session, db))
+        time.sleep(delay)
+        outcome = outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    module.connect_db = connect_db
+    module.collect_once = collect_once
+    sys.modules[name] = module
+    return calls
+
+
+class TestAsyncFetchEngine(unittest.TestCase):
+    """Test running collectors as coroutines."""
+
+    def setUp(self):
+        self.heartbeat = patch('fetch_engine.LivelinessProbe.record_heartbeat').start()
+        self.addCleanup(patch.stopall)
+
+    def _engine(self, specs, **kwargs):
+        return AsyncFetchEngine(specs=specs, host_connections=4, timeout=3, **kwargs)
+
+    def test_collectors_run_concurrently_on_shared_session(self):
+        a = _collector('fake_collector_a', delay=0.2)
+        b = _collector('fake_collector_b', delay=0.2)
+        engine = self._engine({'a': CollectorSpec('fake_collector_a', 0, 0),
+                               'b': CollectorSpec('fake_collector_b', 0, 0)})
+
+        start = time.perf_counter()
+        result = asyncio.run(engine.run(cycles=1))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result, {'a': 1, 'b': 1})
+        self.assertLess(elapsed, 0.35)
+        self.assertIs(a[0][1], b[0][1])
+        self.assertEqual(a[0][1].timeout, 3)
+        self.assertEqual(a[0][2], 'db-fake_collector_a')
+        self.assertIsNone(engine.session)
+
+    def test_failures_are_isolated(self):
+        _collector('fake_collector_ok', results=(True,))
+        _collector('fake_collector_bad', results=(RuntimeError('boom'), False))
+        _collector('fake_collector_nodb', connect_error=RuntimeError('no db'))
+        engine = self._engine({'ok': CollectorSpec('fake_collector_ok', 0, 0),
+                               'bad': CollectorSpec('fake_collector_bad', 0, 0),
+                               'nodb': CollectorSpec('fake_collector_nodb', 0, 0)})
+
+        result = asyncio.run(engine.run(cycles=2))
+
+        self.assertEqual(result, {'ok': 2, 'bad': 0, 'nodb': 0})
+        self.assertEqual([c.args[0] for c in self.heartbeat.call_args_list], ['ok', 'ok'])
+
+    def test_stop_interrupts_sleep(self):
+        calls = _collector('fake_collector_slow')
+        engine = self._engine({'slow': CollectorSpec('fake_collector_slow', 3600, 3600)})
+
+        async def scenario():
+            task = asyncio.ensure_future(engine.run())
+            while not calls:
+                await asyncio.sleep(0.01)
+            engine.stop()
+            return await asyncio.wait_for(task, timeout=2)
+
+        self.assertEqual(asyncio.run(scenario()), {'slow': 1})
+
+    def test_retry_backoff(self):
+        spec = CollectorSpec('x', 3600, 60)
+        self.assertEqual([fetch_engine.retry_backoff(spec, n) for n in range(0, 9)],
+                         [3600, 60, 120, 240, 480, 960, 1920, 3600, 3600])
+
+    def test_engine_collectors(self):
+        with patch.dict(os.environ, {'FETCH_ENGINE_COLLECTORS': 'Bifrost, prices'}):
+            self.assertEqual(fetch_engine.engine_collectors(), ['bifrost', 'prices'])
+        with patch.dict(os.environ, {'FETCH_ENGINE_COLLECTORS': ''}):
+            self.assertEqual(list(fetch_engine.engine_collectors()), list(fetch_engine.COLLECTORS))
+        with patch.dict(os.environ, {'FETCH_ENGINE_COLLECTORS': 'moonbeam'}):
+            with self.assertRaises(ValueError):
+                fetch_engine.engine_collectors()
+
+
+class TestSharedSession(unittest.TestCase):
+    """Test the shared HTTP client settings."""
+
+    def test_default_timeout_and_host_limit(self):
+        session = create_http_session(pool_maxsize=2, pool_block=True, timeout=7)
+        adapter = session.get_adapter('https://example.org')
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(adapter._pool_maxsize, 2)
+
+        with patch('requests.Session.request', return_value=MagicMock()) as request:
+            session.get('https://example.org/a')
+            session.get('https://example.org/b', timeout=1)
+        self.assertEqual(request.call_args_list[0].kwargs['timeout'], 7)
+        self.assertEqual(request.call_args_list[1].kwargs['timeout'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
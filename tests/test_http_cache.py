@@ -0,0 +1,233 @@
+"""
+Tests for http_cache.py module.
+
+Tests conditional requests against a local HTTP server (ETag and
+Last-Modified), byte-identical bodies without validators, deferred commits,
+that the Bifrost cycle skips unchanged responses and that Hydration reuses
+the values parsed from unchanged bodies.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+os.environ.setdefault('DB_USERNAME', 'test_user')
+os.environ.setdefault('DB_PASSWORD', 'test_pass')
+os.environ.setdefault('DB_NAME', 'test_db')
+
+from http_cache import CachedResponse, cached_get, parse_once
+import Bifrost_Data_fetching
+import Hydration_Data_fetching
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """/etag, /modified: honour validators; /plain: no validators; /missing: 404. Body = server.body."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.path == '/missing':
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.path == '/etag' and self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        if self.path == '/modified' and self.headers.get('If-Modified-Since') == server.modified:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if self.path == '/etag':
+            self.send_header('ETag', server.etag)
+        if self.path == '/modified':
+            self.send_header('Last-Modified', server.modified)
+        self.send_header('Content-Length', str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCachedGet(unittest.TestCase):
+    """Test conditional requests and change detection."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.body = b'{"a": 1}'
+        self.server.etag = '"v1"'
+        self.server.modified = 'Sat, 17 Oct 2026 09:00:00 GMT'
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = patch.dict(os.environ, {'HTTP_CACHE_DIR': tmp.name, 'HTTP_CACHE': '1'})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_etag_not_modified(self):
+        first = cached_get(self.base + '/etag')
+        second = cached_get(self.base + '/etag')
+
+        self.assertFalse(first.unchanged)
+        self.assertTrue(second.unchanged and second.not_modified)
+        self.assertEqual(second.json(), {'a': 1})
+        self.assertEqual(self.server.requests[1].get('If-None-Match'), '"v1"')
+
+        self.server.etag, self.server.body = '"v2"', b'{"a": 2}'
+        third = cached_get(self.base + '/etag')
+        self.assertFalse(third.unchanged)
+        self.assertEqual(third.json(), {'a': 2})
+
+    def test_last_modified_not_modified(self):
+        cached_get(self.base + '/modified')
+        second = cached_get(self.base + '/modified')
+
+        self.assertTrue(second.not_modified)
+        self.assertEqual(self.server.requests[1].get('If-Modified-Since'), self.server.modified)
+
+    def test_identical_body_without_validators(self):
+        cached_get(self.base + '/plain')
+        same = cached_get(self.base + '/plain')
+        self.server.body = b'{"a": 3}'
+        changed = cached_get(self.base + '/plain')
+
+        self.assertTrue(same.unchanged)
+        self.assertFalse(same.not_modified)
+        self.assertFalse(changed.unchanged)
+
+    def test_uncommitted_body_is_not_cached(self):
+        first = cached_get(self.base + '/etag', commit=False)
+        second = cached_get(self.base + '/etag', commit=False)
+        self.assertFalse(second.unchanged)
+        self.assertNotIn('If-None-Match', self.server.requests[1])
+
+        first.commit()
+        self.assertTrue(cached_get(self.base + '/etag').unchanged)
+
+    def test_disabled_and_errors_pass_through(self):
+        with patch.dict(os.environ, {'HTTP_CACHE': '0'}):
+            self.assertNotIsInstance(cached_get(self.base + '/plain'), CachedResponse)
+        missing = cached_get(self.base + '/missing')
+        self.assertNotIsInstance(missing, CachedResponse)
+        self.assertEqual(missing.status_code, 404)
+
+    def test_parse_once_reuses_result(self):
+        parse = MagicMock(side_effect=lambda data: dict(data))
+        first = parse_once(cached_get(self.base + '/plain'), parse)
+        second = parse_once(cached_get(self.base + '/plain'), parse)
+
+        self.assertIs(first, second)
+        self.assertEqual(parse.call_count, 1)
+
+
+class _FakeResponse:
+    def __init__(self, body, headers=None):
+        self.status_code = 200
+        self.content = json.dumps(body).encode()
+        self.headers = headers or {}
+
+
+class TestBifrostSkipsUnchanged(unittest.TestCase):
+    """Test that an unchanged Bifrost cycle skips sanitize/hash/store."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = patch.dict(os.environ, {'HTTP_CACHE_DIR': tmp.name, 'HTTP_CACHE': '1'})
+        env.start()
+        self.addCleanup(env.stop)
+        self.bodies = {
+            Bifrost_Data_fetching.SITE_URL: {'DOT': {'apy': 0.15}},
+            Bifrost_Data_fetching.STAKING_URL: {'supportedAssets': [{'symbol': 'vDOT', 'price': 5.0}]},
+        }
+        self.session = MagicMock()
+        self.session.get.side_effect = lambda url, **kwargs: _FakeResponse(self.bodies[url])
+
+    def test_second_identical_cycle_is_skipped(self):
+        db = MagicMock()
+        db.get_last_bifrost_hash.return_value = None
+        with patch('Bifrost_Data_fetching.DataValidator.compute_hash', return_value='h') as compute_hash:
+            self.assertTrue(Bifrost_Data_fetching.collect_once(db, self.session))
+            self.assertTrue(Bifrost_Data_fetching.collect_once(db, self.session))
+            self.assertEqual(compute_hash.call_count, 1)
+            self.assertEqual(db.update_bifrost_database.call_count, 1)
+
+            self.bodies[Bifrost_Data_fetching.SITE_URL] = {'DOT': {'apy': 0.16}}
+            self.assertTrue(Bifrost_Data_fetching.collect_once(db, self.session))
+            self.assertEqual(compute_hash.call_count, 2)
+        self.assertEqual(db.update_bifrost_database.call_count, 2)
+
+    def test_failed_store_is_retried(self):
+        db = MagicMock()
+        db.get_last_bifrost_hash.return_value = None
+        db.update_bifrost_database.side_effect = [RuntimeError('db down'), True]
+        with self.assertRaises(RuntimeError):
+            Bifrost_Data_fetching.collect_once(db, self.session)
+
+        self.assertTrue(Bifrost_Data_fetching.collect_once(db, self.session))
+        self.assertEqual(db.update_bifrost_database.call_count, 2)
+
+    def test_rolled_back_store_is_retried(self):
+        db = MagicMock()
+        db.get_last_bifrost_hash.return_value = None
+        db.update_bifrost_database.side_effect = [False, True, True]
+
+        self.assertFalse(Bifrost_Data_fetching.collect_once(db, self.session))
+        self.assertTrue(Bifrost_Data_fetching.collect_once(db, self.session))
+        self.assertEqual(db.update_bifrost_database.call_count, 2)
+        # stored now: the identical third cycle is skipped
+        self.assertTrue(Bifrost_Data_fetching.collect_once(db, self.session))
+        self.assertEqual(db.update_bifrost_database.call_count, 2)
+
+
+class TestHydrationReusesParsedBodies(unittest.TestCase):
+    """Test that an unchanged TVL body is not parsed again."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = patch.dict(os.environ, {'HTTP_CACHE_DIR': tmp.name, 'HTTP_CACHE': '1'})
+        env.start()
+        self.addCleanup(env.stop)
+        self.body = [{'tvl_usd': 100.0}]
+        self.session = MagicMock()
+        self.session.get.side_effect = lambda url, **kwargs: _FakeResponse(self.body)
+
+    def test_tvl_parsed_once_per_body(self):
+        parse = MagicMock(side_effect=Hydration_Data_fetching.tvl_value)
+        with patch('Hydration_Data_fetching.tvl_value', parse):
+            self.assertEqual(Hydration_Data_fetching.fetch_tvl('5', self.session), 100.0)
+            self.assertEqual(Hydration_Data_fetching.fetch_tvl('5', self.session), 100.0)
+            self.assertEqual(parse.call_count, 1)
+
+            self.body = [{'tvl_usd': 120.0}]
+            self.assertEqual(Hydration_Data_fetching.fetch_tvl('5', self.session), 120.0)
+        self.assertEqual(parse.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,9 @@ import sys
 import os
 import pandas as pd
 import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # Setup path and environment
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -63,5 +66,71 @@ class TestHydrationFetching(unittest.TestCase):
         self.assertEqual(res[0]['tvl_usd'], 1000000.0)
 
 
+class _StatsHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Hydration stats API: /tvl/<id> and /volume/<id>."""
+    delay = 0.2
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        kind, asset_id = self.path.strip('/').split('/')
+        if asset_id == '404':
+            self.send_response(404)
+            self.end_headers()
+            return
+        if kind == 'tvl':
+            body = [{"tvl_usd": float(asset_id) * 1000}]
+        else:
+            body = [{"volume_usd": 1.0}, {"volume_usd": float(asset_id) * 10}]
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConcurrentFetching(unittest.TestCase):
+    """Test the concurrent TVL/volume fetch mode against a local HTTP server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _StatsHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_concurrent_matches_serial_and_is_ordered(self):
+        assets = [{'ID': i, 'Symbol': f'S{i}'} for i in range(1, 9)]
+        farm_apr = {str(i): 1.0 for i in (5, 3, 8, 1, 404, 2, 7, 6, 4)}
+        with patch.object(Hydration_Data_fetching, 'API_BASE', self.base):
+            start = time.monotonic()
+            concurrent = Hydration_Data_fetching.process_data(assets, farm_apr, concurrency=18)
+            elapsed = time.monotonic() - start
+            serial = Hydration_Data_fetching.process_data(assets, farm_apr, concurrency=1)
+
+        # 18 requests of 0.2s each: roughly one round trip instead of 3.6s
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual([r['asset_id'] for r in concurrent], list(farm_apr))
+        strip = lambda rows: [{k: v for k, v in r.items() if k != 'timestamp'} for r in rows]
+        self.assertEqual(strip(concurrent), strip(serial))
+        self.assertEqual(concurrent[0]['tvl_usd'], 5000.0)
+        self.assertEqual(concurrent[0]['volume_usd'], 50.0)
+        # failed requests fall back to 0 as before
+        self.assertEqual(concurrent[4]['tvl_usd'], 0)
+
+    def test_timeout_returns_zero(self):
+        with patch.object(Hydration_Data_fetching, 'API_BASE', self.base), \
+             patch.object(Hydration_Data_fetching, 'HTTP_TIMEOUT', 0.05):
+            self.assertEqual(Hydration_Data_fetching.fetch_tvl('1'), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
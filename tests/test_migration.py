@@ -16,6 +16,7 @@ cao_dir = os.path.join(project_root, 'CAO')
 sys.path.insert(0, cao_dir)
 
 from db_migration.migration import Migration
+from db_migration import migration_2, migration_3, migration_4, migration_5, migration_6
 
 
 class TestMigrationLogic(unittest.TestCase):
@@ -80,5 +81,151 @@ class TestMigrationLogic(unittest.TestCase):
                 m.execute_migration_script("dummy.py")
 
 
+class TestMigration2Indexes(unittest.TestCase):
+    """Test the batch_id / (created_at, batch_id) index migration."""
+
+    def _conn(self, existing):
+        """existing: table -> set of index names; tables not listed do not exist."""
+        cursor = MagicMock()
+
+        def execute(sql, params=None):
+            table, name = sql.split()[2], sql.split()[5]
+            if table not in existing:
+                raise Exception(f"1146 (42S02): Table 'd.{table}' doesn't exist")
+            if name in existing[table]:
+                raise Exception(f"1061 (42000): Duplicate key name '{name}'")
+
+        cursor.execute.side_effect = execute
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    def test_adds_both_indexes(self):
+        conn, cursor = self._conn({"pool_data": {"PRIMARY"}})
+        added = migration_2.add_indexes(conn, tables=("pool_data",))
+
+        self.assertEqual([c.args[0] for c in cursor.execute.call_args_list], [
+            "ALTER TABLE pool_data ADD INDEX idx_batch_id (batch_id)",
+            "ALTER TABLE pool_data ADD INDEX idx_created_at_batch_id (created_at, batch_id)",
+        ])
+        self.assertEqual(added, [("pool_data", "idx_batch_id"), ("pool_data", "idx_created_at_batch_id")])
+        conn.commit.assert_called_once()
+
+    def test_skips_existing_indexes_and_missing_tables(self):
+        conn, cursor = self._conn({
+            "hydration_data": {"PRIMARY", "idx_batch_id", "idx_created_at_batch_id"},
+            "Hydration_price": {"PRIMARY", "idx_batch_id"},
+        })
+        added = migration_2.add_indexes(conn)
+
+        self.assertEqual(added, [("Hydration_price", "idx_created_at_batch_id")])
+        # a missing table is given up after its first ALTER
+        self.assertEqual(cursor.execute.call_count, 2 + 2 + 1 + 1 + 1)
+        conn.commit.assert_called_once()
+
+    def test_migrate_rolls_back_on_error(self):
+        conn = MagicMock()
+        conn.cursor.return_value.execute.side_effect = Exception("lock wait timeout")
+        with self.assertRaises(Exception):
+            migration_2.migrate(conn)
+        conn.rollback.assert_called_once()
+
+
+class TestMigration3LatestBatch(unittest.TestCase):
+    """Test the latest_batch registry migration."""
+
+    def test_creates_and_backfills(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+
+        def execute(sql, params=None):
+            if params == ('pool_data',):
+                raise Exception("1146 (42S02): Table 'd.pool_data' doesn't exist")
+
+        cursor.execute.side_effect = execute
+        migration_3.migrate(conn)
+
+        calls = cursor.execute.call_args_list
+        self.assertIn('CREATE TABLE IF NOT EXISTS latest_batch', calls[0].args[0])
+        backfilled = [c.args[1][0] for c in calls[1:]]
+        self.assertEqual(backfilled, list(migration_3.SOURCE_TABLES))
+        self.assertIn('FROM hydration_data AS t', calls[1].args[0])
+        conn.commit.assert_called_once()
+
+    def test_rolls_back_on_error(self):
+        conn = MagicMock()
+        conn.cursor.return_value.execute.side_effect = [None, Exception("lock wait timeout")]
+        with self.assertRaises(Exception):
+            migration_3.migrate(conn)
+        conn.rollback.assert_called_once()
+
+
+class TestMigration4LatestPerAsset(unittest.TestCase):
+    """Test the Bifrost latest-per-asset migration."""
+
+    def test_creates_and_backfills(self):
+        conn = MagicMock()
+        migration_4.migrate(conn)
+
+        sqls = [c.args[0] for c in conn.cursor.return_value.execute.call_args_list]
+        self.assertEqual(len(sqls), 4)
+        self.assertIn('CREATE TABLE IF NOT EXISTS Bifrost_site_latest', sqls[0])
+        self.assertIn('CREATE TABLE IF NOT EXISTS Bifrost_staking_latest', sqls[1])
+        self.assertIn('INSERT INTO Bifrost_site_latest', sqls[2])
+        self.assertIn('INSERT INTO Bifrost_staking_latest', sqls[3])
+        conn.commit.assert_called_once()
+
+
+class TestMigration5SnapshotRows(unittest.TestCase):
+    """Test the normalized multipleFACT_asset migration."""
+
+    def test_creates_and_backfills_every_section(self):
+        conn = MagicMock()
+        migration_5.migrate(conn)
+
+        sqls = [c.args[0] for c in conn.cursor.return_value.execute.call_args_list]
+        self.assertIn('CREATE TABLE IF NOT EXISTS multipleFACT_asset', sqls[0])
+        for sql, path in zip(sqls[1:], ('bifrost_data', 'moonbeam_data', 'hydration_data', 'hydration_price_data')):
+            self.assertIn(f"'$.{path}[*]'", sql)
+        conn.commit.assert_called_once()
+
+    def test_missing_multiplefact_skips_backfill(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.execute.side_effect = [None, Exception("1146 (42S02): Table 'd.multipleFACT' doesn't exist")]
+        migration_5.migrate(conn)
+
+        self.assertEqual(cursor.execute.call_count, 2)
+        conn.commit.assert_called_once()
+
+
+class TestMigration6Partitions(unittest.TestCase):
+    """Test the monthly partitioning migration."""
+
+    def test_partitions_existing_tables(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+
+        def execute(sql, params=None):
+            if sql.startswith('ALTER TABLE full_table'):
+                raise Exception("1146 (42S02): Table 'd.full_table' doesn't exist")
+
+        cursor.execute.side_effect = execute
+        migration_6.migrate(conn)
+
+        sqls = [c.args[0] for c in cursor.execute.call_args_list]
+        self.assertEqual(len(sqls), len(migration_6.PARTITIONED_TABLES))
+        self.assertIn('ADD PRIMARY KEY (auto_id, created_at)', sqls[3])
+        self.assertIn('PARTITION BY RANGE (UNIX_TIMESTAMP(created_at))', sqls[0])
+        conn.commit.assert_called_once()
+
+    def test_rolls_back_on_error(self):
+        conn = MagicMock()
+        conn.cursor.return_value.execute.side_effect = Exception("1503: A PRIMARY KEY must include all columns")
+        with self.assertRaises(Exception):
+            migration_6.migrate(conn)
+        conn.rollback.assert_called_once()
+
+
 if __name__ == '__main__':
     unittest.main()
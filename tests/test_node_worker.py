@@ -0,0 +1,133 @@
+"""
+Tests for node_worker.py module.
+
+Runs the JSON-lines client against a small Python stand-in for
+hy/script/worker.ts: request/response matching, worker-side errors,
+restart after a crash, timeouts, and the worker mode of the fetchers.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import textwrap
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+import node_worker
+from node_worker import NodeWorker, NodeWorkerError
+
+FAKE_WORKER = textwrap.dedent("""
+    import json, os, sys, time
+    print("fake worker ready", file=sys.stderr, flush=True)
+    for line in sys.stdin:
+        req = json.loads(line)
+        method, params = req["method"], req.get("params") or {}
+        if method == "crash":
+            sys.exit(3)
+        if method == "sleep":
+            time.sleep(params["seconds"])
+        if method == "fail":
+            out = {"id": req["id"], "error": "boom"}
+        elif method == "prices":
+            ids = params.get("assetIds") or ["0", "10"]
+            out = {"id": req["id"], "result": [{"assetId": i, "price": 1.5} for i in ids]}
+        else:
+            out = {"id": req["id"], "result": {"pid": os.getpid(), "params": params}}
+        print("noise that is not json", flush=True)
+        print(json.dumps(out), flush=True)
+""")
+
+
+def _worker(**kwargs):
+    return NodeWorker(cmd=[sys.executable, "-c", FAKE_WORKER], **kwargs)
+
+
+class TestNodeWorker(unittest.TestCase):
+    """Test the JSON-lines client."""
+
+    def setUp(self):
+        self.worker = _worker(request_timeout=10)
+
+    def tearDown(self):
+        self.worker.close()
+
+    def test_process_reused_across_calls(self):
+        first = self.worker.call("echo", {"a": 1})
+        second = self.worker.call("echo")
+
+        self.assertEqual(first["params"], {"a": 1})
+        self.assertEqual(first["pid"], second["pid"])
+        self.assertEqual(self.worker.starts, 1)
+        self.assertEqual(self.worker.requests, 2)
+
+    def test_worker_error_keeps_process(self):
+        pid = self.worker.call("echo")["pid"]
+        with self.assertRaises(NodeWorkerError):
+            self.worker.call("fail")
+        self.assertEqual(self.worker.call("echo")["pid"], pid)
+
+    def test_restart_after_crash(self):
+        pid = self.worker.call("echo")["pid"]
+        with self.assertRaises(NodeWorkerError):
+            self.worker.call("crash")
+
+        self.assertNotEqual(self.worker.call("echo")["pid"], pid)
+        self.assertEqual(self.worker.starts, 2)
+
+    def test_timeout_kills_worker(self):
+        pid = self.worker.call("echo")["pid"]
+        with self.assertRaises(NodeWorkerError):
+            self.worker.call("sleep", {"seconds": 5}, timeout=0.2)
+
+        self.assertFalse(self.worker.alive)
+        self.assertNotEqual(self.worker.call("echo")["pid"], pid)
+
+    def test_close_stops_process(self):
+        self.worker.call("echo")
+        self.worker.close()
+        self.assertFalse(self.worker.alive)
+
+
+class TestWorkerMode(unittest.TestCase):
+    """Test the fetchers in HYDRATION_NODE_WORKER mode."""
+
+    def setUp(self):
+        self.worker = _worker(request_timeout=10)
+
+    def tearDown(self):
+        self.worker.close()
+
+    @patch.dict(os.environ, {'HYDRATION_NODE_WORKER': '1'})
+    @patch('fetch_asset_prices.subprocess.run')
+    def test_fetch_batch_prices_uses_worker(self, mock_run):
+        import fetch_asset_prices
+        with patch('fetch_asset_prices.get_worker', return_value=self.worker):
+            prices = fetch_asset_prices.fetch_batch_prices()
+            prices_again = fetch_asset_prices.fetch_batch_prices()
+
+        self.assertEqual(prices, {"0": 1.5, "10": 1.5})
+        self.assertEqual(prices, prices_again)
+        self.assertEqual(self.worker.starts, 1)
+        mock_run.assert_not_called()
+
+    @patch.dict(os.environ, {'HYDRATION_NODE_WORKER': '1'})
+    def test_fetch_farm_apr_error_returns_empty(self):
+        import Hydration_Data_fetching
+        broken = MagicMock()
+        broken.call.side_effect = NodeWorkerError("down")
+        with patch('Hydration_Data_fetching.get_worker', return_value=broken):
+            self.assertEqual(Hydration_Data_fetching.fetch_farm_apr(), {})
+        broken.call.assert_called_once_with("farmApr", {"from": 1, "to": 35})
+
+    @patch.dict(os.environ, {'HYDRATION_NODE_WORKER': '0'})
+    def test_disabled_by_default_flag(self):
+        self.assertFalse(node_worker.worker_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+"""
+Tests for partition_maintenance.py module.
+
+Tests the monthly partition DDL, which partitions are added ahead or expire,
+and a maintenance pass against a fake INFORMATION_SCHEMA.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import datetime
+
+from mysql.connector import Error as MySQLError
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+from partition_maintenance import PartitionMaintainer, add_months, partition_table_sql
+
+TODAY = datetime.date(2026, 10, 17)
+
+
+def _maintainer(**kwargs):
+    kwargs.setdefault('months_ahead', 2)
+    kwargs.setdefault('retention_months', 0)
+    return PartitionMaintainer('u', 'p', 'h', 'd', 3306, **kwargs)
+
+
+def _cursor(partitions, keyframe_rows=(), nonempty=()):
+    """
+    Cursor answering INFORMATION_SCHEMA.PARTITIONS from {table: [names]}
+    (other tables do not exist); "SELECT 1 FROM <source> LIMIT 1" finds a
+    row for the sources in `nonempty`.
+    """
+    cur = MagicMock()
+    state = {}
+
+    def execute(sql, params=None):
+        state['sql'], state['params'] = sql, params
+
+    def fetchall():
+        if 'INFORMATION_SCHEMA.PARTITIONS' in state['sql']:
+            names = partitions.get(state['params'][0])
+            return [(n,) for n in names] if names is not None else []
+        return []
+
+    def fetchone():
+        if 'SELECT MAX(id)' in state['sql']:
+            return (100,)
+        if state['sql'].startswith('SELECT 1 FROM ') and ' WHERE ' not in state['sql']:
+            return (1,) if state['sql'][len('SELECT 1 FROM '):-len(' LIMIT 1')] in nonempty else None
+        return keyframe_rows[0] if keyframe_rows else None
+
+    cur.execute.side_effect = execute
+    cur.fetchall.side_effect = fetchall
+    cur.fetchone.side_effect = fetchone
+    return cur
+
+
+class TestPartitionSql(unittest.TestCase):
+    """Test the partitioning DDL."""
+
+    def test_partition_table_sql(self):
+        sql = partition_table_sql('multipleFACT_asset', TODAY, 1)
+
+        self.assertIn('ADD PRIMARY KEY (snapshot_id, section, row_no, created_at)', sql)
+        self.assertIn("PARTITION p_history VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00'))", sql)
+        self.assertIn("PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00'))", sql)
+        self.assertIn("PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00'))", sql)
+        self.assertNotIn('p202612', sql)
+        self.assertTrue(sql.rstrip().endswith('PARTITION pmax VALUES LESS THAN MAXVALUE\n)'))
+
+    def test_add_months(self):
+        self.assertEqual(add_months(datetime.date(2026, 11, 1), 2), datetime.date(2027, 1, 1))
+        self.assertEqual(add_months(datetime.date(2026, 1, 1), -1), datetime.date(2025, 12, 1))
+
+
+class TestMaintenanceSteps(unittest.TestCase):
+    """Test adding future partitions and retention."""
+
+    def test_add_future_partitions(self):
+        cur = MagicMock()
+        added = _maintainer().add_future_partitions(cur, 'pool_data', ['p_history', 'p202610', 'pmax'], TODAY)
+
+        self.assertEqual(added, ['p202611', 'p202612'])
+        sql = cur.execute.call_args.args[0]
+        self.assertTrue(sql.startswith('ALTER TABLE pool_data REORGANIZE PARTITION pmax INTO ('))
+        self.assertIn("PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00'))", sql)
+
+    def test_nothing_to_add(self):
+        cur = MagicMock()
+        names = ['p202610', 'p202611', 'p202612', 'pmax']
+        self.assertEqual(_maintainer().add_future_partitions(cur, 'pool_data', names, TODAY), [])
+        cur.execute.assert_not_called()
+
+    def test_expired(self):
+        names = ['p_history', 'p202606', 'p202607', 'p202608', 'p202609', 'pmax']
+
+        self.assertEqual(_maintainer().expired(names, TODAY), [])
+        self.assertEqual(_maintainer(retention_months=3).expired(names, TODAY), ['p_history', 'p202606'])
+        # p_history runs up to 2026-06-01, which is not before a 2026-05 cutoff
+        self.assertEqual(_maintainer(retention_months=5).expired(names, TODAY), [])
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            _maintainer(retention_mode='truncate')
+
+
+class TestRunOnce(unittest.TestCase):
+    """Test a full maintenance pass."""
+
+    def _run(self, partitions, **kwargs):
+        cur = _cursor(partitions, kwargs.pop('keyframe_rows', ()), kwargs.pop('nonempty', ()))
+        m = _maintainer(**kwargs)
+        pool = MagicMock()
+        pool.connection.return_value.__enter__.return_value.cursor.return_value = cur
+        with patch.object(m, '_pool', return_value=pool):
+            report = m.run_once(TODAY)
+        return report, [c.args[0] for c in cur.execute.call_args_list]
+
+    def test_partitions_new_tables_and_skips_missing(self):
+        report, sqls = self._run({'full_table': [None]})
+
+        self.assertEqual(list(report), ['full_table'])
+        self.assertTrue(any(s.startswith('ALTER TABLE full_table\n') and 'UNIX_TIMESTAMP(inserted_at)' in s
+                            for s in sqls))
+
+    def test_drop_expired(self):
+        names = ['p202606', 'p202607', 'p202608', 'p202609', 'p202610', 'p202611', 'p202612', 'pmax']
+        report, sqls = self._run({'hydration_data': names}, retention_months=3)
+
+        self.assertEqual(report['hydration_data'], {'added': [], 'removed': ['p202606']})
+        self.assertIn('ALTER TABLE hydration_data DROP PARTITION p202606', sqls)
+
+    def test_archive_expired(self):
+        names = ['p202606', 'p202607', 'p202608', 'p202609', 'p202610', 'p202611', 'p202612', 'pmax']
+        _, sqls = self._run({'pool_data': names}, retention_months=3, retention_mode='archive')
+
+        archive = [s for s in sqls if 'archive' in s or 'DROP PARTITION' in s]
+        self.assertEqual(archive, [
+            'CREATE TABLE IF NOT EXISTS pool_data_archive_p202606 LIKE pool_data',
+            'ALTER TABLE pool_data_archive_p202606 REMOVE PARTITIONING',
+            'ALTER TABLE pool_data EXCHANGE PARTITION p202606 WITH TABLE pool_data_archive_p202606',
+            'ALTER TABLE pool_data DROP PARTITION p202606',
+        ])
+
+    def test_archive_rerun_after_interruption(self):
+        """EXCHANGE done, DROP PARTITION not: the next run only drops the now-empty partition."""
+        names = ['p202606', 'p202607', 'p202608', 'p202609', 'p202610', 'p202611', 'p202612', 'pmax']
+        report, sqls = self._run({'pool_data': names, 'pool_data_archive_p202606': [None]},
+                                 retention_months=3, retention_mode='archive',
+                                 nonempty=('pool_data_archive_p202606',))
+
+        self.assertEqual(report['pool_data']['removed'], ['p202606'])
+        self.assertFalse(any('REMOVE PARTITIONING' in s or 'EXCHANGE' in s or 'CREATE TABLE' in s for s in sqls))
+        self.assertIn('ALTER TABLE pool_data DROP PARTITION p202606', sqls)
+
+    def test_archive_rerun_with_empty_archive(self):
+        """Archive created (still partitioned) but nothing exchanged yet: finish the exchange."""
+        names = ['p202606', 'p202607', 'p202608', 'p202609', 'p202610', 'p202611', 'p202612', 'pmax']
+        _, sqls = self._run({'pool_data': names, 'pool_data_archive_p202606': names},
+                            retention_months=3, retention_mode='archive')
+
+        archive = [s for s in sqls if s.startswith('ALTER TABLE') and ('archive' in s or 'DROP PARTITION' in s)]
+        self.assertEqual(archive, [
+            'ALTER TABLE pool_data_archive_p202606 REMOVE PARTITIONING',
+            'ALTER TABLE pool_data EXCHANGE PARTITION p202606 WITH TABLE pool_data_archive_p202606',
+            'ALTER TABLE pool_data DROP PARTITION p202606',
+        ])
+
+    def test_archive_conflict_keeps_partition(self):
+        names = ['p202606', 'p202607', 'p202608', 'p202609', 'p202610', 'p202611', 'p202612', 'pmax']
+        report, sqls = self._run({'pool_data': names, 'pool_data_archive_p202606': [None]},
+                                 retention_months=3, retention_mode='archive',
+                                 nonempty=('pool_data_archive_p202606', 'pool_data PARTITION (p202606)'))
+
+        self.assertEqual(report['pool_data']['removed'], [])
+        self.assertNotIn('ALTER TABLE pool_data DROP PARTITION p202606', sqls)
+
+    def test_keyframe_in_use_is_kept(self):
+        names = ['p202606', 'p202607', 'p202608', 'p202609', 'p202610', 'p202611', 'p202612', 'pmax']
+        report, sqls = self._run({'multipleFACT': names, 'multipleFACT_asset': names},
+                                 retention_months=3, keyframe_rows=[(1,)])
+
+        self.assertEqual(report['multipleFACT']['removed'], [])
+        self.assertEqual(report['multipleFACT_asset']['removed'], [])
+        self.assertFalse(any('DROP PARTITION' in s for s in sqls))
+
+    def test_table_error_does_not_stop_others(self):
+        cur = MagicMock()
+
+        def execute(sql, params=None):
+            if 'REORGANIZE' in sql and 'hydration_data' in sql:
+                raise MySQLError("lock wait timeout")
+
+        cur.execute.side_effect = execute
+        m = _maintainer()
+        existing = {'pool_data': ['pmax'], 'hydration_data': ['pmax']}
+        with patch.object(m, 'partitions', side_effect=lambda c, table: existing.get(table)), \
+             patch.object(m, '_pool') as pool:
+            pool.return_value.connection.return_value.__enter__.return_value.cursor.return_value = cur
+            report = m.run_once(TODAY)
+
+        self.assertNotIn('hydration_data', report)
+        self.assertEqual(report['pool_data']['added'], ['p202610', 'p202611', 'p202612'])
+
+if __name__ == '__main__':
+    unittest.main()
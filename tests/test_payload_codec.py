@@ -0,0 +1,113 @@
+"""
+Tests for payload_codec.py module.
+
+Tests the keyframe / delta encoding of multipleFACT payloads and that every
+stored form decodes back to the original payload.
+"""
+
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+import payload_codec
+from payload_codec import apply_patch, decode_payload, encode_delta, encode_keyframe, make_patch
+
+
+def _payload(apy, extra=()):
+    rows = [{'Asset': f'T{i}', 'apy': apy + i, 'tvl': 1000.0, 'price': None} for i in range(50)]
+    rows.extend(extra)
+    return {'batch_id_bifrost': 7, 'bifrost_data': rows, 'combined_created_at': '2024-01-01T00:00:00'}
+
+
+class TestPatch(unittest.TestCase):
+    """Test make_patch / apply_patch."""
+
+    def test_round_trip(self):
+        base = _payload(1.0)
+        cases = [
+            _payload(1.0),
+            _payload(2.5),
+            _payload(1.0, extra=[{'Asset': 'new', 'apy': None}]),
+            {'batch_id_bifrost': 8, 'bifrost_data': []},
+            dict(_payload(1.0), batch_id_bifrost=None),
+        ]
+        for new in cases:
+            self.assertEqual(apply_patch(base, make_patch(base, new)), new)
+
+    def test_only_changes_are_kept(self):
+        base = _payload(1.0)
+        new = json.loads(json.dumps(base))
+        new['bifrost_data'][3]['apy'] = 99.0
+
+        self.assertIsNone(make_patch(base, base))
+        self.assertEqual(make_patch(base, new), {'d': {'bifrost_data': {'l': {'3': {'d': {'apy': {'v': 99.0}}}}}}})
+
+    def test_row_count_change_is_diffed_by_key(self):
+        base = _payload(1.0)
+        new = json.loads(json.dumps(base))
+        del new['bifrost_data'][10]
+        new['bifrost_data'].insert(20, {'Asset': 'new', 'apy': None})
+        new['bifrost_data'][30]['apy'] = 99.0
+
+        node = make_patch(base, new)['d']['bifrost_data']
+        self.assertEqual(node, {'s': [
+            {'c': [0, 10]}, {'c': [11, 10]}, {'v': {'Asset': 'new', 'apy': None}},
+            {'c': [21, 9]}, {'p': 30, 'n': {'d': {'apy': {'v': 99.0}}}}, {'c': [31, 19]},
+        ]})
+        self.assertEqual(apply_patch(base, make_patch(base, new)), new)
+        self.assertLess(len(json.dumps(node)), len(json.dumps(new['bifrost_data'])) // 10)
+
+        grown = _payload(1.0, extra=[{'Asset': 'T50', 'apy': 3.0}])
+        self.assertEqual(make_patch(base, grown)['d']['bifrost_data'],
+                         {'s': [{'c': [0, 50]}, {'v': {'Asset': 'T50', 'apy': 3.0}}]})
+
+    def test_row_count_change_without_key_is_diffed_by_position(self):
+        base = {'rows': [[1, 2], [3, 4], [5, 6]], 'dup': [{'symbol': 'A', 'v': 1}, {'symbol': 'A', 'v': 2}]}
+        for new in ({'rows': [[1, 2], [3, 5]], 'dup': [{'symbol': 'A', 'v': 1}]},
+                    {'rows': [[1, 2], [3, 4], [5, 6], [7]], 'dup': base['dup'] + [{'symbol': 'B'}]}):
+            self.assertEqual(apply_patch(base, make_patch(base, new)), new)
+        self.assertEqual(make_patch(base, {'rows': [[1, 2], [3, 4]], 'dup': base['dup']}),
+                         {'d': {'rows': {'s': [{'c': [0, 2]}]}}})
+
+    def test_type_change_is_replaced(self):
+        self.assertEqual(make_patch({'a': 1}, {'a': 1.0}), {'d': {'a': {'v': 1.0}}})
+        self.assertEqual(make_patch({'a': 1}, {'a': True}), {'d': {'a': {'v': True}}})
+
+
+class TestEncoding(unittest.TestCase):
+    """Test the stored forms."""
+
+    def test_keyframe_and_delta_decode(self):
+        keyframe_json = json.dumps(_payload(1.0))
+        new = _payload(1.5)
+        keyframe_blob = encode_keyframe(keyframe_json)
+        keyframe = decode_payload('zlib', None, keyframe_blob)
+        delta_blob = encode_delta(keyframe, json.dumps(new))
+
+        self.assertEqual(keyframe, _payload(1.0))
+        self.assertEqual(decode_payload('zlib-delta', None, delta_blob, keyframe), new)
+        self.assertEqual(decode_payload(None, json.dumps(new), None), new)
+        self.assertLess(len(keyframe_blob), len(keyframe_json) // 3)
+
+    def test_delta_needs_keyframe(self):
+        with self.assertRaises(ValueError):
+            decode_payload('zlib-delta', None, encode_delta({}, '{}'))
+
+    def test_compression_mode(self):
+        with patch.dict(os.environ, {'MERGE_PAYLOAD_COMPRESSION': 'ZLIB-delta'}):
+            self.assertEqual(payload_codec.compression_mode(), 'zlib-delta')
+        with patch.dict(os.environ, {'MERGE_PAYLOAD_COMPRESSION': 'zstd'}):
+            with self.assertRaises(ValueError):
+                payload_codec.compression_mode()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -189,8 +189,19 @@ class TestBifrostDatabaseUpdate(unittest.TestCase):
         
         db.update_bifrost_database(df1, df2, batch_id)
         
-        # Should have executed INSERT statements
-        self.assertTrue(mock_cursor.execute.called)
+        # One executemany per table, one connection, one commit
+        calls = mock_cursor.executemany.call_args_list
+        self.assertEqual(len(calls), 4)
+        self.assertIn('Bifrost_site_table', calls[0][0][0])
+        self.assertEqual(calls[0][0][1], [(batch_id, 'DOT', 5.0), (batch_id, 'KSM', 25.0)])
+        self.assertIn('Bifrost_staking_table', calls[1][0][0])
+        self.assertEqual(calls[1][0][1], [(batch_id, 'vDOT', 15.5)])
+        self.assertIn('Bifrost_batchID_table', calls[2][0][0])
+        self.assertIn('latest_batch', calls[3][0][0])
+        self.assertEqual(calls[3][0][1], [('Bifrost_site_table', batch_id, 2, None),
+                                          ('Bifrost_staking_table', batch_id, 1, None)])
+        self.assertEqual(mock_connect.call_count, 1)
+        self.assertEqual(mock_connect.return_value.commit.call_count, 1)
     
     @patch('mysql.connector.connect')
     def test_update_bifrost_database_with_nulls(self, mock_connect):
@@ -213,15 +224,59 @@ class TestBifrostDatabaseUpdate(unittest.TestCase):
         batch_id = 123456
         
         db.update_bifrost_database(df1, df2, batch_id)
-        self.assertTrue(mock_cursor.execute.called)
+        
+        site_rows = mock_cursor.executemany.call_args_list[0][0][1]
+        staking_rows = mock_cursor.executemany.call_args_list[1][0][1]
+        self.assertEqual(site_rows[1], (batch_id, None, None))
+        self.assertEqual(staking_rows[0], (batch_id, 'vDOT', None))
+    
+    @patch('mysql.connector.connect')
+    def test_update_bifrost_database_latest_per_asset(self, mock_connect):
+        """Test that usable rows are upserted into the *_latest tables."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.cursor.return_value = mock_cursor
+
+        db = SQL_DB.SQL_DB(userName='u', passWord='p', dataBase='d')
+        df1 = pd.DataFrame({
+            'Asset': ['vDOT', 'TVL', None],
+            'tvl': [10.0, 99.0, 1.0],
+            'apy': [5.0, np.nan, 2.0],
+        })
+        df2 = pd.DataFrame({'symbol': ['vDOT', 'vKSM'], 'price': [7.5, None]})
+
+        db.update_bifrost_database(df1, df2, 42)
+
+        calls = {c[0][0].split()[2]: c for c in mock_cursor.executemany.call_args_list}
+        site_sql, site_rows = calls['Bifrost_site_latest'][0]
+        self.assertIn('ON DUPLICATE KEY UPDATE', site_sql)
+        # no APY value / no Asset -> keeps the previous current row
+        self.assertEqual(site_rows, [(42, 'vDOT', 10.0, 5.0, None, None)])
+        self.assertEqual(calls['Bifrost_staking_latest'][0][1], [(42, 'vDOT', 7.5)])
+        self.assertEqual(mock_connect.return_value.commit.call_count, 1)
+
+    @patch('mysql.connector.connect')
+    def test_update_bifrost_database_rolls_back_on_error(self, mock_connect):
+        """Test that a failing insert rolls back the whole batch."""
+        mock_cursor = MagicMock()
+        mock_cursor.executemany.side_effect = [None, Exception("insert failed")]
+        mock_connect.return_value.cursor.return_value = mock_cursor
+        
+        db = SQL_DB.SQL_DB(userName='u', passWord='p', dataBase='d')
+        df1 = pd.DataFrame({'Asset': ['DOT'], 'price': [5.0]})
+        df2 = pd.DataFrame({'symbol': ['vDOT'], 'apr': [15.5]})
+        
+        self.assertFalse(db.update_bifrost_database(df1, df2, 123456))
+        
+        mock_connect.return_value.commit.assert_not_called()
+        mock_connect.return_value.rollback.assert_called()
 
 
 class TestSQLDBConnectionManagement(unittest.TestCase):
     """Test database connection management."""
     
     @patch('mysql.connector.connect')
-    def test_connection_close(self, mock_connect):
-        """Test that connections are properly closed."""
+    def test_connection_returned_to_pool(self, mock_connect):
+        """Test that connections are returned to the shared pool and reused."""
         mock_cursor = MagicMock()
         mock_conn = MagicMock()
         mock_conn.cursor.return_value = mock_cursor
@@ -230,10 +285,26 @@ class TestSQLDBConnectionManagement(unittest.TestCase):
         
         db = SQL_DB.SQL_DB(userName='u', passWord='p', dataBase='d')
         db.executeSQL("SELECT 1")
+        db.executeSQL("SELECT 2")
         
-        # Verify cursor and connection were closed
+        # Cursor closed, connection kept open and reused for the second statement
         mock_cursor.close.assert_called()
+        mock_conn.close.assert_not_called()
+        self.assertEqual(mock_connect.call_count, 1)
+        self.assertEqual(db._pool().stats()['borrows'], 2)
+    
+    @patch('mysql.connector.connect')
+    def test_connection_discarded_on_error(self, mock_connect):
+        """Test that a connection which raised is closed instead of pooled."""
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value.execute.side_effect = Exception("boom")
+        mock_connect.return_value = mock_conn
+        
+        db = SQL_DB.SQL_DB(userName='u', passWord='p', dataBase='d')
+        db.executeSQL("SELECT 1")
+        
         mock_conn.close.assert_called()
+        self.assertEqual(db._pool().stats()['idle'], 0)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,176 @@
+"""
+Tests for SQL_DB_combinedTables.py module.
+
+Tests how the combiner resolves the current batches and the latest row per
+Bifrost asset/symbol, including the fallbacks used before the registry and
+*_latest tables exist.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import decimal
+
+from mysql.connector import Error as MySQLError
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+from SQL_DB_combinedTables import SQL_DB_CombinedTables
+
+
+def _combiner(responses):
+    """Combiner whose execute() answers by the first matching substring in `responses`."""
+    db = SQL_DB_CombinedTables(user='u', password='p', db='d', db_port=3306, host='h')
+
+    def execute(sql, params=None):
+        for needle, result in responses.items():
+            if needle in sql:
+                if isinstance(result, Exception):
+                    raise result
+                return result
+        return []
+
+    db.execute = MagicMock(side_effect=execute)
+    return db
+
+
+class TestLatestBatches(unittest.TestCase):
+    """Test batch resolution through the latest_batch registry."""
+
+    def test_registry_replaces_sort(self):
+        db = _combiner({
+            'FROM latest_batch': [{'source': 'hydration_data', 'batch_id': 5, 'created_at': None}],
+            'ORDER BY created_at DESC': [{'batch_id': 1}],
+        })
+        db._registry = db.latest_batches()
+
+        self.assertEqual(db.latest_batch_id('hydration_data'), 5)
+        # not in the registry -> sorted lookup
+        self.assertEqual(db.latest_batch_id('pool_data'), 1)
+
+    def test_missing_registry_is_empty(self):
+        db = _combiner({'FROM latest_batch': MySQLError("Table 'd.latest_batch' doesn't exist")})
+        self.assertEqual(db.latest_batches(), {})
+
+
+class TestLatestPerAsset(unittest.TestCase):
+    """Test the Bifrost_site_latest / Bifrost_staking_latest reads."""
+
+    def test_site_rows_from_latest_table(self):
+        db = _combiner({
+            'FROM Bifrost_site_latest': [{
+                'sym': 'vDOT', 'farming_apy': 1, 'base_apy': 2, 'total_apy': 3,
+                'tvl_val': 4, 'batch_id': 9, 'created_at': None,
+            }],
+        })
+        rows = db.rows_from_bifrost_site_latest({'vdot': decimal.Decimal('5')})
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['batch_id'], 9)
+        self.assertEqual(rows[0]['price'], decimal.Decimal('5'))
+        self.assertEqual(db.execute.call_count, 1)
+
+    def test_site_rows_fall_back_to_history(self):
+        db = _combiner({
+            'FROM Bifrost_site_latest': MySQLError("Table 'd.Bifrost_site_latest' doesn't exist"),
+            'FROM Bifrost_site_table t': [{'sym': 'vKSM', 'total_apy': 1, 'batch_id': 3}],
+        })
+        rows = db.rows_from_bifrost_site_latest({})
+
+        self.assertEqual([r['batch_id'] for r in rows], [3])
+
+    def test_staking_price_fallback(self):
+        db = _combiner({
+            'FROM latest_batch': [],
+            'ORDER BY created_at DESC': [{'batch_id': 2}],
+            'FROM `Hydration_price`': [{'symbol': 'DOT', 'price_usdt': 6}],
+            'FROM Bifrost_staking_latest': [{'symbol': 'DOT', 'price': 7}, {'symbol': 'vDOT', 'price': 8}],
+        })
+        prices = db.latest_price_map()
+
+        # Hydration price wins, staking fills the gaps
+        self.assertEqual(prices, {'dot': decimal.Decimal('6'), 'vdot': decimal.Decimal('8')})
+
+
+class TestIncrementalRunOnce(unittest.TestCase):
+    """Test that run_once only combines batches newer than the watermarks."""
+
+    def _run(self, registry, watermarks, incremental=True, bifrost_rows=()):
+        db = SQL_DB_CombinedTables(user='u', password='p', db='d', db_port=3306, host='h')
+        with patch.object(db, 'ensure_full_table'), \
+             patch.object(db, 'latest_batches', return_value=registry), \
+             patch.object(db, 'combined_watermarks', return_value=watermarks), \
+             patch.object(db, 'latest_price_map', return_value={}) as price_map, \
+             patch.object(db, 'rows_from_hydration', return_value=[{'batch_id': 1}]) as hydration, \
+             patch.object(db, 'rows_from_pool', return_value=[{'batch_id': 2}]) as pool, \
+             patch.object(db, 'rows_from_bifrost_site_latest', return_value=list(bifrost_rows)), \
+             patch.object(db, 'insert_full_rows', return_value=0) as insert:
+            db.run_once(incremental=incremental)
+        return price_map, hydration, pool, insert
+
+    def test_no_new_batches_is_noop(self):
+        registry = {'hydration_data': 1, 'pool_data': 2, 'Bifrost_site_table': 3}
+        price_map, hydration, pool, insert = self._run(registry, dict(registry))
+
+        price_map.assert_not_called()
+        insert.assert_not_called()
+
+    def test_only_new_sources_are_combined(self):
+        registry = {'hydration_data': 11, 'pool_data': 2, 'Bifrost_site_table': 4}
+        watermarks = {'hydration_data': 1, 'pool_data': 2, 'Bifrost_site_table': 3}
+        bifrost = [{'batch_id': 4}, {'batch_id': 3}, {'batch_id': None}]
+        _, hydration, pool, insert = self._run(registry, watermarks, bifrost_rows=bifrost)
+
+        hydration.assert_called_once_with(11, {})
+        pool.assert_not_called()
+        rows, new = insert.call_args[0]
+        self.assertEqual(rows, [{'batch_id': 1}, {'batch_id': 4}])
+        self.assertEqual(new, {'hydration_data': 11, 'Bifrost_site_table': 4})
+
+    def test_bifrost_batch_newer_than_registry_waits(self):
+        """A Bifrost batch stored between the registry read and the latest-row read is left for the next run."""
+        registry = {'hydration_data': 1, 'pool_data': 2, 'Bifrost_site_table': 4}
+        watermarks = {'hydration_data': 1, 'pool_data': 2, 'Bifrost_site_table': 3}
+        bifrost = [{'batch_id': 5}, {'batch_id': 4}]
+        _, _, _, insert = self._run(registry, watermarks, bifrost_rows=bifrost)
+
+        rows, new = insert.call_args[0]
+        self.assertEqual(rows, [{'batch_id': 4}])
+        self.assertEqual(new, {'Bifrost_site_table': 4})
+
+        registry['Bifrost_site_table'], watermarks['Bifrost_site_table'] = 5, 4
+        _, _, _, insert = self._run(registry, watermarks, bifrost_rows=bifrost)
+        self.assertEqual(insert.call_args[0], ([{'batch_id': 5}], {'Bifrost_site_table': 5}))
+
+    def test_full_mode_reinserts_latest(self):
+        registry = {'hydration_data': 1, 'pool_data': 2, 'Bifrost_site_table': 3}
+        _, hydration, pool, insert = self._run(registry, dict(registry), incremental=False,
+                                               bifrost_rows=[{'batch_id': 3}])
+
+        hydration.assert_called_once()
+        pool.assert_called_once()
+        self.assertEqual(len(insert.call_args[0][0]), 3)
+
+    def test_watermarks_written_with_rows(self):
+        db = SQL_DB_CombinedTables(user='u', password='p', db='d', db_port=3306, host='h')
+        db.conn = MagicMock()
+        cur = db.conn.cursor.return_value
+        row = dict(source='pool_data', chain='moonbeam', batch_id=2, symbol=None, farm_apy=None, pool_apy=None,
+                   apy=None, tvl=None, volume=None, tx=None, price=None, created_at=None)
+
+        self.assertEqual(db.insert_full_rows([row], {'pool_data': 2}), 1)
+
+        sqls = [c.args[0] for c in cur.executemany.call_args_list]
+        self.assertIn('INSERT INTO full_table', sqls[0])
+        self.assertIn('full_table_watermark', sqls[1])
+        self.assertEqual(cur.executemany.call_args_list[1].args[1], [('pool_data', 2)])
+        db.conn.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
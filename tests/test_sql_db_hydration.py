@@ -185,13 +185,13 @@ class TestSQLDBHydrationUpdate(unittest.TestCase):
         
         db.update_hydration_database(processed_data, batch_id)
         
-        # Should have 2 INSERT calls (one per record)
-        self.assertEqual(mock_cursor.execute.call_count, 2)
-        
-        # Verify batch_id is in the calls
-        calls = [str(c) for c in mock_cursor.execute.call_args_list]
-        for call_str in calls:
-            self.assertIn(str(batch_id), call_str)
+        # One multi-row INSERT for both records, committed once
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertIn('INSERT INTO hydration_data', sql)
+        self.assertEqual(sql.count('(%s, %s, %s, %s, %s, %s, %s, %s, %s)'), 2)
+        self.assertEqual(params.count(batch_id), 2)
+        self.assertEqual(mock_connect.return_value.commit.call_count, 1)
     
     @patch('mysql.connector.connect')
     def test_update_hydration_database_empty(self, mock_connect):
@@ -247,9 +247,10 @@ class TestSQLDBHydrationUpdate(unittest.TestCase):
         
         self.assertTrue(mock_cursor.execute.called)
         
-        # Verify NULL is in the SQL
-        call_str = str(mock_cursor.execute.call_args)
-        self.assertIn('NULL', call_str)
+        # NULL values are bound as None parameters
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertEqual(params[3], None)
+        self.assertEqual(params[4], None)
     
     @patch('mysql.connector.connect')
     def test_update_hydration_database_special_chars(self, mock_connect):
@@ -279,10 +280,12 @@ class TestSQLDBHydrationUpdate(unittest.TestCase):
         
         batch_id = 123456
         
-        # Should escape quotes properly
+        # Quotes are passed as parameters, never spliced into the SQL
         db.update_hydration_database(processed_data, batch_id)
         
-        self.assertTrue(mock_cursor.execute.called)
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertNotIn("DOT'TEST", sql)
+        self.assertIn("DOT'TEST", params)
 
 
 class TestSQLDBHydrationErrorHandling(unittest.TestCase):
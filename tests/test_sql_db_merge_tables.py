@@ -13,6 +13,7 @@ import pandas as pd
 import numpy as np
 import decimal
 import datetime
+import json
 
 # Setup path and environment
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,6 +26,8 @@ os.environ.setdefault('DB_PASSWORD', 'test_pass')
 os.environ.setdefault('DB_NAME', 'test_db')
 
 from SQL_DB_mergeTables import SQL_DB_MergeTables
+from snapshot_assets import snapshot_rows
+import payload_codec
 
 
 class TestSQLDBMergeTablesInit(unittest.TestCase):
@@ -387,5 +390,281 @@ class TestRunMerge(unittest.TestCase):
         self.assertGreater(mock_cursor.execute.call_count, 0)
 
 
+
+def _snapshot_cursor(answers):
+    """MagicMock cursor whose fetchall() answers the last query by the first matching substring."""
+    cur = MagicMock()
+    state = {}
+
+    def execute(query, params=None):
+        state['query'] = query
+
+    def fetchall():
+        for needle, rows in answers.items():
+            if needle in state['query']:
+                return rows
+        return []
+
+    cur.execute.side_effect = execute
+    cur.fetchall.side_effect = fetchall
+    cur.description = None
+    return cur
+
+
+CREATED = datetime.datetime(2024, 1, 1)
+REGISTRY = [
+    ('Bifrost_site_table', 7, CREATED, 'a'), ('Bifrost_staking_table', 7, CREATED, 'a'),
+    ('hydration_data', 8, CREATED, None), ('pool_data', 9, CREATED, None), ('Hydration_price', 10, CREATED, 'b'),
+]
+LATEST = {source: (batch_id, created, data_hash) for source, batch_id, created, data_hash in REGISTRY}
+
+
+class TestRowsToJsonArray(unittest.TestCase):
+    """Test the single-pass cursor rows -> JSON records conversion."""
+
+    def _db(self):
+        return SQL_DB_MergeTables(userName='user', passWord='pass', host='localhost', dataBase='db', port=3306)
+
+    def test_cursor_rows(self):
+        rows = [
+            ('DOT', decimal.Decimal('1.5'), float('nan'), 3, CREATED),
+            ('KSM', None, float('-inf'), np.int64(4), None),
+        ]
+        result = self._db()._rows_to_json_array(['symbol', 'tvl', 'apy', 'batch_id', 'created_at'], rows)
+
+        self.assertEqual(result, [
+            {'symbol': 'DOT', 'tvl': 1.5, 'apy': None, 'batch_id': 3, 'created_at': CREATED},
+            {'symbol': 'KSM', 'tvl': None, 'apy': None, 'batch_id': 4, 'created_at': None},
+        ])
+        self.assertIs(type(result[1]['batch_id']), int)
+
+    def test_matches_dataframe_path(self):
+        db = self._db()
+        df = pd.DataFrame({'a': [1.0, np.nan, np.inf], 'b': ['x', None, 'z'], 'c': [1, 2, 3]})
+        records = db._rows_to_json_array(list(df.columns), df.itertuples(index=False, name=None))
+
+        self.assertEqual(db._df_to_json_array(df), records)
+        self.assertEqual(records[1], {'a': None, 'b': None, 'c': 2})
+
+    def test_nat_is_none(self):
+        self.assertIsNone(self._db()._sanitize_scalar(pd.NaT))
+
+
+class TestSnapshotAssets(unittest.TestCase):
+    """Test the normalized multipleFACT_asset rows written with each snapshot."""
+
+    PAYLOAD = {
+        'bifrost_data': [{'Asset': 'vDOT', 'tvl': 1.0, 'apy': 5.0, 'apyBase': 4.0, 'apyReward': 1.0, 'price': 7.0}],
+        'moonbeam_data': [{'token0_symbol': 'GLMR', 'token1_symbol': 'xcDOT', 'final_apr': 9.0},
+                          {'token0_symbol': None, 'token1_symbol': None}],
+        'hydration_data': [],
+        'hydration_price_data': [{'symbol': 'DOT', 'price_usdt': 6.0}],
+        'bifrost_hydration_data': [{'Asset': 'vDOT'}],
+    }
+
+    def test_snapshot_rows(self):
+        rows = snapshot_rows(self.PAYLOAD)
+
+        self.assertEqual([(r['section'], r['row_no'], r['chain'], r['symbol']) for r in rows], [
+            ('bifrost', 1, 'bifrost', 'vDOT'),
+            ('moonbeam', 1, 'moonbeam', 'GLMR-xcDOT'),
+            ('moonbeam', 2, 'moonbeam', None),
+            ('hydration_price', 1, 'hydration', 'DOT'),
+        ])
+        self.assertEqual((rows[0]['apy'], rows[0]['pool_apy'], rows[0]['price']), (5.0, 4.0, 7.0))
+        self.assertEqual(rows[3]['price'], 6.0)
+
+    @patch('mysql.connector.connect')
+    def test_insert_writes_rows_in_same_transaction(self, mock_connect):
+        cur = mock_connect.return_value.cursor.return_value
+        cur.lastrowid = 42
+        db = SQL_DB_MergeTables(userName='user', passWord='pass', host='localhost', dataBase='db', port=3306)
+
+        self.assertEqual(db.insert_combined_payload(self.PAYLOAD, 'h', 's'), 42)
+
+        first, second = cur.execute.call_args_list
+        self.assertIn('INSERT INTO multipleFACT (payload', first.args[0])
+        self.assertIn('INSERT INTO multipleFACT_asset (snapshot_id, section', second.args[0])
+        self.assertEqual(second.args[1][:4], [42, 'bifrost', 1, 'bifrost'])
+        self.assertEqual(len(second.args[1]), 4 * 11)
+        mock_connect.return_value.commit.assert_called_once()
+
+
+class TestCompressedPayload(unittest.TestCase):
+    """Test MERGE_PAYLOAD_COMPRESSION storage and load_payload."""
+
+    PAYLOAD = {'batch_id_bifrost': 7, 'bifrost_data': [{'Asset': 'vDOT', 'apy': 5.0}]}
+
+    def _db(self):
+        return SQL_DB_MergeTables(userName='user', passWord='pass', host='localhost', dataBase='db', port=3306)
+
+    @patch.dict(os.environ, {'MERGE_PAYLOAD_COMPRESSION': 'zlib-delta', 'MERGE_PAYLOAD_KEYFRAME_EVERY': '24'})
+    @patch('mysql.connector.connect')
+    def test_delta_against_last_keyframe(self, mock_connect):
+        cur = mock_connect.return_value.cursor.return_value
+        keyframe = dict(self.PAYLOAD, batch_id_bifrost=6)
+        cur.fetchone.side_effect = [(3, payload_codec.encode_keyframe(json.dumps(keyframe))), (5,)]
+
+        self._db().insert_combined_payload(self.PAYLOAD, 'h')
+
+        sql, params = cur.execute.call_args_list[2].args
+        self.assertIn('payload_format, payload_blob, base_id', sql)
+        self.assertEqual((params[0], params[2]), ('zlib-delta', 3))
+        self.assertEqual(payload_codec.decode_payload('zlib-delta', None, params[1], keyframe), self.PAYLOAD)
+
+    @patch.dict(os.environ, {'MERGE_PAYLOAD_COMPRESSION': 'zlib-delta', 'MERGE_PAYLOAD_KEYFRAME_EVERY': '6'})
+    @patch('mysql.connector.connect')
+    def test_new_keyframe_after_interval(self, mock_connect):
+        cur = mock_connect.return_value.cursor.return_value
+        cur.fetchone.side_effect = [(3, payload_codec.encode_keyframe('{}')), (5,)]
+
+        self._db().insert_combined_payload(self.PAYLOAD, 'h')
+
+        params = cur.execute.call_args_list[2].args[1]
+        self.assertEqual((params[0], params[2]), ('zlib', None))
+        self.assertEqual(payload_codec.decode_payload('zlib', None, params[1]), self.PAYLOAD)
+
+    @patch('mysql.connector.connect')
+    def test_load_payload_rebuilds_delta(self, mock_connect):
+        cur = mock_connect.return_value.cursor.return_value
+        keyframe = dict(self.PAYLOAD, batch_id_bifrost=6)
+        delta = payload_codec.encode_delta(keyframe, json.dumps(self.PAYLOAD))
+        cur.fetchone.side_effect = [
+            (9, None, 'zlib-delta', delta, 3),
+            (3, None, 'zlib', payload_codec.encode_keyframe(json.dumps(keyframe)), None),
+        ]
+
+        self.assertEqual(self._db().load_payload(9), self.PAYLOAD)
+        self.assertEqual(cur.execute.call_args_list[1].args[1], (3,))
+
+    @patch('mysql.connector.connect')
+    def test_load_plain_payload(self, mock_connect):
+        cur = mock_connect.return_value.cursor.return_value
+        cur.fetchone.return_value = (9, json.dumps(self.PAYLOAD), None, None, None)
+
+        self.assertEqual(self._db().load_payload(), self.PAYLOAD)
+
+
+class TestReadSources(unittest.TestCase):
+    """Test the single-connection consistent-snapshot read."""
+
+    def _db(self):
+        return SQL_DB_MergeTables(userName='user', passWord='pass', host='localhost', dataBase='db', port=3306)
+
+    @patch('mysql.connector.connect')
+    def test_one_snapshot_with_registry_batches(self, mock_connect):
+        cur = _snapshot_cursor({'FROM latest_batch': REGISTRY, 'SELECT sources_hash': [('older',)]})
+        mock_connect.return_value.cursor.return_value = cur
+        mock_connect.return_value.in_transaction = False  # closed by read_sources' rollback
+
+        sources = self._db().read_sources()
+
+        self.assertEqual(mock_connect.call_count, 1)
+        calls = [c.args for c in cur.execute.call_args_list]
+        self.assertEqual(calls[0], ('START TRANSACTION WITH CONSISTENT SNAPSHOT',))
+        self.assertIn((SQL_DB_MergeTables.Q_BIFROST_DATA_BY_BATCH, (7,)), calls)
+        self.assertIn((SQL_DB_MergeTables.Q_POOLS_DATA_BY_BATCH, (9,)), calls)
+        self.assertIn((SQL_DB_MergeTables.Q_BIFROST_HYDRATION_COMBINED_BY_BATCH, (7, 8)), calls)
+        # metadata comes from the registry, no sort queries
+        self.assertFalse(any('ORDER BY created_at DESC' in c[0] for c in calls))
+        self.assertEqual(sources['hydration_price_meta'][:2], (10, CREATED))
+        self.assertEqual(sources['pools'], [])
+        self.assertEqual(sources['sources_hash'], SQL_DB_MergeTables.sources_hash(LATEST))
+        mock_connect.return_value.rollback.assert_called_once()
+
+    @patch('mysql.connector.connect')
+    def test_unchanged_sources_return_none(self, mock_connect):
+        current = SQL_DB_MergeTables.sources_hash(LATEST)
+        cur = _snapshot_cursor({'FROM latest_batch': REGISTRY, 'SELECT sources_hash': [(current,)]})
+        mock_connect.return_value.cursor.return_value = cur
+
+        self.assertIsNone(self._db().read_sources())
+        # START, registry, last sources_hash -> nothing else
+        self.assertEqual(cur.execute.call_count, 3)
+
+    @patch('mysql.connector.connect')
+    def test_missing_sources_fall_back_to_sorts(self, mock_connect):
+        registry = [('Bifrost_site_table', 7, None, None), ('Bifrost_staking_table', 6, None, None)]
+        cur = _snapshot_cursor({'FROM latest_batch': registry, 'LIMIT 1;': [(3, CREATED)]})
+        mock_connect.return_value.cursor.return_value = cur
+
+        sources = self._db().read_sources()
+
+        queries = [c.args[0] for c in cur.execute.call_args_list]
+        # site and staking disagree -> search for the latest common batch
+        self.assertIn(SQL_DB_MergeTables.Q_BIFROST_DATA, queries)
+        self.assertIn(SQL_DB_MergeTables.Q_POOLS_META, queries)
+        self.assertNotIn(SQL_DB_MergeTables.Q_BIFROST_META, queries)
+        self.assertIsNone(sources['sources_hash'])
+        self.assertEqual(sources['bifrost_meta'], (7, None, None))
+
+
+class TestSourcesPreCheck(unittest.TestCase):
+    """Test the source-batch fingerprint that short-circuits run_merge."""
+
+    def _db(self):
+        return SQL_DB_MergeTables(userName='user', passWord='pass', host='localhost', dataBase='db', port=3306)
+
+    def test_sources_hash(self):
+        h = SQL_DB_MergeTables.sources_hash(LATEST)
+        self.assertEqual(len(h), 64)
+        moved = dict(LATEST, pool_data=(11, None, None))
+        self.assertNotEqual(SQL_DB_MergeTables.sources_hash(moved), h)
+        rehashed = dict(LATEST, Hydration_price=(10, None, 'c'))
+        self.assertNotEqual(SQL_DB_MergeTables.sources_hash(rehashed), h)
+        missing = {k: v for k, v in LATEST.items() if k != 'pool_data'}
+        self.assertIsNone(SQL_DB_MergeTables.sources_hash(missing))
+
+    @patch('mysql.connector.connect')
+    def test_unchanged_sources_skip_payload(self, mock_connect):
+        db = self._db()
+        with patch.object(db, 'initialize_tables'), \
+             patch.object(db, 'read_sources', return_value=None), \
+             patch.object(db, 'get_last_merge_hash') as last_hash, \
+             patch.object(db, 'insert_combined_payload') as insert:
+            db.run_merge()
+
+        last_hash.assert_not_called()
+        insert.assert_not_called()
+
+    def _sources(self):
+        sources = {k: [] for k in ('bifrost', 'pools', 'hydration', 'hydration_price', 'bxhy')}
+        sources.update(bifrost_meta=LATEST['Bifrost_site_table'], pools_meta=LATEST['pool_data'],
+                       hydration_meta=None, hydration_price_meta=LATEST['Hydration_price'],
+                       sources_hash=SQL_DB_MergeTables.sources_hash(LATEST))
+        return sources
+
+    @patch('mysql.connector.connect')
+    def test_new_snapshot_stores_sources_hash(self, mock_connect):
+        db = self._db()
+        with patch.object(db, 'initialize_tables'), \
+             patch.object(db, 'read_sources', return_value=self._sources()), \
+             patch.object(db, 'get_last_merge_hash', return_value=None), \
+             patch.object(db, 'insert_combined_payload') as insert:
+            db.run_merge()
+
+        payload, _, sources_hash = insert.call_args[0]
+        self.assertEqual(payload['batch_id_hydration_price'], 10)
+        self.assertEqual(payload['created_at_moonbeam'], CREATED.isoformat())
+        self.assertIsNone(payload['batch_id_hydration'])
+        self.assertEqual(sources_hash, SQL_DB_MergeTables.sources_hash(LATEST))
+
+    @patch('mysql.connector.connect')
+    def test_duplicate_payload_records_sources_hash(self, mock_connect):
+        db = self._db()
+        with patch.object(db, 'initialize_tables'), \
+             patch.object(db, 'read_sources', return_value=self._sources()), \
+             patch('SQL_DB_mergeTables.DataValidator.compute_hash', return_value='same'), \
+             patch.object(db, 'get_last_merge_hash', return_value='same'), \
+             patch.object(db, 'executeSQL') as execute, \
+             patch.object(db, 'insert_combined_payload') as insert:
+            db.run_merge()
+
+        insert.assert_not_called()
+        sql, params = execute.call_args[0]
+        self.assertIn('UPDATE multipleFACT SET sources_hash', sql)
+        self.assertEqual(params, (SQL_DB_MergeTables.sources_hash(LATEST),))
+
+
 if __name__ == '__main__':
     unittest.main()
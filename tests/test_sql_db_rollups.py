@@ -0,0 +1,215 @@
+"""
+Tests for SQL_DB_rollups.py module.
+
+Tests the per-bucket aggregation, the upsert that merges a chunk into the
+stored rollups, the chunked watermark loop and that full_table rows
+re-inserted by a non-incremental combine are counted once.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import datetime
+import json
+from decimal import Decimal
+
+from mysql.connector import Error as MySQLError
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+from SQL_DB_rollups import SQL_DB_Rollups, aggregate, rollup_writers, skip_repeated, symbol_key
+
+T0 = datetime.datetime(2026, 10, 17, 9, 5)
+
+
+def _row(id_, minutes, apy=None, tvl=None, price=None, symbol='{"symbol": "DOT"}', source='hydration_data'):
+    return (id_, source, 'hydration', symbol, apy, tvl, None, price, T0 + datetime.timedelta(minutes=minutes))
+
+
+def _combined(id_, batch_id, apy, symbol='{"symbol": "DOT"}', source='hydration_data'):
+    """full_table row with batch_id, as re-inserted by every non-incremental combine."""
+    return _row(id_, 0, apy=apy, symbol=symbol, source=source) + (batch_id,)
+
+
+class TestAggregate(unittest.TestCase):
+    """Test aggregate() and symbol_key()."""
+
+    def test_symbol_key(self):
+        self.assertEqual(symbol_key('{"symbol": "DOT"}'), 'DOT')
+        self.assertEqual(symbol_key(json.dumps({'symbol': 'GLMR', 'token1_symbol': 'USDC'})), 'GLMR-USDC')
+        self.assertEqual(symbol_key(json.dumps({'symbol': 'xcDOT', 'token1_symbol': None})), 'xcDOT')
+        self.assertEqual(symbol_key('vDOT'), 'vDOT')
+        self.assertIsNone(symbol_key(None))
+
+    def test_hourly_open_close_min_max(self):
+        rows = [
+            _row(1, 30, apy=Decimal('4'), tvl=100),
+            _row(2, 0, apy=Decimal('2')),          # earlier timestamp, later id
+            _row(3, 50, apy=Decimal('3'), tvl=300),
+            _row(4, 60, apy=Decimal('9')),         # next hour
+        ]
+        first, second = aggregate(rows, 'hour')
+
+        self.assertEqual(first['bucket'], datetime.datetime(2026, 10, 17, 9))
+        self.assertEqual((first['apy_open'], first['apy_close']), (2.0, 3.0))
+        self.assertEqual((first['apy_min'], first['apy_max'], first['apy_sum'], first['apy_count']), (2.0, 4.0, 9.0, 3))
+        self.assertEqual((first['tvl_open'], first['tvl_close'], first['tvl_count']), (100.0, 300.0, 2))
+        self.assertIsNone(first['price_open'])
+        self.assertEqual((first['first_at'], first['last_at'], first['n_rows']), (T0, T0 + datetime.timedelta(minutes=50), 3))
+        self.assertEqual(second['bucket'], datetime.datetime(2026, 10, 17, 10))
+
+    def test_daily_keys_and_skipped_rows(self):
+        rows = [
+            _row(1, 0, apy=1),
+            _row(2, 600, apy=2),
+            _row(3, 0, price=7.5, symbol='DOT', source='Hydration_price'),
+            _row(4, 0, apy=5, symbol=None),
+        ]
+        out = aggregate(rows, 'day')
+
+        self.assertEqual(len(out), 2)
+        by_source = {b['source']: b for b in out}
+        self.assertEqual(by_source['hydration_data']['apy_count'], 2)
+        self.assertEqual(by_source['hydration_data']['bucket'], datetime.datetime(2026, 10, 17))
+        self.assertEqual(by_source['Hydration_price']['price_close'], 7.5)
+
+
+class TestSkipRepeated(unittest.TestCase):
+    """Test that full_table rows re-inserted by COMBINE_INCREMENTAL=0 are counted once."""
+
+    def test_repeats_of_latest_batches(self):
+        seen = {}
+        first = [_combined(1, 7, 2), _combined(2, 7, 3, symbol='{"symbol": "KSM"}'),
+                 _combined(3, 5, 9, source='Bifrost_site_table')]
+        kept, added = skip_repeated(first, seen)
+        self.assertEqual(kept, first)
+        self.assertEqual(added[('hydration_data', 'DOT')][0], 7)
+
+        # next combine: the same rows again, DOT gets batch 8, Bifrost stays at batch 5
+        second = [_combined(4, 7, 3, symbol='{"symbol": "KSM"}'), _combined(5, 8, 4),
+                  _combined(6, 5, 9, source='Bifrost_site_table'), _combined(7, 7, 2)]
+        kept, added = skip_repeated(second, seen)
+        self.assertEqual([r[0] for r in kept], [5])
+        self.assertEqual(list(added), [('hydration_data', 'DOT')])
+        self.assertEqual(seen[('hydration_data', 'DOT')][0], 8)
+
+    def test_distinct_rows_of_one_batch_are_kept(self):
+        rows = [_combined(1, 7, 2, symbol='{"symbol": "GLMR", "token1_symbol": "USDC"}', source='pool_data'),
+                _combined(2, 7, 5, symbol='{"symbol": "GLMR", "token1_symbol": "USDC"}', source='pool_data'),
+                _row(3, 0, apy=1)]
+        kept, _ = skip_repeated(rows, {})
+        self.assertEqual(kept, rows)
+
+
+class TestMergeSql(unittest.TestCase):
+    """Test the upsert merging a chunk into stored rollups."""
+
+    def test_open_close_decided_before_bounds_move(self):
+        sql = rollup_writers['rollup_hourly'].insert_sql(1)
+        tail = sql.split('ON DUPLICATE KEY UPDATE', 1)[1]
+
+        self.assertLess(tail.index('apy_open ='), tail.index('first_at ='))
+        self.assertLess(tail.index('price_close ='), tail.index('last_at ='))
+        self.assertIn('apy_sum = apy_sum + VALUES(apy_sum)', tail)
+        self.assertIn('tvl_min = COALESCE(LEAST(tvl_min, VALUES(tvl_min)), tvl_min, VALUES(tvl_min))', tail)
+
+
+class TestRollChunks(unittest.TestCase):
+    """Test the chunked watermark loop."""
+
+    def _rollups(self, source_rows, **kwargs):
+        """SQL_DB_Rollups on a fake pool whose source queries return source_rows[table] after the watermark."""
+        rollups = SQL_DB_Rollups('u', 'p', 'h', 'd', 3306, **kwargs)
+        cur = MagicMock()
+        state = {'watermarks': {}, 'seen': {}, 'sql': '', 'params': None}
+
+        def execute(sql, params=None):
+            state['sql'], state['params'] = sql, params
+            if sql.startswith('INSERT INTO rollup_watermark'):
+                state['watermarks'][params[0]] = params[1]
+            elif sql.startswith('INSERT INTO rollup_seen_rows'):
+                for i in range(0, len(params), 4):
+                    state['seen'][tuple(params[i:i + 3])] = params[i + 3]
+            elif sql.startswith('DELETE FROM rollup_seen_rows'):
+                source, batch_id, *symbols = params
+                state['seen'] = {k: b for k, b in state['seen'].items()
+                                 if not (k[0] == source and k[1] in symbols and b < batch_id)}
+
+        def fetchone():
+            last = state['watermarks'].get(state['params'][0])
+            return (last,) if last is not None else None
+
+        def fetchall():
+            if 'FROM rollup_seen_rows' in state['sql']:
+                return [k + (b,) for k, b in state['seen'].items()]
+            for table, rows in source_rows.items():
+                if f'FROM {table}\n' in state['sql']:
+                    if isinstance(rows, Exception):
+                        raise rows
+                    last_id, limit = state['params']
+                    return [r for r in rows if r[0] > last_id][:limit]
+            return []
+
+        cur.execute.side_effect = execute
+        cur.fetchone.side_effect = fetchone
+        cur.fetchall.side_effect = fetchall
+        cnx = MagicMock()
+        cnx.cursor.return_value = cur
+        pool = MagicMock()
+        pool.connection.return_value.__enter__.return_value = cnx
+        rollups._pool = lambda: pool
+        return rollups, cur, cnx, state
+
+    def test_run_once_is_bounded_and_resumes(self):
+        rows = [_row(i, i, apy=i) for i in range(1, 8)]
+        rollups, cur, cnx, state = self._rollups({'full_table': rows, 'Hydration_price': []},
+                                                 chunk_size=3, max_chunks=2)
+
+        self.assertEqual(rollups.run_once(), {'full_table': 6, 'Hydration_price': 0})
+        self.assertEqual(state['watermarks'], {'full_table': 6})
+        self.assertEqual(rollups.run_once(), {'full_table': 1, 'Hydration_price': 0})
+        self.assertEqual(state['watermarks'], {'full_table': 7})
+
+        upserts = [c.args[0] for c in cur.execute.call_args_list if c.args[0].startswith('INSERT INTO rollup_')]
+        self.assertEqual(sum(s.startswith('INSERT INTO rollup_daily') for s in upserts), 3)
+
+    def test_backfill_runs_until_caught_up(self):
+        rows = [_row(i, i, price=1.0, symbol='DOT', source='Hydration_price') for i in range(1, 11)]
+        rollups, _, _, state = self._rollups({'full_table': [], 'Hydration_price': rows}, chunk_size=3, max_chunks=1)
+
+        self.assertEqual(rollups.backfill()['Hydration_price'], 10)
+        self.assertEqual(state['watermarks'], {'Hydration_price': 10})
+
+    def test_reinserted_batches_counted_once(self):
+        """COMBINE_INCREMENTAL=0: three combines of batch 7, then batch 8, across chunk boundaries."""
+        rows = [_combined(1, 7, 2), _combined(2, 7, 2, symbol='KSM'), _combined(3, 7, 2),
+                _combined(4, 7, 2, symbol='KSM'), _combined(5, 7, 2), _combined(6, 7, 2, symbol='KSM'),
+                _combined(7, 8, 4), _combined(8, 8, 4)]
+        rollups, cur, _, state = self._rollups({'full_table': rows, 'Hydration_price': []}, chunk_size=3, max_chunks=0)
+
+        self.assertEqual(rollups.run_once()['full_table'], 8)
+
+        columns = rollup_writers['rollup_hourly'].columns
+        n_rows = columns.index('n_rows')
+        upserts = [c.args[1] for c in cur.execute.call_args_list if c.args[0].startswith('INSERT INTO rollup_hourly')]
+        counted = sum(params[i + n_rows] for params in upserts for i in range(0, len(params), len(columns)))
+        self.assertEqual(counted, 3)  # DOT@7, KSM@7, DOT@8
+        self.assertEqual(sorted((k[0], k[1], b) for k, b in state['seen'].items()),
+                         [('hydration_data', 'DOT', 8), ('hydration_data', 'KSM', 7)])
+
+    def test_missing_source_is_skipped(self):
+        rows = [_row(1, 0, apy=1)]
+        rollups, _, _, state = self._rollups(
+            {'full_table': rows, 'Hydration_price': MySQLError("Table 'd.Hydration_price' doesn't exist")})
+
+        self.assertEqual(rollups.run_once(), {'full_table': 1, 'Hydration_price': 0})
+        self.assertEqual(state['watermarks'], {'full_table': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
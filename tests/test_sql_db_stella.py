@@ -202,8 +202,10 @@ class TestSQLDBStellaUpdate(unittest.TestCase):
         
         db.update_pool_database(processed_data, batch_id)
         
-        # Should have 3 INSERT calls
-        self.assertEqual(mock_cursor.execute.call_count, 3)
+        # All three pools go in one multi-row INSERT
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertEqual(len(params), 3 * 27)
     
     @patch('mysql.connector.connect')
     def test_update_pool_database_empty(self, mock_connect):
@@ -277,9 +279,10 @@ class TestSQLDBStellaUpdate(unittest.TestCase):
         
         self.assertTrue(mock_cursor.execute.called)
         
-        # Verify NULL is in the SQL
-        call_str = str(mock_cursor.execute.call_args)
-        self.assertIn('NULL', call_str)
+        # NULL values are bound as None parameters (liquidity is pd.NA)
+        sql, params = mock_cursor.execute.call_args[0]
+        self.assertNotIn('NULL', sql)
+        self.assertIsNone(params[10])
     
     @patch('mysql.connector.connect')
     def test_update_pool_database_json_rewards(self, mock_connect):
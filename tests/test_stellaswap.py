@@ -21,6 +21,7 @@ os.environ.setdefault('DB_PASSWORD', 'test_pass')
 os.environ.setdefault('DB_NAME', 'test_db')
 
 import stellaswap_store_raw_data
+from clmm_math import pool_token_amounts
 
 
 class TestFetchPoolsAPR(unittest.TestCase):
@@ -114,6 +115,126 @@ class TestFetchTokenAmounts(unittest.TestCase):
         self.assertIsInstance(a1, float)
 
 
+def _position(tick_lower, tick_upper, liquidity, position_id=None):
+    return {
+        "id": position_id,
+        "tickLower": {"tickIdx": str(tick_lower)},
+        "tickUpper": {"tickIdx": str(tick_upper)},
+        "liquidity": str(liquidity),
+        "pool": {
+            "sqrtPrice": str(int(1.1 * (2**96))),
+            "token0": {"decimals": "6"},
+            "token1": {"decimals": "6"}
+        }
+    }
+
+
+class TestFetchAllTokenAmounts(unittest.TestCase):
+    """Test concurrent and batched position queries."""
+    
+    POSITIONS = {
+        "0xa": [_position(-1000, 3000, 10**9)],
+        "0xb": [_position(0, 2000, 5 * 10**8), _position(-500, 500, 10**8)],
+        "0xc": [],
+    }
+    
+    def _fake_post(self, url, json=None, headers=None, timeout=None):
+        """Answer single and aliased position queries from POSITIONS."""
+        import re
+        self.assertIsNotNone(timeout)
+        query = json['query']
+        data = {}
+        for alias, pool in re.findall(r'(\w+)?:?\s*positions\(where: \{ pool: "(\w+)"', query):
+            data[alias or 'positions'] = self.POSITIONS[pool]
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {"data": data}
+        return response
+    
+    def test_concurrent_and_batched_match_serial(self):
+        pool_ids = ["0xA", "0xB", "0xC"]
+        with patch('requests.Session.post', side_effect=self._fake_post) as mock_post:
+            serial = stellaswap_store_raw_data.fetch_all_token_amounts(pool_ids, concurrency=1)
+            concurrent = stellaswap_store_raw_data.fetch_all_token_amounts(pool_ids, concurrency=3)
+            calls_before = mock_post.call_count
+            batched = stellaswap_store_raw_data.fetch_all_token_amounts(pool_ids, concurrency=2, pools_per_query=2)
+            batched_calls = mock_post.call_count - calls_before
+        
+        self.assertEqual(serial, concurrent)
+        self.assertEqual(serial, batched)
+        self.assertEqual(batched_calls, 2)
+        self.assertGreater(serial["0xB"][0], 0)
+        self.assertEqual(serial["0xC"], (0, 0))
+    
+    def test_failed_query_yields_zero(self):
+        import requests
+        with patch('requests.Session.post', side_effect=requests.Timeout("slow")):
+            amounts = stellaswap_store_raw_data.fetch_all_token_amounts(["0xA", "0xB"], concurrency=2)
+        self.assertEqual(amounts, {"0xA": (0, 0), "0xB": (0, 0)})
+
+
+class TestPositionPaging(unittest.TestCase):
+    """Test id_gt keyset paging over pools with more positions than one page."""
+    
+    POSITIONS = {
+        "0xbig": [_position(-100 * (i % 7), 100 + 50 * (i % 5), 10**6 + i, f"{i:05d}") for i in range(25)],
+        "0xsmall": [_position(-500, 500, 10**8, "00001")],
+    }
+    
+    def _fake_post(self, url, json=None, headers=None, timeout=None):
+        """Answer position queries honouring `first` and `id_gt`."""
+        import re
+        data = {}
+        pattern = r'(\w+)?:?\s*positions\(where: \{ pool: "(\w+)", liquidity_gt: 0(?:, id_gt: "(\w+)")? \}.*?first: (\d+)\)'
+        for alias, pool, after, first in re.findall(pattern, json['query']):
+            page = [p for p in self.POSITIONS[pool] if not after or p["id"] > after]
+            data[alias or 'positions'] = page[:int(first)]
+        self.requests.append(json['query'])
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {"data": data}
+        return response
+    
+    def setUp(self):
+        self.requests = []
+        self.expected = pool_token_amounts(self.POSITIONS["0xbig"])
+    
+    def test_all_pages_aggregated(self):
+        with patch('stellaswap_store_raw_data.requests.post', side_effect=self._fake_post):
+            a0, a1 = stellaswap_store_raw_data.fetch_token_amounts("0xBIG", page_size=10)
+        
+        self.assertAlmostEqual(a0, self.expected[0])
+        self.assertAlmostEqual(a1, self.expected[1])
+        # 10 + 10 + 5 positions, the short third page ends the scan
+        self.assertEqual(len(self.requests), 3)
+        self.assertNotIn('id_gt', self.requests[0])
+        self.assertIn('id_gt: "00009"', self.requests[1])
+        self.assertIn('id_gt: "00019"', self.requests[2])
+    
+    def test_exact_multiple_of_page_size(self):
+        with patch('stellaswap_store_raw_data.requests.post', side_effect=self._fake_post):
+            a0, _ = stellaswap_store_raw_data.fetch_token_amounts("0xBIG", page_size=5)
+        self.assertAlmostEqual(a0, self.expected[0])
+        self.assertEqual(len(self.requests), 6)
+    
+    def test_batched_first_page_then_paging(self):
+        with patch('requests.Session.post', side_effect=self._fake_post):
+            amounts = stellaswap_store_raw_data.fetch_token_amounts_batch(
+                ["0xBIG", "0xSMALL"], session=stellaswap_store_raw_data.create_http_session(), page_size=10)
+        
+        self.assertAlmostEqual(amounts["0xBIG"][0], self.expected[0])
+        self.assertEqual(amounts["0xSMALL"],
+                         pool_token_amounts(self.POSITIONS["0xsmall"]))
+        # one aliased request for both pools, then two follow-up pages for 0xbig only
+        self.assertEqual(len(self.requests), 3)
+    
+    def test_failed_later_page_yields_zero(self):
+        ok = MagicMock(status_code=200)
+        ok.json.return_value = {"data": {"positions": self.POSITIONS["0xbig"][:10]}}
+        with patch('stellaswap_store_raw_data.requests.post', side_effect=[ok, MagicMock(status_code=502)]):
+            self.assertEqual(stellaswap_store_raw_data.fetch_token_amounts("0xBIG", page_size=10), (0, 0))
+
+
 class TestProcessDataCompleteness(unittest.TestCase):
     """Test process_data with full fields."""
     
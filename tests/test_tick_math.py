@@ -0,0 +1,164 @@
+"""
+Tests for tick_math.py module.
+
+Tests the integer TickMath port, exact liquidity amounts, the on-disk
+sqrtPriceX96 lookup table and the "exact" amount mode of fetch_token_amounts.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import math
+import tempfile
+
+# Setup path and environment
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+cao_dir = os.path.join(project_root, 'CAO')
+sys.path.insert(0, cao_dir)
+
+os.environ.setdefault('API_KEY', 'test_key')
+os.environ.setdefault('DB_USERNAME', 'test_user')
+os.environ.setdefault('DB_PASSWORD', 'test_pass')
+os.environ.setdefault('DB_NAME', 'test_db')
+
+import clmm_math
+import stellaswap_store_raw_data
+from tick_math import (
+    get_sqrt_ratio_at_tick, amounts_for_liquidity, SqrtPriceTable, exact_token_amounts,
+    MIN_TICK, MAX_TICK, MIN_SQRT_RATIO, MAX_SQRT_RATIO,
+)
+
+
+def _position(tick_lower, tick_upper, liquidity, sqrt_price_x96):
+    return {
+        "tickLower": {"tickIdx": str(tick_lower)},
+        "tickUpper": {"tickIdx": str(tick_upper)},
+        "liquidity": str(liquidity),
+        "pool": {
+            "sqrtPrice": str(sqrt_price_x96),
+            "token0": {"decimals": "18"},
+            "token1": {"decimals": "6"},
+        },
+    }
+
+
+class TestTickMath(unittest.TestCase):
+    """Test the integer sqrtPriceX96 computation."""
+
+    def test_bounds_match_contract_constants(self):
+        self.assertEqual(get_sqrt_ratio_at_tick(MIN_TICK), MIN_SQRT_RATIO)
+        self.assertEqual(get_sqrt_ratio_at_tick(MAX_TICK), MAX_SQRT_RATIO)
+        self.assertEqual(get_sqrt_ratio_at_tick(0), 2 ** 96)
+
+    def test_close_to_float(self):
+        for tick in (-500000, -60, -1, 1, 60, 12345, 500000):
+            expected = math.sqrt(1.0001 ** tick) * 2 ** 96
+            self.assertTrue(math.isclose(get_sqrt_ratio_at_tick(tick), expected, rel_tol=1e-10), tick)
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            get_sqrt_ratio_at_tick(MAX_TICK + 1)
+
+
+class TestAmountsForLiquidity(unittest.TestCase):
+    """Test exact amounts against the float formula."""
+
+    def test_matches_float_formula(self):
+        liquidity = 3 * 10 ** 24
+        low, high = get_sqrt_ratio_at_tick(-6000), get_sqrt_ratio_at_tick(9000)
+        for current in (get_sqrt_ratio_at_tick(-9000), get_sqrt_ratio_at_tick(120), get_sqrt_ratio_at_tick(9000)):
+            a0, a1 = amounts_for_liquidity(current, high, low, liquidity)  # swapped bounds
+            f0, f1 = stellaswap_store_raw_data.calculate_token_amounts(
+                liquidity, current / 2 ** 96, low / 2 ** 96, high / 2 ** 96)
+            self.assertIsInstance(a0, int)
+            self.assertTrue(math.isclose(a0, f0, rel_tol=1e-9, abs_tol=1))
+            self.assertTrue(math.isclose(a1, f1, rel_tol=1e-9, abs_tol=1))
+
+    def test_exact_for_large_liquidity(self):
+        """Test that uint128-sized liquidity keeps every unit (float would not)."""
+        liquidity = 2 ** 128 - 1
+        sqrt_a, sqrt_b = get_sqrt_ratio_at_tick(0), get_sqrt_ratio_at_tick(60)
+        _, a1 = amounts_for_liquidity(sqrt_b, sqrt_a, sqrt_b, liquidity)
+        self.assertEqual(a1, (liquidity * (sqrt_b - sqrt_a)) >> 96)
+
+
+class TestSqrtPriceTable(unittest.TestCase):
+    """Test the on-disk lookup table."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_built_once_then_loaded(self):
+        table = SqrtPriceTable(tick_spacing=200, cache_dir=self.tmp.name)
+        self.assertTrue(os.path.exists(table.path))
+
+        with patch('tick_math.get_sqrt_ratio_at_tick', side_effect=AssertionError("rebuilt")):
+            loaded = SqrtPriceTable(tick_spacing=200, cache_dir=self.tmp.name)
+            self.assertEqual(loaded[-400], table[-400])
+            self.assertEqual(loaded[loaded.min_tick], table[table.min_tick])
+
+        for tick in (loaded.min_tick, -200, 0, 600, -loaded.min_tick):
+            self.assertEqual(loaded[tick], get_sqrt_ratio_at_tick(tick))
+
+    def test_off_grid_tick_computed(self):
+        table = SqrtPriceTable(tick_spacing=200, cache_dir=self.tmp.name)
+        self.assertEqual(table[-7], get_sqrt_ratio_at_tick(-7))
+        self.assertEqual(table[MAX_TICK], MAX_SQRT_RATIO)
+
+    def test_malformed_cache_rebuilt(self):
+        table = SqrtPriceTable(tick_spacing=200, cache_dir=self.tmp.name)
+        with open(table.path, "wb") as f:
+            f.write(b"garbage")
+        rebuilt = SqrtPriceTable(tick_spacing=200, cache_dir=self.tmp.name)
+        self.assertEqual(rebuilt[200], get_sqrt_ratio_at_tick(200))
+        self.assertGreater(os.path.getsize(table.path), 7)
+
+
+class TestExactMode(unittest.TestCase):
+    """Test exact_token_amounts and the fetch_token_amounts mode switch."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.table = SqrtPriceTable(tick_spacing=60, cache_dir=self.tmp.name)
+        price = get_sqrt_ratio_at_tick(1234)
+        self.positions = [
+            _position(-6000, 6000, 10 ** 20, price),
+            _position(1200, 1260, 7 * 10 ** 18, price),
+            _position(3000, 60000, 12345678901234567890, price),
+            _position(-60000, -600, 10 ** 19, price),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_close_to_float_mode(self):
+        exact = exact_token_amounts([self.positions[:2], [], self.positions[2:]], table=self.table)
+        approx = clmm_math.pool_token_amounts(self.positions)
+        for got, want in zip(exact, approx):
+            self.assertTrue(math.isclose(got, want, rel_tol=1e-9))
+        self.assertIsNone(exact_token_amounts([[]], table=self.table))
+
+    def test_fetch_token_amounts_mode(self):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"data": {"positions": self.positions}}
+        with patch('stellaswap_store_raw_data.requests.post', return_value=response), \
+                patch('tick_math.get_tick_table', return_value=self.table):
+            exact = stellaswap_store_raw_data.fetch_token_amounts("0xpool", mode="exact")
+            approx = stellaswap_store_raw_data.fetch_token_amounts("0xpool", mode="float")
+
+        expected = exact_token_amounts([self.positions], table=self.table)
+        self.assertEqual(exact, expected)
+        self.assertTrue(math.isclose(exact[0], approx[0], rel_tol=1e-9))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            stellaswap_store_raw_data.fetch_all_token_amounts(["0xpool"], mode="fast")
+
+
+if __name__ == '__main__':
+    unittest.main()